@@ -1,4 +1,6 @@
 from sql_connection import get_sql_connection
+from utils.name_index import canonical_state, canonical_district, canonicalize_column
+from utils.snapshot import write_snapshot
 import pandas as pd
 import json
 import os
@@ -11,6 +13,24 @@ BATCH_SIZE = 20000
 def execute_query(cur, query):
     cur.execute(query)
 
+
+def bump_data_version(cur, table):
+    # call in the same transaction as every commit that publishes new rows of
+    # `table`, so the dashboard caches keyed on it (utils/db.get_data_version)
+    # never hold those rows under the version from before them
+    cur.execute(
+        "INSERT INTO data_versions (table_name, version) VALUES (%s, 1) "
+        "ON DUPLICATE KEY UPDATE version = version + 1;",
+        (table.lower(),)
+    )
+
+
+def insert_batch(connection, cur, table, insert_query, rows):
+    """Insert one batch and bump `table`'s data version in a single commit."""
+    cur.executemany(insert_query, rows)
+    bump_data_version(cur, table)
+    connection.commit()
+
 def create_tables(connection):
     cur = connection.cursor()
     execute_query(cur, "CREATE DATABASE IF NOT EXISTS phonepe;")
@@ -131,6 +151,60 @@ def create_tables(connection):
 );
         
         
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS agg_state_period (
+            State VARCHAR(100), Year SMALLINT, Quarter TINYINT,
+            Transaction_count BIGINT,
+            Transaction_amount DECIMAL(20,2),
+            PRIMARY KEY (State, Year, Quarter)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS device_brand_cube (
+            Brand VARCHAR(100), State VARCHAR(100), Year SMALLINT, Quarter TINYINT,
+            Count BIGINT,
+            PRIMARY KEY (Brand, State, Year, Quarter)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS insurance_state_summary (
+            State VARCHAR(100), Year SMALLINT, Quarter TINYINT,
+            Transaction_count BIGINT,
+            Transaction_amount DECIMAL(20,2),
+            Avg_Premium DECIMAL(18,2),
+            Prev_Transaction_count BIGINT,
+            Count_Growth_Pct DOUBLE,
+            Amount_Growth_Pct DOUBLE,
+            PRIMARY KEY (State, Year, Quarter)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS insurance_district_summary (
+            District VARCHAR(100), State VARCHAR(100), Year SMALLINT, Quarter TINYINT,
+            Transaction_count BIGINT,
+            Transaction_amount DECIMAL(20,2),
+            Avg_Premium DECIMAL(18,2),
+            Prev_Transaction_count BIGINT,
+            Count_Growth_Pct DOUBLE,
+            Amount_Growth_Pct DOUBLE,
+            PRIMARY KEY (District, State, Year, Quarter)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS dimension_catalog (
+            table_name VARCHAR(64),
+            dimension VARCHAR(64),
+            value VARCHAR(100),
+            PRIMARY KEY (table_name, dimension, value)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS data_versions (
+            table_name VARCHAR(64) PRIMARY KEY,
+            version INT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        );
         """
     ]
 
@@ -142,12 +216,130 @@ def create_tables(connection):
     print("✅ Database and tables created successfully")
 
 
+"""
+Rollup Tables (rebuilt from the fact tables after every load)
+"""
+INSURANCE_SUMMARY = """
+    INSERT INTO {table} ({keys}, Year, Quarter, Transaction_count, Transaction_amount,
+                         Avg_Premium, Prev_Transaction_count, Count_Growth_Pct, Amount_Growth_Pct)
+    SELECT {keys}, Year, Quarter, Txn_count, Txn_amount,
+           Txn_amount / NULLIF(Txn_count, 0),
+           Prev_count,
+           (Txn_count - Prev_count) / NULLIF(Prev_count, 0) * 100,
+           (Txn_amount - Prev_amount) / NULLIF(Prev_amount, 0) * 100
+    FROM (
+        SELECT {keys}, Year, Quarter,
+               SUM({count}) AS Txn_count,
+               SUM({amount}) AS Txn_amount,
+               LAG(SUM({count})) OVER (PARTITION BY {keys} ORDER BY Year, Quarter) AS Prev_count,
+               LAG(SUM({amount})) OVER (PARTITION BY {keys} ORDER BY Year, Quarter) AS Prev_amount
+        FROM {source}
+        GROUP BY {keys}, Year, Quarter
+    ) AS g;
+"""
+
+ROLLUP_QUERIES = {
+    # State x period totals behind the heat map and its animation frames
+    "agg_state_period": """
+        INSERT INTO agg_state_period (State, Year, Quarter, Transaction_count, Transaction_amount)
+        SELECT State, Year, Quarter, SUM(Transaction_count), SUM(Transaction_amount)
+        FROM Aggregated_Transaction_Data
+        GROUP BY State, Year, Quarter;
+    """,
+    # Insurance count / amount / average premium / QoQ growth per state and district
+    "insurance_state_summary": INSURANCE_SUMMARY.format(
+        table="insurance_state_summary", keys="State", source="Aggregated_Insurance_Data",
+        count="Transaction_count", amount="Transaction_amount"),
+    "insurance_district_summary": INSURANCE_SUMMARY.format(
+        table="insurance_district_summary", keys="District, State", source="map_insurance_data",
+        count="Transaction_Count", amount="Transaction_Amount"),
+    # Brand x State x Year x Quarter device counts behind device_insights
+    "device_brand_cube": """
+        INSERT INTO device_brand_cube (Brand, State, Year, Quarter, Count)
+        SELECT Brand, State, Year, Quarter, SUM(Count)
+        FROM Aggregated_user_Data
+        GROUP BY Brand, State, Year, Quarter;
+    """,
+}
+
+
+def build_rollups(connection):
+    cur = connection.cursor()
+    execute_query(cur, "USE phonepe;")
+    for table, query in ROLLUP_QUERIES.items():
+        execute_query(cur, f"DELETE FROM {table};")
+        execute_query(cur, query)
+        bump_data_version(cur, table)
+        connection.commit()
+        print(f"✅ Rebuilt rollup {table}")
+    cur.close()
+
+
+"""
+Dimension Catalog (distinct filter values per table, read by utils/catalog.py)
+"""
+CATALOG_DIMENSIONS = {
+    "aggregated_transaction_data": ["State", "Year", "Quarter", "Transaction_type"],
+    "aggregated_user_data": ["State", "Year", "Quarter", "Brand"],
+    "aggregated_insurance_data": ["State", "Year", "Quarter"],
+    "map_transaction_data": ["State", "Year", "Quarter"],
+    "map_user_data": ["State", "Year", "Quarter"],
+    "map_insurance_data": ["State", "Year", "Quarter"],
+    "top_user_data": ["State", "Year", "Quarter"],
+    "top_transaction_data": ["State", "Year", "Quarter"],
+    "top_insurance_data": ["State", "Year", "Quarter"],
+}
+
+
+def build_catalog(connection):
+    cur = connection.cursor()
+    execute_query(cur, "USE phonepe;")
+    execute_query(cur, "DELETE FROM dimension_catalog;")
+    for table, dimensions in CATALOG_DIMENSIONS.items():
+        for dimension in dimensions:
+            execute_query(cur, f"""
+                INSERT INTO dimension_catalog (table_name, dimension, value)
+                SELECT DISTINCT '{table}', '{dimension}', CAST({dimension} AS CHAR)
+                FROM {table}
+                WHERE {dimension} IS NOT NULL;
+            """)
+    bump_data_version(cur, "dimension_catalog")
+    connection.commit()
+    cur.close()
+    print("✅ Rebuilt dimension_catalog")
+
+
+"""
+File Snapshot (Arrow + Parquet copy of the dashboard tables, see utils/snapshot.py)
+"""
+SNAPSHOT_TABLES = [
+    "aggregated_transaction_data", "aggregated_user_data", "aggregated_insurance_data",
+    "map_transaction_data", "map_user_data", "map_insurance_data",
+    "top_user_data", "top_transaction_data", "top_insurance_data",
+    *ROLLUP_QUERIES,
+    "dimension_catalog", "data_versions",
+]
+
+
+def publish_snapshot(connection, directory):
+    # run after the last commit, so the snapshot matches data_versions
+    tables = {}
+    for table in SNAPSHOT_TABLES:
+        cur = connection.cursor()
+        execute_query(cur, f"SELECT * FROM phonepe.{table};")
+        tables[table] = pd.DataFrame(cur.fetchall(), columns=cur.column_names)
+        cur.close()
+    run_dir = write_snapshot(tables, directory)
+    print(f"✅ Published snapshot {run_dir}")
+
+
 def load_json_from_paths(excel_path, extract_func, table, columns):
     connection = get_sql_connection()
     cur = connection.cursor()
     cur.execute("USE phonepe;")
 
     paths_df = pd.read_excel(excel_path)
+    insert_query = f"INSERT INTO {table} ({','.join(columns)}) VALUES ({','.join(['%s']*len(columns))})"
     pending_values = []
     errors = []
 
@@ -164,25 +356,19 @@ def load_json_from_paths(excel_path, extract_func, table, columns):
             continue
 
         parts = p.replace("\\", "/").split("/")
-        df["State"], df["Year"] = parts[-3], parts[-2]
+        df["State"], df["Year"] = canonical_state(parts[-3]), parts[-2]
         df["Quarter"] = parts[-1].split(".")[0]
+        if "District" in df.columns:
+            df["District"] = canonicalize_column(df["District"], canonical_district)
         df = df[columns]
         pending_values.extend([tuple(x) for x in df.to_numpy()])
 
         if len(pending_values) >= BATCH_SIZE:
-            cur.executemany(
-                f"INSERT INTO {table} ({','.join(columns)}) VALUES ({','.join(['%s']*len(columns))})",
-                pending_values
-            )
-            connection.commit()
+            insert_batch(connection, cur, table, insert_query, pending_values)
             pending_values = []
 
     if pending_values:
-        cur.executemany(
-            f"INSERT INTO {table} ({','.join(columns)}) VALUES ({','.join(['%s']*len(columns))})",
-            pending_values
-        )
-        connection.commit()
+        insert_batch(connection, cur, table, insert_query, pending_values)
 
     cur.close()
     connection.close()
@@ -255,7 +441,7 @@ def ext_map_ins(js, state, year, quarter):
 
     records = []
     for item in hover_data_list:
-        district = item.get("name", "").title()
+        district = canonical_district(item.get("name", ""))
         metrics = item.get("metric", [])
         if not metrics:
             # keep a record with zeros if metric missing (optional)
@@ -370,7 +556,7 @@ def load_data_Table_map_insurance(connection, excel_path, batch_size=50000, debu
         try:
             # best-effort mapping: assume .../<state>/<year>/<quarter>.json
             if len(parts) >= 3:
-                state = parts[-3]
+                state = canonical_state(parts[-3])
                 year_raw = parts[-2]
                 quarter_raw = parts[-1].split(".")[0]
                 try:
@@ -436,10 +622,10 @@ def load_data_Table_map_insurance(connection, excel_path, batch_size=50000, debu
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
             """
             try:
-                cur.executemany(insert_query, pending_values)
-                connection.commit()
+                insert_batch(connection, cur, "map_insurance_data", insert_query, pending_values)
                 print(f"✅ Inserted batch of {len(pending_values)} rows into map_insurance_data")
             except Exception as e:
+                connection.rollback()
                 tb = traceback.format_exc()
                 print("❌ Batch insert error:", e)
                 print(tb)
@@ -457,10 +643,10 @@ def load_data_Table_map_insurance(connection, excel_path, batch_size=50000, debu
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
         try:
-            cur.executemany(insert_query, pending_values)
-            connection.commit()
+            insert_batch(connection, cur, "map_insurance_data", insert_query, pending_values)
             print(f"✅ Inserted final {len(pending_values)} rows into map_insurance_data")
         except Exception as e:
+            connection.rollback()
             tb = traceback.format_exc()
             print("❌ Final insert error:", e)
             print(tb)
@@ -535,6 +721,12 @@ def main():
     
     
 
+    # rebuilding rollup tables
+    build_rollups(connection)
+    build_catalog(connection)
+    if os.environ.get("PHONEPE_SNAPSHOT_DIR"):
+        publish_snapshot(connection, os.environ["PHONEPE_SNAPSHOT_DIR"])
+
     print("🎯 All data loading complete")
     connection.close()
 
@@ -1,30 +1,145 @@
-from sql_connection import get_sql_connection
-from utils.helper_func import normalize_state_names
-from utils.helper_func import format_number
+from utils.db import get_data_version
+from utils.query_builder import run_query
+from utils.formatters import format_numbers
+from utils.catalog import get_options
+from utils.prefetch import PREFETCHER, neighbour_selections
+from utils.figure_cache import cached_figure
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import json
 import requests
 
+GEOJSON_URL = (
+    "https://gist.githubusercontent.com/jbrobst/56c13bbbf9d97d187fea01ca62ea5112/"
+    "raw/e388c4cae20aa53cb5090210a42ebb9b765c0a36/india_states.geojson"
+)
+
+HOVER_TEMPLATE = (
+    "<b>%{customdata[0]}</b><br>"
+    "Transaction Value: ₹%{z:,.0f}<br>"
+    "Approx: %{customdata[1]}<extra></extra>"
+)
+
 # ==========================================
-# CACHE CONNECTION
+# SHARED GEOMETRY + STATE x PERIOD TABLE
 # ==========================================
 @st.cache_resource
-def get_connection():
-    conn = get_sql_connection()
-    cur = conn.cursor()
-    cur.execute("USE phonepe;")
-    return conn
+def load_india_geojson():
+    """Download the India GeoJSON once per process; every figure shares it."""
+    response = requests.get(GEOJSON_URL)
+    return json.loads(response.text)
+
+
+def _amounts(df):
+    # DECIMAL sums arrive as object-dtype Decimals on the MySQL prepared path
+    df["Total_Amount"] = df["Total_Amount"].astype(float)
+    return df
+
+
+def load_state_period():
+    """State x Year x Quarter totals, pre-aggregated by the ETL (agg_state_period)."""
+    return run_query("""
+        SELECT State, Year, Quarter, Transaction_amount AS Total_Amount
+        FROM agg_state_period
+        ORDER BY Year, Quarter, State;
+    """, ("agg_state_period",), _amounts)
 
-connection = get_connection()
 
 # ==========================================
-# CACHE QUERY EXECUTION
+# FIGURE BUILDERS
 # ==========================================
-@st.cache_data(ttl=200)
-def fetch_data(query):
-    return pd.read_sql(query, connection)
+def style_map(fig):
+    # Transparent background setup
+    fig.update_geos(
+        fitbounds="locations",
+        visible=False,
+        bgcolor='rgba(0,0,0,0)'  # transparent geo background
+    )
+    fig.update_layout(
+        margin=dict(r=0, t=40, l=0, b=0),
+        paper_bgcolor='rgba(0,0,0,0)',  # full transparent
+        plot_bgcolor='rgba(0,0,0,0)',   # transparent plot background
+        coloraxis_colorbar=dict(
+            title="Transaction Value (₹)",
+            tickformat=".2s"
+        ),
+        font=dict(color="#FFFFFF") if st.get_option("theme.base") == "dark" else dict(color="#00000000"),
+        width=1000,  # increase width
+        height=800,  # increase height
+    )
+    return fig
+
+
+def build_year_map(selected_year, data_version):
+    df = load_state_period()
+    df = df[df["Year"] == int(selected_year)]
+    df = df.groupby("State", as_index=False)["Total_Amount"].sum()
+    df["Approx"] = format_numbers(df["Total_Amount"])
+
+    fig = px.choropleth(
+        df,
+        geojson=load_india_geojson(),
+        featureidkey="properties.ST_NM",
+        locations="State",
+        color="Total_Amount",
+        color_continuous_scale="Viridis",
+        title=f"Transaction Volume Across India ({selected_year})",
+        custom_data=["State", "Approx"],
+    )
+    fig.update_traces(hovertemplate=HOVER_TEMPLATE)
+    return style_map(fig)
+
+
+def build_animated_map(step, data_version):
+    """
+    Build every frame once from the state x period table.
+
+    Only the base trace carries the GeoJSON; frames hold just the values
+    (plotly.js merges each frame into the base trace, so they keep its
+    geometry). With one fixed color range, scrubbing the slider or pressing
+    play runs entirely in the browser.
+    """
+    df = load_state_period()
+    if step == "Year":
+        df = df.groupby(["State", "Year"], as_index=False)["Total_Amount"].sum()
+        df["Period"] = df["Year"].astype(str)
+        df = df.sort_values(["Year", "State"])
+    else:
+        df = df.copy()
+        df["Period"] = df["Year"].astype(str) + " Q" + df["Quarter"].astype(str)
+        df = df.sort_values(["Year", "Quarter", "State"])
+    df["Approx"] = format_numbers(df["Total_Amount"])
+
+    fig = px.choropleth(
+        df,
+        geojson=load_india_geojson(),
+        featureidkey="properties.ST_NM",
+        locations="State",
+        color="Total_Amount",
+        color_continuous_scale="Viridis",
+        range_color=(0, float(df["Total_Amount"].max())),
+        animation_frame="Period",
+        title=f"Transaction Volume Across India (by {step})",
+        custom_data=["State", "Approx"],
+    )
+    fig.update_traces(hovertemplate=HOVER_TEMPLATE)
+    for frame in fig.frames:
+        for trace in frame.data:
+            trace.geojson = None
+            trace.hovertemplate = HOVER_TEMPLATE
+    return style_map(fig)
+
+
+# Figures go through FIGURES as JSON (bounded, counted against the memory
+# budget) instead of sharing one mutable Figure between sessions
+def year_map(selected_year, data_version):
+    return cached_figure("heatmap", "year", (selected_year, data_version),
+                         lambda: build_year_map(selected_year, data_version))
+
+
+def animated_map(step, data_version):
+    return cached_figure("heatmap", "animated", (step, data_version),
+                         lambda: build_animated_map(step, data_version))
 
 
 # ==========================================
@@ -38,10 +153,11 @@ def Heat_Map():
     )
 
     # -------------------------------
-    # 1️⃣ Load years
+    # 1️⃣ Load years (dimension catalog) + state x period table
     # -------------------------------
-    df_years = fetch_data("SELECT DISTINCT Year FROM Aggregated_Transaction_Data ORDER BY Year ASC;")
-    year_list = df_years["Year"].astype(str).tolist()
+    data_version = get_data_version("agg_state_period")
+    df = load_state_period()
+    year_list = [str(y) for y in get_options("aggregated_transaction_data", "Year")]
     year_list.insert(0, "All Years")
 
     # -------------------------------
@@ -55,89 +171,48 @@ def Heat_Map():
     )
 
     # -------------------------------
-    # 3️⃣ Build query
-    # -------------------------------
-    where_clause = "" if selected_year == "All Years" else f"WHERE Year = {selected_year}"
-
-    query = f"""
-        SELECT State, Year, SUM(transaction_amount) AS Total_Amount
-        FROM Aggregated_Transaction_Data
-        {where_clause}
-        GROUP BY State, Year
-        ORDER BY Year;
-    """
-
-    df = fetch_data(query)
-    df = normalize_state_names(df, "State")
-
-    # -------------------------------
-    # 4️⃣ Load India GeoJSON
+    # 3️⃣ Choropleth Map
     # -------------------------------
-    geojson_url = (
-        "https://gist.githubusercontent.com/jbrobst/56c13bbbf9d97d187fea01ca62ea5112/"
-        "raw/e388c4cae20aa53cb5090210a42ebb9b765c0a36/india_states.geojson"
-    )
-    response = requests.get(geojson_url)
-    india_states = json.loads(response.text)
+    if selected_year == "All Years":
+        step = st.radio("Animate by", ["Year", "Quarter"], horizontal=True, key="heatmap_step")
+        fig = animated_map(step, data_version)
+    else:
+        fig = year_map(selected_year, data_version)
 
-    # -------------------------------
-    # 5️⃣ Choropleth Map
-    # -------------------------------
-    fig = px.choropleth(
-        df,
-        geojson=india_states,
-        featureidkey="properties.ST_NM",
-        locations="State",
-        color="Total_Amount",
-        color_continuous_scale="Viridis",
-        title=f"Transaction Volume Across India ({selected_year})",
-        hover_name="State",
-        hover_data={"Total_Amount": True},
-    )
-
-    # Hover and formatting
-    fig.update_traces(
-        hovertemplate=(
-            "<b>%{customdata[0]}</b><br>"
-            "Transaction Value: ₹%{z:,.0f}<br>"
-            "Approx: %{text}<extra></extra>"
-        ),
-        text=[format_number(v) for v in df["Total_Amount"]],
-        customdata=df[["State"]],
-    )
+    # Display Map
+    st.plotly_chart(fig, use_container_width=True)
 
-    # Transparent background setup
-    fig.update_geos(
-        fitbounds="locations",
-        visible=False,
-        bgcolor='rgba(0,0,0,0)'  # transparent geo background
-    )
-    fig.update_layout(
-        margin=dict(r=0, t=40, l=0, b=0),
-        paper_bgcolor='rgba(0,0,0,0)',  # full transparent
-        plot_bgcolor='rgba(0,0,0,0)',   # transparent plot background
-        coloraxis_colorbar=dict(
-            title="Transaction Value (₹)",
-            tickformat=".2s"
-        ),
-        font=dict(color="#FFFFFF") if st.get_option("theme.base") == "dark" else dict(color="#00000000")
-    )
-    
-    fig.update_layout(
-    width=1000,  # increase width
-    height=800,  # increase height
-    )
+    # Build the previous / next year maps in the background
+    if selected_year != "All Years":
+        for n in neighbour_selections({"Year": selected_year}, {"Year": year_list[1:]}):
+            PREFETCHER.prefetch(("heatmap", n["Year"], data_version), year_map, n["Year"], data_version)
 
-     # Display Map
-    st.plotly_chart(fig, use_container_width=True)
-    
 
     # -------------------------------
-    # 6️⃣ Unmatched State Warning
+    # 4️⃣ Unmatched State Warning
     # -------------------------------
+    india_states = load_india_geojson()
     geo_states = {f["properties"]["ST_NM"] for f in india_states["features"]}
     unmatched = sorted(set(df["State"]) - geo_states)
 
     if unmatched:
         st.warning(f"⚠️ The following states are unmatched and not shown: {', '.join(unmatched)}")
 
+
+# ==========================================
+# CACHE WARM-UP (utils/warmup.py)
+# ==========================================
+def warm_heat_map():
+    """GeoJSON, state x period table, the default (latest) year map and both animated maps."""
+    load_india_geojson()
+    data_version = get_data_version("agg_state_period")
+    load_state_period()
+    warmed = ["geojson", "state_period"]
+    years = get_options("aggregated_transaction_data", "Year")
+    if years:
+        year_map(str(years[-1]), data_version)
+        warmed.append(f"year_map_{years[-1]}")
+    for step in ("Year", "Quarter"):
+        animated_map(step, data_version)
+        warmed.append(f"animated_{step.lower()}")
+    return warmed
@@ -1,53 +1,28 @@
 # mainpage.py — Optimized Streamlit PhonePe Dashboard with Abbreviated Metrics
 
+import hmac
+import os
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from sql_connection import get_sql_connection
-from insurance_insight import insurance_insights
-from show_transaction_analysis import show_transaction_analysis
-from show_transaction_dynamics import show_transaction_dynamics
-from states_nd_districts import states_n_districts
-from device_insights import device_insights
-from states_n_districts_ins import states_n_districts_ins
-from Heatmap import Heat_Map
-from utils import helper_func
+from insurance_insight import insurance_insights, warm_insurance_insights
+from show_transaction_analysis import show_transaction_analysis, warm_transaction_analysis
+from show_transaction_dynamics import show_transaction_dynamics, warm_transaction_dynamics
+from states_nd_districts import states_n_districts, warm_states_n_districts
+from device_insights import device_insights, warm_device_insights
+from states_n_districts_ins import states_n_districts_ins, warm_states_n_districts_ins
+from Heatmap import Heat_Map, warm_heat_map
+from cache_admin import cache_admin
+from diagnostics import diagnostics
+from utils.warmup import start_warmup
+from utils import telemetry
+from utils.profiling import profiled
+from utils.perf import cpu_section
 
 
 
 # Streamlit Config
 st.set_page_config(page_title="PhonePe Project", layout="wide")
 
-# Database Connection Caching
-@st.cache_resource
-def get_connection():
-    conn = get_sql_connection()
-    cur = conn.cursor()
-    cur.execute("USE phonepe;")
-    return conn
-
-connection = get_connection()
-
-# Data Load and Distinct Value Caching
-@st.cache_data(ttl=3600)
-def load_base_data():
-    query = """SELECT State, Year, Quarter, Transaction_type, 
-                      SUM(Transaction_count) AS Transaction_count, 
-                      SUM(Transaction_amount) AS Transaction_amount
-               FROM aggregated_transaction_data
-               GROUP BY State, Year, Quarter, Transaction_type"""
-    df = pd.read_sql(query, connection)
-    return df
-
-@st.cache_data(ttl=3600)
-def get_distinct_states(df):
-    return sorted(df['State'].dropna().unique().tolist())
-
-@st.cache_data(ttl=3600)
-def get_distinct_years(df):
-    return sorted(df['Year'].dropna().unique().tolist())
-
-
 # Visualization
 
 
@@ -75,8 +50,39 @@ def show_overview():
 
 
 
+# Cache warm-up for every page (see utils/warmup.py)
+WARMERS = {
+    'Transaction Analysis': warm_transaction_analysis,
+    'Transaction Dynamics': warm_transaction_dynamics,
+    'Transactions across States and Districts': warm_states_n_districts,
+    "User's Device Wise Insight": warm_device_insights,
+    'Insurance Insights': warm_insurance_insights,
+    'Insurance across States and Districts': warm_states_n_districts_ins,
+    "HeatMap across States": warm_heat_map,
+}
+
+
+def admin_token():
+    """The admin pages' token: `admin_token` in st.secrets, else PHONEPE_ADMIN_TOKEN; None disables them."""
+    try:
+        token = st.secrets.get("admin_token")
+    except FileNotFoundError:
+        token = None
+    return token or os.environ.get("PHONEPE_ADMIN_TOKEN") or None
+
+
+def admin_requested():
+    """True when ?admin=<token> matches the configured admin token."""
+    token = admin_token()
+    given = st.query_params.get('admin')
+    return token is not None and given is not None and hmac.compare_digest(given.encode(), str(token).encode())
+
+
 # Main App Logic
 def main():
+    # starts the process-wide background warm-up once, before any page renders
+    start_warmup(WARMERS)
+
     if 'current_page' not in st.session_state:
         st.session_state['current_page'] = 'Overview'
 
@@ -92,6 +98,10 @@ def main():
         "HeatMap across States":Heat_Map
         
     }
+    # admin pages stay out of the navigation unless the URL carries the admin token
+    if admin_requested():
+        pages['Cache Admin'] = cache_admin
+        pages['Diagnostics'] = diagnostics
         # Set default page if not already set
     if 'current_page' not in st.session_state:
         st.session_state['current_page'] = list(pages.keys())[0]  # First page as default
@@ -101,8 +111,13 @@ def main():
         if st.sidebar.button(page_name):
             st.session_state['current_page'] = page_name
 
-    # Render the selected page
-    pages[st.session_state['current_page']]()
+    # Render the selected page (its queries are recorded under its name and its
+    # CPU time under "page: <name>"; ?profile=1 profiles the rerun, see utils/profiling.py)
+    current = st.session_state['current_page']
+    if current not in pages:
+        current = 'Overview'
+    with telemetry.page(current), profiled(current), cpu_section(f"page: {current}"):
+        pages[current]()
 
 if __name__ == "__main__":
     main()
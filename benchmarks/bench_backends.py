@@ -0,0 +1,87 @@
+# bench_backends.py — Every dashboard query on MySQL vs DuckDB (Parquet / Arrow)
+#
+# The query set is recorded by running every page's warm-up (MainPage.WARMERS)
+# once, so it follows the pages as they change. Each query is then timed on
+# every backend against the same ETL run (PHONEPE_SNAPSHOT_DIR for the file
+# backends).
+#
+# Run from the project root:  python -m benchmarks.bench_backends [mysql duckdb snapshot]
+
+import sys
+import timeit
+
+import utils.db as db
+from utils.backends import BACKENDS, MySQLBackend
+
+REPEAT = 5
+RECORD_WITH = "duckdb"
+
+
+def make_backend(name):
+    if name == MySQLBackend.name:
+        return MySQLBackend(db.pooled_connection)
+    return BACKENDS[name]()
+
+
+def record_queries(backend):
+    """(query, params, prepared) of every distinct query the page warm-ups send."""
+    from MainPage import WARMERS
+
+    recorded = {}
+
+    class Recorder:
+        name = backend.name
+
+        def execute(self, query, params=None, prepared=False):
+            recorded.setdefault(db.query_key(query, params), (query, params, prepared))
+            return backend.execute(query, params, prepared)
+
+    db.get_backend = lambda name=None: Recorder()
+    for page, warm in WARMERS.items():
+        try:
+            warm()
+        except Exception as exc:
+            print(f"⚠️ {page}: warm-up failed ({exc}), its queries are missing")
+    return list(recorded.values())
+
+
+def fingerprint(query, width=56):
+    text = " ".join(query.split())
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def best_of(backend, query, params, prepared):
+    backend.execute(query, params, prepared)  # first run opens files / plans
+    return min(timeit.repeat(lambda: backend.execute(query, params, prepared), number=1, repeat=REPEAT))
+
+
+def main(names):
+    queries = record_queries(make_backend(RECORD_WITH))
+    print(f"{len(queries)} distinct dashboard queries\n")
+
+    backends = {}
+    for name in names:
+        try:
+            backend = make_backend(name)
+            backend.execute("SELECT 1 AS ok")
+            backends[name] = backend
+        except Exception as exc:
+            print(f"⚠️ {name} unavailable: {exc}")
+
+    print(f"{'query':<56} {'rows':>7} " + " ".join(f"{name + ' (ms)':>14}" for name in backends))
+    totals = dict.fromkeys(backends, 0.0)
+    for query, params, prepared in queries:
+        rows = set()
+        timings = []
+        for name, backend in backends.items():
+            rows.add(len(backend.execute(query, params, prepared)))
+            seconds = best_of(backend, query, params, prepared)
+            totals[name] += seconds
+            timings.append(f"{seconds * 1e3:>14.2f}")
+        count = str(rows.pop()) if len(rows) == 1 else "differ"
+        print(f"{fingerprint(query):<56} {count:>7} " + " ".join(timings))
+    print(f"{'total':<56} {'':>7} " + " ".join(f"{seconds * 1e3:>14.2f}" for seconds in totals.values()))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or list(BACKENDS))
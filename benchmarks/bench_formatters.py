@@ -0,0 +1,58 @@
+# bench_formatters.py — Per-row `.apply(format_number)` vs utils.formatters
+#
+# `format_number` below is the row-by-row formatter the pages used before
+# utils.formatters (B / M / K with two decimals, with the unit now chosen
+# after rounding), kept here as the reference both for speed and for the
+# labels: the benchmark also counts the rows on which the two disagree.
+#
+# Run from the project root:  python -m benchmarks.bench_formatters
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from utils.formatters import format_numbers, nice_ticks
+
+SIZES = (100, 10_000, 1_000_000)
+REPEAT = 5
+
+UNITS = ((1.0, ""), (1e3, "K"), (1e6, "M"), (1e9, "B"))
+
+
+def format_number(value, decimals=2):
+    """Reference: one value at a time, the way `.apply` called it (unit chosen after rounding)."""
+    if pd.isna(value):
+        return ""
+    magnitude = abs(value)
+    i = max(i for i, (threshold, _) in enumerate(UNITS) if i == 0 or magnitude >= threshold)
+    text = f"{magnitude / UNITS[i][0]:.{decimals}f}"
+    if float(text) >= 1000 and i < len(UNITS) - 1:
+        i += 1
+        text = f"{magnitude / UNITS[i][0]:.{decimals}f}"
+    sign = "-" if value < 0 and float(text) != 0 else ""
+    return f"{sign}{text}{UNITS[i][1]}"
+
+
+def best_of(func):
+    number = 1
+    return min(timeit.repeat(func, number=number, repeat=REPEAT)) / number
+
+
+def main():
+    rng = np.random.default_rng(42)
+    print(f"{'rows':>10} {'apply (ms)':>12} {'vectorized (ms)':>16} {'speedup':>8} {'mismatches':>11}")
+    for size in SIZES:
+        values = pd.Series(rng.lognormal(mean=15, sigma=4, size=size))
+        t_apply = best_of(lambda: values.apply(format_number))
+        t_vector = best_of(lambda: format_numbers(values))
+        mismatches = int((values.apply(format_number) != format_numbers(values)).sum())
+        print(f"{size:>10} {t_apply * 1e3:>12.2f} {t_vector * 1e3:>16.2f} "
+              f"{t_apply / t_vector:>7.1f}x {mismatches:>11}")
+
+    t_ticks = best_of(lambda: nice_ticks(7.3e10))
+    print(f"\nnice_ticks: {t_ticks * 1e6:.1f} µs per axis")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# bench_pages.py — Headless render latency of every dashboard page
+#
+# Each page is rendered through Streamlit's AppTest against a seeded fixture
+# (benchmarks/fixtures.py) served by the DuckDB backend, in its own process
+# so the first render is really cold:
+#
+# - cold: first render, empty caches
+# - warm: a second session rendering the same page
+#
+# For both it records wall-clock latency, the number and total time of the
+# queries the page ran, and the time spent building Plotly figures. Only
+# work done for the page's own script run counts; the start-up warm-up is
+# switched off. Results are compared with a baseline file and the run fails
+# when a page got slower than the baseline allows or sends more queries.
+# A page that fails to render (an exception on the page or a crashed worker)
+# is not measured: it is listed with its error, left out of the baseline, and
+# the run exits non-zero — fix the page or leave it out with --pages.
+#
+# Run from the project root:
+#   python -m benchmarks.bench_pages [--sizes small medium large] [--update-baseline]
+
+import argparse
+import functools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.fixtures import SIZES, publish_fixture
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "bench_pages.json")
+TIMEOUT_SECONDS = 300
+
+# a run regresses when it is slower than baseline * (1 + TOLERANCE) + SLACK_MS
+# (timings are noisy), or when it sends more queries than the baseline
+TOLERANCE = 0.5
+SLACK_MS = 50
+
+
+# ==========================================
+# WORKER (one page, one fixture, one process)
+# ==========================================
+class Meter:
+    """Query and figure-build time of the page's script run (not background threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        self.queries = 0
+        self.query_ms = 0.0
+        self.figure_ms = 0.0
+
+    def wrap_query(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _in_script_run():
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.queries += 1
+                    self.query_ms += (time.perf_counter() - start) * 1000
+        return wrapper
+
+    def wrap_figure(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # px.* calls update_layout itself; only the outermost call counts
+            depth = getattr(self._local, "depth", 0)
+            if depth or not _in_script_run():
+                return func(*args, **kwargs)
+            self._local.depth = 1
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.depth = 0
+                with self._lock:
+                    self.figure_ms += (time.perf_counter() - start) * 1000
+        return wrapper
+
+
+def _in_script_run():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    return get_script_run_ctx(suppress_warning=True) is not None
+
+
+def install(meter):
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import utils.db as db
+    import utils.warmup as warmup
+
+    db._execute = meter.wrap_query(db._execute)
+    for name in px.__all__:
+        func = getattr(px, name)
+        if callable(func) and name[0].islower():
+            setattr(px, name, meter.wrap_figure(func))
+    for name in ("update_layout", "update_traces", "update_xaxes", "update_yaxes", "add_trace"):
+        setattr(go.Figure, name, meter.wrap_figure(getattr(go.Figure, name)))
+    # the background warm-up would fill the caches the cold run is measuring
+    warmup.start_warmup = lambda *args, **kwargs: None
+
+
+def render(page, meter):
+    from streamlit.testing.v1 import AppTest
+
+    meter.reset()
+    at = AppTest.from_file(os.path.join(ROOT, "MainPage.py"), default_timeout=TIMEOUT_SECONDS)
+    at.session_state["current_page"] = page
+    start = time.perf_counter()
+    at.run()
+    return {
+        "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        "queries": meter.queries,
+        "query_ms": round(meter.query_ms, 1),
+        "figure_ms": round(meter.figure_ms, 1),
+        "error": at.exception[0].message if at.exception else None,
+    }
+
+
+def run_worker(page):
+    sys.path.insert(0, ROOT)
+    meter = Meter()
+    install(meter)
+    result = {"cold": render(page, meter), "warm": render(page, meter)}
+    print(json.dumps(result))
+
+
+# ==========================================
+# DRIVER
+# ==========================================
+def page_names():
+    sys.path.insert(0, ROOT)
+    try:
+        from MainPage import WARMERS
+    except Exception as e:
+        sys.exit(f"❌ Cannot list the pages: importing MainPage failed ({type(e).__name__}: {e}). "
+                 "No page can render until this is fixed.")
+    return list(WARMERS)
+
+
+def failures(results):
+    """{(size, page): first error} for every page that did not render cleanly."""
+    return {
+        (size, page): next(m["error"] for m in runs.values() if m["error"])
+        for size, pages in results.items()
+        for page, runs in pages.items()
+        if any(m["error"] for m in runs.values())
+    }
+
+
+def bench_size(size, pages):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        publish_fixture(directory, size)
+        env = dict(os.environ, PHONEPE_DATA_SOURCE="duckdb", PHONEPE_SNAPSHOT_DIR=directory)
+        env.pop("PHONEPE_DISK_CACHE_DIR", None)
+        for page in pages:
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_pages", "--worker", page],
+                cwd=ROOT, env=env, capture_output=True, text=True,
+            )
+            lines = proc.stdout.strip().splitlines()
+            if proc.returncode or not lines:
+                error = (proc.stderr.strip().splitlines() or ["no output"])[-1]
+                failed = dict(latency_ms=None, queries=None, query_ms=None, figure_ms=None, error=error)
+                results[page] = {"cold": failed, "warm": failed}
+            else:
+                results[page] = json.loads(lines[-1])
+    return results
+
+
+def regressions(results, baseline):
+    found = []
+    for size, pages in results.items():
+        for page, runs in pages.items():
+            for run, metrics in runs.items():
+                base = baseline.get(size, {}).get(page, {}).get(run)
+                # failed pages are reported by failures()
+                if not base or base["error"] or metrics["error"]:
+                    continue
+                limit = base["latency_ms"] * (1 + TOLERANCE) + SLACK_MS
+                if metrics["latency_ms"] > limit:
+                    found.append(f"{size} / {page} / {run}: {metrics['latency_ms']:.0f} ms > {limit:.0f} ms allowed")
+                if metrics["queries"] > base["queries"]:
+                    found.append(f"{size} / {page} / {run}: {metrics['queries']} queries > {base['queries']}")
+    return found
+
+
+def print_table(size, pages):
+    print(f"\n{size} fixture")
+    print(f"{'page':<42} {'run':<5} {'latency':>9} {'queries':>8} {'query ms':>9} {'figure ms':>10}")
+    for page, runs in pages.items():
+        for run, m in runs.items():
+            if m["error"]:
+                print(f"{page:<42} {run:<5} failed: {m['error'][:80]}")
+                continue
+            print(f"{page:<42} {run:<5} {m['latency_ms']:>9.1f} {m['queries']:>8} "
+                  f"{m['query_ms']:>9.1f} {m['figure_ms']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless render latency of every dashboard page")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--pages", nargs="+", help="page names (default: every page)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="save this run as the new baseline")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(args.worker)
+
+    pages = args.pages or page_names()
+    results = {}
+    for size in args.sizes:
+        results[size] = bench_size(size, pages)
+        print_table(size, results[size])
+
+    failed = failures(results)
+    if failed:
+        print(f"\n❌ {len(failed)} page render(s) failed and were not measured "
+              "(fix the page or leave it out with --pages):")
+        for (size, page), error in failed.items():
+            print(f" - {size} / {page}: {error[:160]}")
+
+    if args.update_baseline:
+        measured = {
+            size: {page: runs for page, runs in pages.items() if (size, page) not in failed}
+            for size, pages in results.items()
+        }
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(measured, f, indent=2)
+        print(f"\n✅ Baseline saved to {args.baseline}" + (" without the failed pages" if failed else ""))
+    elif not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to record one")
+    else:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f))
+        if found:
+            print("\n❌ Regressions against the baseline:")
+            for line in found:
+                print(" -", line)
+        else:
+            print("\n✅ No regressions against the baseline")
+        failed = failed or found
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# fixtures.py — Seeded synthetic PhonePe data for benchmarks and load tests
+#
+# Builds every table the dashboard reads, in the ETL's schema, at a few
+# sizes. The fact tables are random but reproducible (one seed); rollups and
+# the dimension catalog are derived with the ETL's own rollup SQL (run by
+# DuckDB), so they match the facts exactly. publish_fixture writes the
+# result as a snapshot run that the "duckdb" / "snapshot" backends serve.
+
+import re
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from DataETL import ROLLUP_QUERIES, CATALOG_DIMENSIONS
+from utils.snapshot import write_snapshot
+
+SEED = 42
+
+# states x years x 4 quarters, with districts / pincodes per state
+SIZES = {
+    "small": dict(states=8, years=3, districts=5, pincodes=3),
+    "medium": dict(states=36, years=7, districts=20, pincodes=10),
+    "large": dict(states=36, years=10, districts=80, pincodes=10),
+}
+
+TRANSACTION_TYPES = ["Recharge & bill payments", "Peer-to-peer payments", "Merchant payments",
+                     "Financial Services", "Others"]
+BRANDS = ["Xiaomi", "Samsung", "Vivo", "Oppo", "Realme", "Apple", "Motorola", "OnePlus",
+          "Huawei", "Tecno", "Gionee", "Infinix", "Lava", "Lenovo", "Others"]
+FIRST_YEAR = 2018
+
+
+def _grid(states, years, **extra):
+    """Every State x Year x Quarter (x extra dimension) combination as a DataFrame."""
+    levels = {"State": states, "Year": list(range(FIRST_YEAR, FIRST_YEAR + years)), "Quarter": [1, 2, 3, 4]}
+    levels.update(extra)
+    index = pd.MultiIndex.from_product(list(levels.values()), names=list(levels))
+    return index.to_frame(index=False)
+
+
+def build_tables(size="small", seed=SEED):
+    """{table name: DataFrame} for one fixture size."""
+    spec = SIZES[size]
+    rng = np.random.default_rng(seed)
+    states = [f"state-{i:02d}" for i in range(spec["states"])]
+
+    def money(n, low, high):
+        return np.round(rng.uniform(low, high, n), 2)
+
+    def counts(n, low, high):
+        return rng.integers(low, high, n)
+
+    tables = {}
+    df = _grid(states, spec["years"], Transaction_type=TRANSACTION_TYPES)
+    df["Transaction_count"] = counts(len(df), 1_000, 10_000_000)
+    df["Transaction_amount"] = money(len(df), 1e5, 1e10)
+    tables["aggregated_transaction_data"] = df
+
+    df = _grid(states, spec["years"])
+    df["Transaction_count"] = counts(len(df), 10, 100_000)
+    df["Transaction_amount"] = money(len(df), 1e3, 1e8)
+    tables["aggregated_insurance_data"] = df
+
+    df = _grid(states, spec["years"], Brand=BRANDS)
+    df["Count"] = counts(len(df), 1_000, 1_000_000)
+    tables["aggregated_user_data"] = df
+
+    # district names are prefixed with their state, so each belongs to one state
+    districts = [f"district-{i:03d}" for i in range(spec["districts"])]
+    df = _grid(states, spec["years"], District=districts)
+    df["District"] = df["State"] + "-" + df["District"]
+    df["Count"] = counts(len(df), 1_000, 10_000_000)
+    df["Amount"] = money(len(df), 1e5, 1e9)
+    tables["map_transaction_data"] = df
+
+    ins = df[["District", "State", "Year", "Quarter"]].copy()
+    ins["Latitude"], ins["Longitude"], ins["Metric"] = "0", "0", "count"
+    ins["Transaction_Count"] = counts(len(ins), 1, 10_000)
+    ins["Transaction_Amount"] = money(len(ins), 1e3, 1e7)
+    tables["map_insurance_data"] = ins
+
+    users = df[["District", "State", "Year", "Quarter"]].copy()
+    users["registeredUsers"] = counts(len(users), 1_000, 1_000_000)
+    users["appOpens"] = counts(len(users), 1_000, 10_000_000)
+    tables["map_user_data"] = users
+
+    pincodes = [str(500_000 + i) for i in range(spec["pincodes"])]
+    df = _grid(states, spec["years"], Name=pincodes)
+    df["registeredUsers"] = counts(len(df), 1_000, 1_000_000)
+    df["Level"] = "pincode"
+    tables["top_user_data"] = df
+    tables["top_transaction_data"] = df.rename(columns={"Name": "EntityName"})[
+        ["EntityName", "registeredUsers", "State", "Year", "Quarter"]]
+    df = df.rename(columns={"Name": "EntityName"})[["EntityName", "State", "Year", "Quarter"]].copy()
+    df["TxnCount"] = counts(len(df), 1, 10_000)
+    df["TxnAmount"] = money(len(df), 1e3, 1e7)
+    tables["top_insurance_data"] = df
+
+    con = duckdb.connect()
+    for name, table in tables.items():
+        con.register(name, table)
+    for name, query in ROLLUP_QUERIES.items():
+        # "INSERT INTO t (columns) SELECT ..." -> run the SELECT, name the columns
+        columns, select = re.search(r"INSERT INTO \w+ \(([^)]*)\)\s*(SELECT.*)", query, re.S).groups()
+        rollup = con.execute(select.strip().rstrip(";")).df()
+        rollup.columns = [c.strip() for c in columns.split(",")]
+        tables[name] = rollup
+    con.close()
+
+    catalog = [
+        (table, dimension, str(value))
+        for table, dimensions in CATALOG_DIMENSIONS.items()
+        for dimension in dimensions
+        for value in tables[table][dimension].dropna().unique()
+    ]
+    tables["dimension_catalog"] = pd.DataFrame(catalog, columns=["table_name", "dimension", "value"])
+    tables["data_versions"] = pd.DataFrame({"table_name": list(tables), "version": 1})
+    return tables
+
+
+def publish_fixture(directory, size="small", seed=SEED):
+    """Write one fixture size as the current snapshot run under `directory`."""
+    return write_snapshot(build_tables(size, seed), directory)
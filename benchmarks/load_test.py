@@ -0,0 +1,342 @@
+# load_test.py — Concurrent analyst sessions against a running dashboard
+#
+# Starts the dashboard (`streamlit run MainPage.py`) and drives it the way
+# browsers do: every simulated session opens Streamlit's websocket, clicks
+# a random page in the sidebar, then changes that page's filters (select
+# boxes, multiselects, sliders) to random values a few times. Each click is
+# one script rerun, timed from the request to the server's "script
+# finished" message.
+#
+# Before the first level, one session opens every selected page once; if
+# any page shows an exception the run stops there (an error page renders
+# fast and would only flatter the latencies). Concurrency then rises level
+# by level (1, 2, 4, ... sessions by default, each level with fresh sessions
+# for a fixed time). Per level it reports throughput, p50 / p95 / p99
+# latency of the successful clicks, the error rate (exceptions shown on the
+# page, failed reruns, dropped connections, timeouts) and the server's
+# resident memory. The run exits non-zero when any click failed.
+#
+# --source duckdb (default) serves a seeded fixture (benchmarks/fixtures.py)
+# through the embedded DuckDB backend; --source mysql uses the database
+# configured in sql_connection.py, e.g. a local MySQL loaded with fixture data.
+#
+# Run from the project root:
+#   python -m benchmarks.load_test [--levels 1 2 4 8 16] [--duration 30] [--size medium]
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+
+from benchmarks.fixtures import SIZES, publish_fixture
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_SECONDS = 60
+RERUN_TIMEOUT = 120
+FILTER_CHANGES = 3     # filter changes per page visit
+MEMORY_INTERVAL = 0.5  # seconds between server memory samples
+
+FILTER_WIDGETS = ("selectbox", "multiselect", "slider")
+
+
+# ==========================================
+# SERVER
+# ==========================================
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, env, log):
+    """`streamlit run MainPage.py` on `port`, once it answers health checks; output goes to `log`."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "MainPage.py",
+         "--server.headless", "true", "--server.port", str(port), "--server.address", "127.0.0.1",
+         "--server.enableXsrfProtection", "false", "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    deadline = time.time() + STARTUP_SECONDS
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}, see {log.name}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return proc
+        except OSError:
+            time.sleep(0.5)
+    proc.kill()
+    raise RuntimeError(f"server did not answer within {STARTUP_SECONDS}s, see {log.name}")
+
+
+def rss_mb(pid):
+    """Resident memory of `pid` in MB (Linux /proc), None where unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+# ==========================================
+# SESSION (one simulated analyst)
+# ==========================================
+class Session:
+    """One browser tab: a websocket to the server and the widgets of its last rerun."""
+
+    def __init__(self, ws, rng):
+        self.ws = ws
+        self.rng = rng
+        self.widgets = {}
+
+    async def rerun(self, states=()):
+        """Send one rerun with `states`; (seconds, error message or None)."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.widget_states.widgets.extend(states)
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+
+        widgets, error = {}, None
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self.ws.recv())
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                widget_type = element.WhichOneof("type")
+                if widget_type == "button" or widget_type in FILTER_WIDGETS:
+                    widget = getattr(element, widget_type)
+                    widgets[widget.id] = (widget_type, widget)
+                elif widget_type == "exception" and error is None:
+                    error = f"{element.exception.type}: {element.exception.message}"
+            elif kind == "script_finished":
+                if fwd.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    error = error or "script failed to compile"
+                break
+        self.widgets = widgets
+        return time.perf_counter() - start, error
+
+    def page_buttons(self, pages):
+        return {w.label: wid for wid, (t, w) in self.widgets.items() if t == "button" and w.label in pages}
+
+    def random_filters(self):
+        """A random value for every filter widget on the current page."""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        states = []
+        for wid, (widget_type, widget) in self.widgets.items():
+            state = WidgetState(id=wid)
+            if widget_type == "selectbox" and widget.options:
+                state.string_value = self.rng.choice(widget.options)
+            elif widget_type == "multiselect" and widget.options:
+                k = self.rng.randint(1, len(widget.options))
+                state.string_array_value.data.extend(self.rng.sample(list(widget.options), k))
+            elif widget_type == "slider" and not widget.options and len(widget.default) == 1:
+                steps = int((widget.max - widget.min) / widget.step) if widget.step else 0
+                state.double_array_value.data.append(widget.min + self.rng.randint(0, steps) * widget.step)
+            else:
+                continue
+            states.append(state)
+        return states
+
+
+async def run_session(url, pages, deadline, rng, samples):
+    """Click through random pages and filters until `deadline`; append (page, seconds, error)."""
+    import websockets
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+    page = "(connect)"
+    try:
+        async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as ws:
+            session = Session(ws, rng)
+            seconds, error = await asyncio.wait_for(session.rerun(), RERUN_TIMEOUT)
+            samples.append((page, seconds, error))
+            while time.time() < deadline:
+                page = rng.choice(pages)
+                button = session.page_buttons(pages)[page]
+                seconds, error = await asyncio.wait_for(
+                    session.rerun([WidgetState(id=button, trigger_value=True)]), RERUN_TIMEOUT)
+                samples.append((page, seconds, error))
+                for _ in range(FILTER_CHANGES):
+                    if time.time() >= deadline:
+                        break
+                    states = session.random_filters()
+                    if not states:
+                        break
+                    seconds, error = await asyncio.wait_for(session.rerun(states), RERUN_TIMEOUT)
+                    samples.append((page, seconds, error))
+    except asyncio.TimeoutError:
+        samples.append((page, RERUN_TIMEOUT, f"no answer within {RERUN_TIMEOUT}s"))
+    except Exception as e:
+        samples.append((page, 0.0, f"{type(e).__name__}: {e}"))
+
+
+async def sample_memory(pid, readings, stop):
+    while not stop.is_set():
+        mb = rss_mb(pid)
+        if mb is not None:
+            readings.append(mb)
+        try:
+            await asyncio.wait_for(stop.wait(), MEMORY_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_level(url, pid, pages, sessions, duration, seed):
+    samples, readings, stop = [], [], asyncio.Event()
+    memory = asyncio.create_task(sample_memory(pid, readings, stop))
+    start = time.time()
+    deadline = start + duration
+    await asyncio.gather(*(
+        run_session(url, pages, deadline, random.Random(seed * 1000 + i), samples) for i in range(sessions)
+    ))
+    elapsed = time.time() - start
+    stop.set()
+    await memory
+    return summarize(sessions, samples, elapsed, readings)
+
+
+def summarize(sessions, samples, elapsed, readings):
+    clicks = [s for s in samples if s[0] != "(connect)"]
+    succeeded = [s for s in clicks if not s[2]]
+    ms = np.array([s[1] for s in succeeded]) * 1000 if succeeded else np.array([np.nan])
+    errors = [s for s in samples if s[2]]
+    return {
+        "sessions": sessions,
+        "clicks": len(clicks),
+        "clicks_per_s": round(len(clicks) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(ms, 99)), 1),
+        "error_pct": round(len(errors) / max(len(samples), 1) * 100, 2),
+        "rss_mb_peak": round(max(readings), 1) if readings else None,
+        "rss_mb_end": round(readings[-1], 1) if readings else None,
+        "errors": sorted({f"{page}: {error[:120]}" for page, _, error in errors}),
+    }
+
+
+# ==========================================
+# DRIVER
+# ==========================================
+async def discover_pages(url):
+    """The sidebar's page buttons, as a fresh session sees them."""
+    import websockets
+
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as ws:
+        session = Session(ws, random.Random())
+        await asyncio.wait_for(session.rerun(), RERUN_TIMEOUT)
+        return [w.label for t, w in session.widgets.values() if t == "button"]
+
+
+async def check_pages(url, pages):
+    """Open every page once in one session; {page: error} for the pages that fail to render."""
+    import websockets
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+    failed = {}
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as ws:
+        session = Session(ws, random.Random())
+        await asyncio.wait_for(session.rerun(), RERUN_TIMEOUT)
+        for page in pages:
+            button = session.page_buttons(pages).get(page)
+            if button is None:
+                failed[page] = "no such page in the sidebar"
+                continue
+            _, error = await asyncio.wait_for(
+                session.rerun([WidgetState(id=button, trigger_value=True)]), RERUN_TIMEOUT)
+            if error:
+                failed[page] = error
+    return failed
+
+
+def print_row(result):
+    rss = "–" if result["rss_mb_peak"] is None else f"{result['rss_mb_peak']:.0f} / {result['rss_mb_end']:.0f}"
+    print(f"{result['sessions']:>8} {result['clicks']:>7} {result['clicks_per_s']:>9.2f} "
+          f"{result['p50_ms']:>8.0f} {result['p95_ms']:>8.0f} {result['p99_ms']:>8.0f} "
+          f"{result['error_pct']:>7.2f} {rss:>15}")
+    for error in result["errors"][:5]:
+        print(f"{'':>8} ⚠️ {error}")
+
+
+async def run(args, port, pid):
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    pages = args.pages or await discover_pages(url)
+    failed = await check_pages(url, pages)
+    if failed:
+        for page, error in failed.items():
+            print(f"❌ {page}: {error[:160]}")
+        raise SystemExit(f"{len(failed)} page(s) fail to render; fix them or leave them out with --pages")
+    print(f"\n{len(pages)} pages, {args.duration:.0f}s per level, server pid {pid}")
+    print(f"{'sessions':>8} {'clicks':>7} {'clicks/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'errors%':>7} {'RSS MB peak/end':>15}")
+    results = []
+    for level in args.levels:
+        result = await run_level(url, pid, pages, level, args.duration, args.seed)
+        print_row(result)
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent analyst sessions against a running dashboard")
+    parser.add_argument("--source", choices=["duckdb", "mysql"], default="duckdb",
+                        help="duckdb: seeded fixture, embedded; mysql: the database in sql_connection.py")
+    parser.add_argument("--size", choices=list(SIZES), default="medium", help="fixture size (duckdb only)")
+    parser.add_argument("--levels", nargs="+", type=int, default=[1, 2, 4, 8, 16, 32],
+                        help="concurrent sessions per level")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per level")
+    parser.add_argument("--pages", nargs="+", help="page names (default: every sidebar page)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the results as JSON")
+    parser.add_argument("--server-log", default=os.path.join(tempfile.gettempdir(), "load_test_server.log"),
+                        help="where the server's output goes")
+    args = parser.parse_args()
+
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        sys.exit("load_test needs the websockets package: pip install websockets")
+
+    env = dict(os.environ, PHONEPE_DATA_SOURCE=args.source)
+    with tempfile.TemporaryDirectory() as directory:
+        if args.source == "duckdb":
+            publish_fixture(directory, args.size, args.seed)
+            env["PHONEPE_SNAPSHOT_DIR"] = directory
+        port = free_port()
+        with open(args.server_log, "w") as log:
+            server = start_server(port, env, log)
+            try:
+                results = asyncio.run(run(args, port, server.pid))
+            finally:
+                server.terminate()
+                try:
+                    server.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"source": args.source, "size": args.size, "levels": results}, f, indent=2)
+        print(f"\n✅ Results saved to {args.output}")
+    if any(result["errors"] for result in results):
+        sys.exit("❌ Some clicks failed; latencies above cover the successful ones only")
+
+
+if __name__ == "__main__":
+    main()
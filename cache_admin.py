@@ -0,0 +1,49 @@
+# cache_admin.py — Cache sizes, hit rates and evictions (opened with ?admin=<admin token>, see MainPage.admin_token)
+
+from utils.memory_budget import BUDGET
+from utils.disk_cache import DISK_CACHE
+from utils.db import query_stats
+import streamlit as st
+import pandas as pd
+
+
+def cache_admin():
+    st.title("🧹 Cache Admin")
+
+    used = BUDGET.used_bytes()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Memory used", f"{used / 1024 / 1024:.1f} MB")
+    col2.metric("Budget", f"{BUDGET.max_bytes / 1024 / 1024:.0f} MB")
+    col3.metric("Queries coalesced", f"{query_stats()['coalesced_pct']:.1f}%")
+    st.progress(min(used / BUDGET.max_bytes, 1.0))
+
+    # ==========================================
+    # IN-MEMORY CACHES
+    # ==========================================
+    st.subheader("In-memory caches")
+    stats = pd.DataFrame([cache.stats() for cache in BUDGET.caches()])
+    st.dataframe(stats.round({"MB": 2, "hit_pct": 1}), hide_index=True, use_container_width=True)
+    st.caption(
+        "Every page loader goes through the query cache and every chart through the figure cache. "
+        "Not under the budget: the GeoJSON and database connections (st.cache_resource, one each "
+        "per process) and the table-version lookup (st.cache_data, one small entry)."
+    )
+
+    # ==========================================
+    # DISK CACHE
+    # ==========================================
+    st.subheader("Disk cache")
+    if DISK_CACHE is None:
+        st.info("Disabled — set PHONEPE_DISK_CACHE_DIR to enable it.")
+    else:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Size", f"{DISK_CACHE.size_bytes() / 1024 / 1024:.1f} MB")
+        col2.metric("Hits", DISK_CACHE.hits)
+        col3.metric("Misses", DISK_CACHE.misses)
+        col4.metric("Evictions", DISK_CACHE.evictions)
+
+    if st.button("Clear in-memory caches"):
+        for cache in BUDGET.caches():
+            cache.clear()
+        st.cache_data.clear()
+        st.rerun()
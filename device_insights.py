@@ -1,20 +1,136 @@
-from sql_connection import get_sql_connection
-from utils import helper_func
+from utils.query_builder import run_query
+from utils.formatters import format_numbers
+from utils.figure_cache import cached_figure
+from utils.catalog import get_options
+from utils.ranking import top_bottom
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 
+TOP_N = 5
+SHARE_BRANDS = 8    # brands drawn individually in the share views; the rest are "Others"
+
+# ==========================================
+# DEVICE CUBE (Brand x State x Year x Quarter)
+# ==========================================
+def _cube_dtypes(df):
+    df["Brand"] = df["Brand"].astype("category")
+    df["State"] = df["State"].astype("category")
+    df["Count"] = df["Count"].astype("int64")
+    return df
+
+
+def load_device_cube():
+    """The ETL-built device_brand_cube, read once per data version (QUERY_CACHE)."""
+    return run_query("SELECT Brand, State, Year, Quarter, Count FROM device_brand_cube;",
+                     ("device_brand_cube",), _cube_dtypes)
+
+
+def filter_cube(cube, year="All", quarter="All", state="All"):
+    mask = pd.Series(True, index=cube.index)
+    if year != "All":
+        mask &= cube["Year"] == int(year)
+    if quarter != "All":
+        mask &= cube["Quarter"] == int(quarter)
+    if state != "All":
+        mask &= cube["State"] == state
+    return cube[mask]
+
+
+def brand_extremes(cube, n=TOP_N):
+    """Top and bottom `n` brands from a single aggregation of the filtered cube."""
+    totals = cube.groupby("Brand", observed=True)["Count"].sum()
+    totals = totals.rename_axis("brand").reset_index(name="total_devices")
+    totals["brand"] = totals["brand"].astype(str)
+    return top_bottom(totals, "total_devices", n)
+
+
+def lump_brands(cube, brands):
+    """Replace every brand outside `brands` with "Others"."""
+    cube = cube.copy()
+    cube["Brand"] = cube["Brand"].astype(str).where(cube["Brand"].isin(brands), "Others")
+    return cube
+
+
 # ==========================================
-# CONNECTION
+# FIGURE BUILDERS
 # ==========================================
-@st.cache_resource
-def get_connection():
-    conn = get_sql_connection()
-    cur = conn.cursor()
-    cur.execute("USE phonepe;")
-    return conn
+def build_brand_figure(brands):
+    brands = brands.copy()
+    brands["formatted_label"] = format_numbers(brands["total_devices"])
+    fig = px.bar(
+        brands,
+        x="brand",
+        y="total_devices",
+        labels={"total_devices": "Device Count"},
+        color="brand",
+        color_discrete_sequence=px.colors.qualitative.Pastel,
+        text="formatted_label"
+    )
+    fig.update_traces(textposition="outside")
+    fig.update_layout(
+        showlegend=False,
+        margin=dict(l=40, r=40, t=0, b=40),
+        xaxis_tickangle=-45,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+    )
+    return fig
+
+
+def build_share_trend_figure(cube):
+    top_brands = cube.groupby("Brand", observed=True)["Count"].sum().nlargest(SHARE_BRANDS).index
+    df = lump_brands(cube, top_brands)
+    df = df.groupby(["Year", "Quarter", "Brand"], as_index=False)["Count"].sum()
+    df["Share"] = df["Count"] / df.groupby(["Year", "Quarter"])["Count"].transform("sum") * 100
+    df["Period"] = df["Year"].astype(str) + " Q" + df["Quarter"].astype(str)
+    df = df.sort_values(["Year", "Quarter"])
+
+    fig = px.line(
+        df,
+        x="Period",
+        y="Share",
+        color="Brand",
+        markers=True,
+        labels={"Share": "Market Share (%)"},
+        color_discrete_sequence=px.colors.qualitative.Pastel,
+    )
+    fig.update_traces(hovertemplate="%{x}<br>%{fullData.name}: %{y:.2f}%<extra></extra>")
+    fig.update_layout(
+        margin=dict(l=40, r=40, t=20, b=40),
+        hovermode="x unified",
+        xaxis=dict(type="category", showgrid=False),
+        yaxis=dict(ticksuffix="%"),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+    )
+    return fig
+
+
+def build_share_matrix_figure(cube):
+    top_brands = cube.groupby("Brand", observed=True)["Count"].sum().nlargest(SHARE_BRANDS).index
+    df = lump_brands(cube, top_brands)
+    matrix = df.pivot_table(index="State", columns="Brand", values="Count", aggfunc="sum", fill_value=0, observed=True)
+    matrix = matrix.div(matrix.sum(axis=1), axis=0) * 100
+    # "Others" can also be a real brand among the top ones; keep one column for it
+    columns = dict.fromkeys(list(top_brands) + ["Others"])
+    matrix = matrix[[b for b in columns if b in matrix.columns]]
+
+    fig = px.imshow(
+        matrix,
+        aspect="auto",
+        color_continuous_scale="Viridis",
+        labels=dict(x="Brand", y="State", color="Share (%)"),
+    )
+    fig.update_traces(hovertemplate="%{y}<br>%{x}: %{z:.2f}%<extra></extra>")
+    fig.update_layout(
+        height=max(450, len(matrix) * 22),
+        margin=dict(l=40, r=40, t=20, b=40),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+    )
+    return fig
 
-connection = get_connection()
 
 # ==========================================
 # DEVICE INSIGHTS PAGE
@@ -25,110 +141,76 @@ def device_insights():
         unsafe_allow_html=True
     )
 
+    cube = load_device_cube()
+
     # ----------------------------------
     # FILTERS SECTION
     # ----------------------------------
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        years = pd.read_sql("SELECT DISTINCT year FROM aggregated_user_data ORDER BY year;", connection)
-        selected_year = st.selectbox("Select Year", ["All"] + years["year"].astype(str).tolist())
+        years = get_options("aggregated_user_data", "Year")
+        selected_year = st.selectbox("Select Year", ["All"] + [str(y) for y in years])
 
     with col2:
-        quarters = pd.read_sql("SELECT DISTINCT quarter FROM aggregated_user_data ORDER BY quarter;", connection)
-        selected_quarter = st.selectbox("Select Quarter", ["All"] + quarters["quarter"].astype(str).tolist())
+        quarters = get_options("aggregated_user_data", "Quarter")
+        selected_quarter = st.selectbox("Select Quarter", ["All"] + [str(q) for q in quarters])
 
     with col3:
-        states = pd.read_sql("SELECT DISTINCT state FROM aggregated_user_data ORDER BY state;", connection)
-        selected_state = st.selectbox("Select State", ["All"] + states["state"].tolist())
+        states = get_options("aggregated_user_data", "State")
+        selected_state = st.selectbox("Select State", ["All"] + states)
 
-    # ----------------------------------
-    # DYNAMIC QUERY BUILDING
-    # ----------------------------------
-    filters = []
-    if selected_year != "All":
-        filters.append(f"year = {selected_year}")
-    if selected_quarter != "All":
-        filters.append(f"quarter = '{selected_quarter}'")
-    if selected_state != "All":
-        filters.append(f"state = '{selected_state}'")
-
-    where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
-
-    # ----------------------------------
-    # QUERIES FOR TOP AND BOTTOM 5
-    # ----------------------------------
-    top5_query = f"""
-        SELECT brand, SUM(count) AS total_devices
-        FROM aggregated_user_data
-        {where_clause}
-        GROUP BY brand
-        ORDER BY total_devices DESC
-        LIMIT 5;
-    """
-
-    bottom5_query = f"""
-        SELECT brand, SUM(count) AS total_devices
-        FROM aggregated_user_data
-        {where_clause}
-        GROUP BY brand
-        ORDER BY total_devices ASC
-        LIMIT 5;
-    """
-
-    top5 = pd.read_sql(top5_query, connection)
-    bottom5 = pd.read_sql(bottom5_query, connection)
+    filters = (selected_year, selected_quarter, selected_state)
 
     # ----------------------------------
-    # FORMATTING LABELS
+    # TOP AND BOTTOM 5 (one aggregation of the cube)
     # ----------------------------------
-    top5["formatted_label"] = top5["total_devices"].apply(helper_func.format_number)
-    bottom5["formatted_label"] = bottom5["total_devices"].apply(helper_func.format_number)
+    top5, bottom5 = brand_extremes(filter_cube(cube, selected_year, selected_quarter, selected_state))
 
-    # ----------------------------------
-    # VISUALS
-    # ----------------------------------
-    color_sequence = px.colors.qualitative.Pastel
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader("Top 5 Brands by Usage")
-        fig_top = px.bar(
-            top5,
-            x="brand",
-            y="total_devices",
-            labels={"total_devices": "Device Count"},
-            color="brand",
-            color_discrete_sequence=color_sequence,
-            text="formatted_label"
-        )
-        fig_top.update_traces(textposition="outside")
-        fig_top.update_layout(
-            showlegend=False,
-            margin=dict(l=40, r=40, t=0, b=40),
-            xaxis_tickangle=-45,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-        )
+        fig_top = cached_figure("device_insights", "top5", filters, lambda: build_brand_figure(top5))
         st.plotly_chart(fig_top, use_container_width=True)
 
     with col2:
         st.subheader("Lowest 5 Brands by Usage")
-        fig_low = px.bar(
-            bottom5,
-            x="brand",
-            y="total_devices",
-            labels={"total_devices": "Device Count"},
-            color="brand",
-            color_discrete_sequence=color_sequence,
-            text="formatted_label"
-        )
-        fig_low.update_traces(textposition="outside")
-        fig_low.update_layout(
-            showlegend=False,
-            margin=dict(l=40, r=40, t=0, b=40),
-            xaxis_tickangle=-45,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-        )
+        fig_low = cached_figure("device_insights", "bottom5", filters, lambda: build_brand_figure(bottom5))
         st.plotly_chart(fig_low, use_container_width=True)
+
+    # ----------------------------------
+    # BRAND MARKET SHARE OVER TIME (state filter only)
+    # ----------------------------------
+    st.markdown("---")
+    st.subheader(f"📈 Brand Market Share by Quarter ({'All States' if selected_state == 'All' else selected_state})")
+    fig_trend = cached_figure(
+        "device_insights", "share_trend", (selected_state,),
+        lambda: build_share_trend_figure(filter_cube(cube, state=selected_state))
+    )
+    st.plotly_chart(fig_trend, use_container_width=True)
+
+    # ----------------------------------
+    # STATE x BRAND SHARE MATRIX (year / quarter filters)
+    # ----------------------------------
+    st.subheader("🗺️ Brand Share within each State")
+    fig_matrix = cached_figure(
+        "device_insights", "share_matrix", (selected_year, selected_quarter),
+        lambda: build_share_matrix_figure(filter_cube(cube, selected_year, selected_quarter))
+    )
+    st.plotly_chart(fig_matrix, use_container_width=True)
+
+
+# ==========================================
+# CACHE WARM-UP (utils/warmup.py)
+# ==========================================
+def warm_device_insights():
+    """Cube plus every figure for the default view (all filters at "All")."""
+    cube = load_device_cube()
+    filters = ("All", "All", "All")
+    top5, bottom5 = brand_extremes(cube)
+    cached_figure("device_insights", "top5", filters, lambda: build_brand_figure(top5))
+    cached_figure("device_insights", "bottom5", filters, lambda: build_brand_figure(bottom5))
+    cached_figure("device_insights", "share_trend", ("All",), lambda: build_share_trend_figure(cube))
+    cached_figure("device_insights", "share_matrix", ("All", "All"), lambda: build_share_matrix_figure(cube))
+    return ["device_cube", "top5", "bottom5", "share_trend", "share_matrix"]
@@ -0,0 +1,146 @@
+# diagnostics.py — Query latency, slowest queries, cache efficiency, CPU per section and the cache warm-up (opened with ?admin=<admin token>)
+
+from utils.telemetry import TELEMETRY
+from utils.db import get_backend, query_stats
+from utils.perf import cpu_summary, clear_cpu
+from utils.warmup import last_report
+import streamlit as st
+import pandas as pd
+import time
+
+SLOWEST = 10
+EXPLAINED = 5
+
+
+def latency_table(events):
+    """Per fingerprint: calls, share served by a cache, p50 / p95 of the executed runs."""
+    executed = events[events["outcome"] == "db"]
+    latency = executed.groupby("fingerprint")["seconds"].quantile([0.5, 0.95]).unstack() * 1000
+    latency.columns = ["p50_ms", "p95_ms"]
+    summary = events.groupby("fingerprint").agg(
+        calls=("outcome", "size"),
+        executions=("outcome", lambda s: int((s == "db").sum())),
+        cached_pct=("outcome", lambda s: s.isin(["hit", "stale", "disk"]).mean() * 100),
+        avg_rows=("rows", "mean"),
+        avg_kb=("bytes", lambda b: b.mean() / 1024),
+        pages=("page", lambda p: ", ".join(sorted(set(p)))),
+    )
+    table = summary.join(latency).sort_values("p95_ms", ascending=False)
+    return table.reset_index().round(1)
+
+
+def explain(sql, params):
+    try:
+        plan = get_backend().execute("EXPLAIN " + sql, params)
+    except Exception as e:
+        st.warning(f"EXPLAIN failed: {e}")
+        return
+    if "explain_value" in plan.columns:  # DuckDB returns the plan as text
+        st.code("\n".join(plan["explain_value"]), language=None)
+    else:
+        st.dataframe(plan, hide_index=True, use_container_width=True)
+
+
+def cpu_table():
+    """Runs and CPU ms per page / fragment section, most expensive run first."""
+    summary = pd.DataFrame.from_dict(cpu_summary(), orient="index")
+    summary["last_ms"] = summary["last"] * 1000
+    summary["total_ms"] = summary["cpu_seconds"] * 1000
+    summary["worker_pct"] = summary["worker_seconds"] / summary["cpu_seconds"].where(summary["cpu_seconds"] > 0) * 100
+    table = summary[["runs", "mean_ms", "last_ms", "worker_pct", "total_ms"]].sort_values("mean_ms", ascending=False)
+    return table.rename_axis("section").reset_index().round(1)
+
+
+def warmup_table(report):
+    """One row per warmed page: status, seconds and the entries it filled."""
+    rows = [
+        {"page": name, "status": result["status"], "seconds": result["seconds"],
+         "entries": ", ".join(result["entries"])}
+        for name, result in report.items()
+    ]
+    return pd.DataFrame(rows, columns=["page", "status", "seconds", "entries"])
+
+
+def query_sections(events):
+    executed = events[events["outcome"] == "db"]
+    cached = events["outcome"].isin(["hit", "stale", "disk"])
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Queries recorded", len(events))
+    col2.metric("Run on the database", len(executed))
+    col3.metric("Served from cache", f"{cached.mean() * 100:.1f}%")
+    col4.metric("p95 latency", f"{executed['seconds'].quantile(0.95) * 1000:.0f} ms" if len(executed) else "–")
+
+    # ==========================================
+    # LATENCY PER FINGERPRINT
+    # ==========================================
+    st.subheader("Latency per query")
+    st.dataframe(latency_table(events), hide_index=True, use_container_width=True)
+
+    # ==========================================
+    # SLOWEST QUERIES
+    # ==========================================
+    st.subheader(f"Slowest {SLOWEST} executions")
+    slowest = executed.nlargest(SLOWEST, "seconds")
+    st.dataframe(
+        slowest.assign(ms=slowest["seconds"] * 1000)[["ms", "rows", "bytes", "page", "fingerprint"]].round(1),
+        hide_index=True, use_container_width=True
+    )
+    for _, row in slowest.drop_duplicates("fingerprint").head(EXPLAINED).iterrows():
+        with st.expander(f"{row['seconds'] * 1000:.0f} ms — {row['fingerprint'][:90]}"):
+            st.code(row["sql"].strip(), language="sql")
+            if row["params"]:
+                st.caption(f"params: {row['params']}")
+            explain(row["sql"], row["params"])
+
+    # ==========================================
+    # CACHE EFFICIENCY
+    # ==========================================
+    st.subheader("Cache efficiency by page")
+    outcomes = pd.crosstab(events["page"], events["outcome"])
+    outcomes["cached_pct"] = (outcomes.reindex(columns=["hit", "stale", "disk"], fill_value=0).sum(axis=1)
+                              / outcomes.sum(axis=1) * 100).round(1)
+    st.dataframe(outcomes, use_container_width=True)
+    flights = query_stats()
+    st.caption(
+        f"{flights['coalesced']} of {flights['calls']} database calls shared an identical query in flight. "
+        "Every page loader goes through the query cache, so its hits are counted here; only the "
+        "table-version lookup behind the data version stays outside."
+    )
+
+
+def diagnostics():
+    st.title("🩺 Diagnostics")
+    events = TELEMETRY.frame()
+    if events.empty:
+        st.info("No queries recorded yet — open a few pages first.")
+    else:
+        query_sections(events)
+
+    # ==========================================
+    # SERVER CPU PER INTERACTION
+    # ==========================================
+    st.subheader("Server CPU per interaction")
+    if cpu_summary():
+        st.dataframe(cpu_table(), hide_index=True, use_container_width=True)
+        st.caption(
+            "A full rerun is counted under 'page: …'; a filter change inside a fragment only under its "
+            "section. CPU includes the QueryBatch workers a run waits on (worker_pct)."
+        )
+    else:
+        st.info("No page has been rendered yet.")
+
+    # ==========================================
+    # CACHE WARM-UP
+    # ==========================================
+    st.subheader("Cache warm-up")
+    version, report, finished_at = last_report()
+    if report is None:
+        st.info("The start-up warm-up has not finished yet.")
+    else:
+        st.dataframe(warmup_table(report), hide_index=True, use_container_width=True)
+        st.caption(f"Data version {version}, warmed at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(finished_at))}.")
+
+    if st.button("Clear telemetry"):
+        TELEMETRY.clear()
+        clear_cpu()
+        st.rerun()
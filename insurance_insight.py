@@ -1,18 +1,68 @@
-from sql_connection import get_sql_connection
-from utils import helper_func
+from utils.formatters import format_numbers
+from utils.figure_cache import cached_figure
+from utils.insurance_summary import get_insurance_summary
+from utils.query_batch import QueryBatch
+from utils.ranking import get_aggregate, get_rankings
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
 
-@st.cache_resource
-def get_connection():
-    conn = get_sql_connection()
-    cur = conn.cursor()
-    cur.execute("USE phonepe;")
-    return conn
+METRICS = ('Transaction_count', 'Transaction_amount')
+
+# Define color palette
+color_sequence = px.colors.sequential.Viridis
+
+
+def load_state_rankings():
+    """(top 10 states by count, lowest 10 states by amount) with formatted labels."""
+    # Both rankings come from one cached aggregation of insurance_state_summary
+    columns = {
+        'Transaction_count': 'Total_Insurance_Transactions',
+        'Transaction_amount': 'Total_Insurance_Amount'
+    }
+    df_top_state, _ = get_rankings("insurance_state_summary", ("State",), METRICS, by='Transaction_count', n=10)
+    _, df_low_state = get_rankings("insurance_state_summary", ("State",), METRICS, by='Transaction_amount', n=10)
+    df_top_state = df_top_state.rename(columns=columns)
+    df_low_state = df_low_state.rename(columns=columns)
+
+    # Apply formatted labels
+    value_cols = ['Total_Insurance_Transactions', 'Total_Insurance_Amount']
+    label_cols = ['Formatted_Transactions', 'Formatted_Amount']
+    df_top_state[label_cols] = format_numbers(df_top_state[value_cols]).to_numpy()
+    df_low_state[label_cols] = format_numbers(df_low_state[value_cols]).to_numpy()
+    return df_top_state, df_low_state
+
+
+def build_state_bar(df, y, text, label, ascending):
+    fig = px.bar(df.sort_values(by=y, ascending=ascending),
+                 x='State', y=y,
+                 text=text,
+                 labels={y: label},
+                 color='State', color_discrete_sequence=color_sequence)
+    fig.update_traces(textposition='outside')
+    fig.update_layout(title_text="", title_x=0.5, showlegend=False, margin=dict(l=20, r=20, t=0, b=20),
+                      xaxis_tickangle=-45)
+    return fig
+
+
+# (section, subheader, ranking, value column, label column, axis label, ascending)
+STATE_BARS = (
+    ("top_count", "📊 Top 10 States by Insurance Count", 0,
+     'Total_Insurance_Transactions', 'Formatted_Transactions', 'Transaction Count', False),
+    ("top_amount", "💰 Top 10 States by Insurance Amount", 0,
+     'Total_Insurance_Amount', 'Formatted_Amount', 'Transaction Amount (₹)', False),
+    ("low_count", "📉 Lowest 10 States by Insurance Count", 1,
+     'Total_Insurance_Transactions', 'Formatted_Transactions', 'Transaction Count', True),
+    ("low_amount", "🪙 Lowest 10 States by Insurance Amount", 1,
+     'Total_Insurance_Amount', 'Formatted_Amount', 'Transaction Amount (₹)', True),
+)
+
+
+def state_bar_figure(rankings, bar):
+    """The cached figure of one STATE_BARS entry, drawn from load_state_rankings()."""
+    section, _, which, y, text, label, ascending = bar
+    return cached_figure("insurance_insights", section, (),
+                         lambda: build_state_bar(rankings[which], y, text, label, ascending))
 
-connection = get_connection()
 
 def insurance_insights():
     
@@ -22,91 +72,44 @@ def insurance_insights():
     )
     
     
-    # Load top 10 states by count and amount
-    query_top = """
-        SELECT State, SUM(Transaction_count) AS Total_Insurance_Transactions,
-            SUM(Transaction_amount) AS Total_Insurance_Amount
-        FROM Aggregated_Insurance_Data
-        GROUP BY State
-        ORDER BY Total_Insurance_Transactions DESC
-        LIMIT 10;
-    """
-    df_top_state = pd.read_sql(query_top, connection)
-
-    # Load lowest 10 states by count and amount
-    query_low = """
-        SELECT State, SUM(Transaction_count) AS Total_Insurance_Transactions,
-            SUM(Transaction_amount) AS Total_Insurance_Amount
-        FROM Aggregated_Insurance_Data
-        GROUP BY State
-        ORDER BY Total_Insurance_Amount ASC
-        LIMIT 10;
-    """
-    df_low_state = pd.read_sql(query_low, connection)
+    # The state aggregation (rankings and totals) and the per-period rollup run concurrently
+    with QueryBatch() as batch:
+        batch.submit("rankings", load_state_rankings)
+        batch.submit("summary", get_insurance_summary, "state")
+        results = dict(batch.as_completed())
+    rankings = results["rankings"]
 
-    # Apply formatted labels
-    df_top_state['Formatted_Transactions'] = df_top_state['Total_Insurance_Transactions'].apply(helper_func.format_number)
-    df_top_state['Formatted_Amount'] = df_top_state['Total_Insurance_Amount'].apply(helper_func.format_number)
-    df_low_state['Formatted_Transactions'] = df_low_state['Total_Insurance_Transactions'].apply(helper_func.format_number)
-    df_low_state['Formatted_Amount'] = df_low_state['Total_Insurance_Amount'].apply(helper_func.format_number)
-
-    # Define color palette
-    color_sequence = px.colors.sequential.Viridis
-
-    # ─── Top Row ───
-    top_col1, top_col2 = st.columns(2)
-
-    with top_col1:
-        st.subheader("📊 Top 10 States by Insurance Count")
-        fig_top_count = px.bar(df_top_state.sort_values(by='Total_Insurance_Transactions', ascending=False),
-                            x='State', y='Total_Insurance_Transactions',
-                            text='Formatted_Transactions',
-                            labels={'Total_Insurance_Transactions': 'Transaction Count'},
-                            color='State', color_discrete_sequence=color_sequence)
-        fig_top_count.update_traces(textposition='outside')
-        fig_top_count.update_layout(title_text="",title_x=0.5, showlegend=False, margin=dict(l=20, r=20, t=0, b=20),
-                                    xaxis_tickangle=-45)
-        st.plotly_chart(fig_top_count, use_container_width=True)
-
-    with top_col2:
-        st.subheader("💰 Top 10 States by Insurance Amount")
-        fig_top_amount = px.bar(df_top_state.sort_values(by='Total_Insurance_Amount', ascending=False),
-                                x='State', y='Total_Insurance_Amount',
-                                text='Formatted_Amount',
-                                labels={'Total_Insurance_Amount': 'Transaction Amount (₹)'},
-                                color='State', color_discrete_sequence=color_sequence)
-        fig_top_amount.update_traces(textposition='outside')
-        fig_top_amount.update_layout(title_text="",title_x=0.5, showlegend=False, margin=dict(l=20, r=20, t=0, b=20),
-                                    xaxis_tickangle=-45)
-        st.plotly_chart(fig_top_amount, use_container_width=True)
-
-    # ─── Bottom Row ───
-    low_col1, low_col2 = st.columns(2)
-
-    with low_col1:
-        st.subheader("📉 Lowest 10 States by Insurance Count")
-        fig_low_count = px.bar(df_low_state.sort_values(by='Total_Insurance_Transactions', ascending=True),
-                            x='State', y='Total_Insurance_Transactions',
-                            text='Formatted_Transactions',
-                            labels={'Total_Insurance_Transactions': 'Transaction Count'},
-                            color='State', color_discrete_sequence=color_sequence)
-        fig_low_count.update_traces(textposition='outside')
-        fig_low_count.update_layout(title_x=0.5, showlegend=False, margin=dict(l=20, r=20, t=0, b=20),
-                                    xaxis_tickangle=-45)
-        
-
-        st.plotly_chart(fig_low_count, use_container_width=True)
-
-    with low_col2:
-        st.subheader("🪙 Lowest 10 States by Insurance Amount")
-        fig_low_amount = px.bar(df_low_state.sort_values(by='Total_Insurance_Amount', ascending=True),
-                                x='State', y='Total_Insurance_Amount',
-                                text='Formatted_Amount',
-                                labels={'Total_Insurance_Amount': 'Transaction Amount (₹)'},
-                                color='State', color_discrete_sequence=color_sequence)
-        fig_low_amount.update_traces(textposition='outside')
-        fig_low_amount.update_layout(title_x=0.5, showlegend=False, margin=dict(l=20, r=20, t=0, b=20),
-                                    xaxis_tickangle=-45)
-        st.plotly_chart(fig_low_amount, use_container_width=True)
- 
-  
+    # ─── Summary Metrics ───
+    by_period = results["summary"].groupby(["Year", "Quarter"])[
+        ["Transaction_count", "Transaction_amount"]].sum().sort_index()
+    totals = get_aggregate("insurance_state_summary", ("State",), METRICS)
+    total_count = totals['Transaction_count'].sum()
+    total_amount = totals['Transaction_amount'].sum()
+    growth = None
+    if len(by_period) > 1 and by_period["Transaction_count"].iloc[-2] > 0:
+        growth = (by_period["Transaction_count"].iloc[-1] / by_period["Transaction_count"].iloc[-2] - 1) * 100
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Total Policies", format_numbers([total_count])[0])
+    m2.metric("Total Premium", format_numbers([total_amount])[0])
+    m3.metric("Average Premium", format_numbers([total_amount / total_count if total_count else 0])[0])
+    m4.metric("Latest QoQ Policy Growth", f"{growth:.2f}%" if growth is not None else "—")
+
+    # ─── Top row (top 10 states), bottom row (lowest 10 states) ───
+    for row in (STATE_BARS[:2], STATE_BARS[2:]):
+        for col, bar in zip(st.columns(2), row):
+            with col:
+                st.subheader(bar[1])
+                st.plotly_chart(state_bar_figure(rankings, bar), use_container_width=True)
+
+
+# ==========================================
+# CACHE WARM-UP (utils/warmup.py)
+# ==========================================
+def warm_insurance_insights():
+    rankings = load_state_rankings()
+    get_insurance_summary("state")
+    get_aggregate("insurance_state_summary", ("State",), METRICS)
+    for bar in STATE_BARS:
+        state_bar_figure(rankings, bar)
+    return ["state_rankings", "state_summary"] + [bar[0] for bar in STATE_BARS]
@@ -1,60 +1,28 @@
-from sql_connection import get_sql_connection
-from utils import helper_func
+from utils.query_builder import run_select
+from utils.formatters import format_numbers, nice_ticks
+from utils.catalog import get_options
+from utils.figure_cache import cached_figure
+from utils.prefetch import PREFETCHER, neighbour_selections
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
 
-@st.cache_resource
-def get_connection():
-    conn = get_sql_connection()
-    cur = conn.cursor()
-    cur.execute("USE phonepe;")
-    return conn
-
-connection = get_connection()
-
-@st.cache_data(ttl=3600)
-def get_distinct_states(df):
-    return sorted(df['State'].dropna().unique().tolist())
-
-@st.cache_data(ttl=3600)
-def get_distinct_years(df):
-    return sorted(df['Year'].dropna().unique().tolist())
-
-
-@st.cache_data(ttl=3600)
 def fetch_filtered_data(state, year, quarter, transaction_type):
-    df = load_base_data()
-    # Apply local filters only for 'All'
-    if state != 'All':
-        df = df[df['State'] == state]
-    if year != 'All':
-        df = df[df['Year'] == int(year)]
-    if quarter != 'All':
-        df = df[df['Quarter'] == int(quarter)]
-    if transaction_type != 'All':
-        df = df[df['Transaction_type'] == transaction_type]
-    return df
-
-
-@st.cache_data(ttl=3600)
-def load_base_data():
-    query = """SELECT State, Year, Quarter, Transaction_type, 
-                      SUM(Transaction_count) AS Transaction_count, 
-                      SUM(Transaction_amount) AS Transaction_amount
-               FROM aggregated_transaction_data
-               GROUP BY State, Year, Quarter, Transaction_type"""
-    df = pd.read_sql(query, connection)
-    return df
-
-def show_transaction_data_count_amount(data):
-    
-  
-    if data.empty:
-        st.warning("⚠️ No data available for the selected filters.")
-        return
+    # Filters are pushed into SQL; "All" adds no predicate
+    return run_select(
+        "aggregated_transaction_data",
+        columns=("State", "Year", "Quarter", "Transaction_type"),
+        sums=("Transaction_count", "Transaction_amount"),
+        filters={
+            "State": state,
+            "Year": None if year == 'All' else int(year),
+            "Quarter": None if quarter == 'All' else int(quarter),
+            "Transaction_type": transaction_type,
+        },
+        group_by=("State", "Year", "Quarter", "Transaction_type"),
+    )
 
+def build_transaction_figures(data, filters=()):
+    """(count figure, amount figure) by transaction type, cached per filter tuple."""
     # Aggregate data
     agg_data = data.groupby('Transaction_type', as_index=False).agg({
         'Transaction_count': 'sum',
@@ -64,88 +32,78 @@ def show_transaction_data_count_amount(data):
     # =======================
     # Transaction Count Chart
     # =======================
-    count_data = agg_data.sort_values(by='Transaction_count', ascending=False)
-    count_data['Transaction_count_human'] = count_data['Transaction_count'].apply(helper_func.format_number)
-
-    fig_count = px.bar(
-        count_data,
-        x="Transaction_type",
-        y="Transaction_count",
-        color="Transaction_type",
-        title="Transaction Count by Type",
-        text="Transaction_count_human"
-    )
-
-    fig_count.update_traces(marker_line_width=0.3, textposition='outside')
-    fig_count.update_layout(
-        transition_duration=200,
-        showlegend=False,
-        margin=dict(l=40, r=40, t=20, b=40),
-        title_x=0.5,
-        xaxis_title="Transaction Type",
-        yaxis_title="Transaction Count"
-    )
-
-    # Manually build Y-axis ticks in millions/billions
-    y_max = count_data['Transaction_count'].max()
-    step = y_max / 5 if y_max > 0 else 1
-    tickvals = [i for i in range(0, int(y_max) + int(step), int(step))]
-
-    ticktext = []
-    for val in tickvals:
-        if val >= 1e9:
-            ticktext.append(f"{val / 1e9:.1f}B")
-        elif val >= 1e6:
-            ticktext.append(f"{val / 1e6:.1f}M")
-        elif val >= 1e3:
-            ticktext.append(f"{val / 1e3:.1f}K")
-        else:
-            ticktext.append(str(int(val)))
-
-    fig_count.update_yaxes(tickvals=tickvals, ticktext=ticktext)
+    def build_count_figure():
+        count_data = agg_data.sort_values(by='Transaction_count', ascending=False)
+        count_data['Transaction_count_human'] = format_numbers(count_data['Transaction_count'])
+
+        fig_count = px.bar(
+            count_data,
+            x="Transaction_type",
+            y="Transaction_count",
+            color="Transaction_type",
+            title="Transaction Count by Type",
+            text="Transaction_count_human"
+        )
+
+        fig_count.update_traces(marker_line_width=0.3, textposition='outside')
+        fig_count.update_layout(
+            transition_duration=200,
+            showlegend=False,
+            margin=dict(l=40, r=40, t=20, b=40),
+            title_x=0.5,
+            xaxis_title="Transaction Type",
+            yaxis_title="Transaction Count"
+        )
+
+        # Y-axis ticks in thousands/millions/billions
+        tickvals, ticktext = nice_ticks(count_data['Transaction_count'].max())
+        fig_count.update_yaxes(tickvals=tickvals, ticktext=ticktext)
+        return fig_count
 
     # =======================
     # Transaction Amount Chart
     # =======================
-    amount_data = agg_data.sort_values(by='Transaction_amount', ascending=False)
-    amount_data['Transaction_amount_human'] = amount_data['Transaction_amount'].apply(helper_func.format_number)
-
-    fig_amount = px.bar(
-        amount_data,
-        x="Transaction_type",
-        y="Transaction_amount",
-        color="Transaction_type",
-        title="Transaction Amount by Type",
-        text="Transaction_amount_human"
-    )
-
-    fig_amount.update_traces(marker_line_width=0.3, textposition='outside')
-    fig_amount.update_layout(
-        transition_duration=200,
-        showlegend=False,
-        margin=dict(l=40, r=40, t=20, b=40),
-        title_x=0.5,
-        xaxis_title="Transaction Type",
-        yaxis_title="Transaction Amount"
-    )
-
-    # Same manual Y-axis tick labels (M/B)
-    y_max = amount_data['Transaction_amount'].max()
-    step = y_max / 5 if y_max > 0 else 1
-    tickvals = [i for i in range(0, int(y_max) + int(step), int(step))]
-
-    ticktext = []
-    for val in tickvals:
-        if val >= 1e9:
-            ticktext.append(f"{val / 1e9:.1f}B")
-        elif val >= 1e6:
-            ticktext.append(f"{val / 1e6:.1f}M")
-        elif val >= 1e3:
-            ticktext.append(f"{val / 1e3:.1f}K")
-        else:
-            ticktext.append(str(int(val)))
+    def build_amount_figure():
+        amount_data = agg_data.sort_values(by='Transaction_amount', ascending=False)
+        amount_data['Transaction_amount_human'] = format_numbers(amount_data['Transaction_amount'])
+
+        fig_amount = px.bar(
+            amount_data,
+            x="Transaction_type",
+            y="Transaction_amount",
+            color="Transaction_type",
+            title="Transaction Amount by Type",
+            text="Transaction_amount_human"
+        )
+
+        fig_amount.update_traces(marker_line_width=0.3, textposition='outside')
+        fig_amount.update_layout(
+            transition_duration=200,
+            showlegend=False,
+            margin=dict(l=40, r=40, t=20, b=40),
+            title_x=0.5,
+            xaxis_title="Transaction Type",
+            yaxis_title="Transaction Amount"
+        )
+
+        # Same Y-axis tick labels (K/M/B)
+        tickvals, ticktext = nice_ticks(amount_data['Transaction_amount'].max())
+        fig_amount.update_yaxes(tickvals=tickvals, ticktext=ticktext)
+        return fig_amount
+
+    fig_count = cached_figure("transaction_analysis", "count_by_type", filters, build_count_figure)
+    fig_amount = cached_figure("transaction_analysis", "amount_by_type", filters, build_amount_figure)
+    return fig_count, fig_amount
+
+
+def show_transaction_data_count_amount(data, filters=()):
+    
+  
+    if data.empty:
+        st.warning("⚠️ No data available for the selected filters.")
+        return
 
-    fig_amount.update_yaxes(tickvals=tickvals, ticktext=ticktext)
+    fig_count, fig_amount = build_transaction_figures(data, filters)
 
     # =======================
     # Display
@@ -166,8 +124,6 @@ def show_transaction_analysis():
     )
     
 
-    df = load_base_data()
-
     # Collapsible filter section
     with st.expander("🔧 Filter Options", expanded=True):
         # Reset button
@@ -191,10 +147,10 @@ def show_transaction_analysis():
         # Filter options
         col1, col2, col3, col4 = st.columns(4)
 
-        states = ['All'] + get_distinct_states(df)
-        years = ['All'] + [str(y) for y in get_distinct_years(df)]
-        quarters = ['All', 1, 2, 3, 4]
-        types = ['All', 'Recharge & bill payments', 'Peer-to-peer payments', 'Merchant payments', 'Financial Services', 'Others']
+        states = ['All'] + get_options('aggregated_transaction_data', 'State')
+        years = ['All'] + [str(y) for y in get_options('aggregated_transaction_data', 'Year')]
+        quarters = ['All'] + get_options('aggregated_transaction_data', 'Quarter')
+        types = ['All'] + get_options('aggregated_transaction_data', 'Transaction_type')
 
         col1.selectbox('Select State', states, key='selected_state')
         col2.selectbox('Select Year', years, key='selected_year')
@@ -214,13 +170,49 @@ def show_transaction_analysis():
     average_amount = data['Transaction_amount'].mean() if not data.empty else 0
     total_amount = data['Transaction_amount'].sum() if not data.empty else 0
 
+    labels = format_numbers([total_transactions, average_amount, total_amount])
     col1, col2, col3 = st.columns(3)
-    col1.metric("Total Transactions", helper_func.format_number(total_transactions))
-    col2.metric("Average Transaction Amount", helper_func.format_number(average_amount))
-    col3.metric("Total Transaction Amount", helper_func.format_number(total_amount))
+    col1.metric("Total Transactions", labels[0])
+    col2.metric("Average Transaction Amount", labels[1])
+    col3.metric("Total Transaction Amount", labels[2])
+
+    show_transaction_data_count_amount(data, filters=(
+        st.session_state['selected_state'],
+        st.session_state['selected_year'],
+        st.session_state['selected_quarter'],
+        st.session_state['selected_type']
+    ))
+
+    # Load the neighbouring periods / next state in the background
+    prefetch_neighbours(
+        st.session_state['selected_state'],
+        st.session_state['selected_year'],
+        st.session_state['selected_quarter'],
+        st.session_state['selected_type'],
+        options={"State": states[1:], "Year": years[1:], "Quarter": quarters[1:]}
+    )
+
+
+# ==========================================
+# PREFETCH + CACHE WARM-UP (utils/prefetch.py, utils/warmup.py)
+# ==========================================
+def load_selection(state, year, quarter, transaction_type):
+    """Data and both figures for one filter selection, without drawing anything."""
+    filters = (state, year, quarter, transaction_type)
+    data = fetch_filtered_data(*filters)
+    if data.empty:
+        return []
+    build_transaction_figures(data, filters)
+    return ["count_by_type", "amount_by_type"]
+
+
+def prefetch_neighbours(state, year, quarter, transaction_type, options):
+    selection = {"State": state, "Year": year, "Quarter": quarter}
+    for n in neighbour_selections(selection, options):
+        key = ("transaction_analysis", n["State"], n["Year"], n["Quarter"], transaction_type)
+        PREFETCHER.prefetch(key, load_selection, n["State"], n["Year"], n["Quarter"], transaction_type)
 
-    show_transaction_data_count_amount(data)
-   
-    
-    
 
+def warm_transaction_analysis():
+    """Default view: every filter at 'All'."""
+    return load_selection('All', 'All', 'All', 'All')
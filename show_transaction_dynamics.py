@@ -1,78 +1,243 @@
-from sql_connection import get_sql_connection
-from utils import helper_func
+from utils.db import read_sql, get_data_version, query_key
+from utils.formatters import format_numbers
+from utils.figure_cache import cached_figure
+from utils.perf import fragment_section
+from utils.catalog import get_options
+from utils.query_batch import QueryBatch
+from utils.query_builder import Between, derived, run_select
+from utils.query_cache import QUERY_CACHE
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
-# ==========================================
-# CACHE CONNECTION
-# ==========================================
-@st.cache_resource
-def get_connection():
-    """Establish and cache database connection"""
-    try:
-        conn = get_sql_connection()
-        cur = conn.cursor()
-        cur.execute("USE phonepe;")
-        return conn
-    except Exception as e:
-        st.error(f"Database connection failed: {e}")
-        return None
-
-connection = get_connection()
+# the MainPage entry whose fragments these are (telemetry attributes their queries to it)
+PAGE = 'Transaction Dynamics'
 
 # ==========================================
 # CACHE QUERY EXECUTION
 # ==========================================
-@st.cache_data(ttl=200)
-def fetch_data(query):
-    """Fetch data with error handling"""
-    if connection is None:
-        st.error("No database connection available")
-        return pd.DataFrame()
-    
+def _fetch_numeric(query, numeric):
+    df = read_sql(query)
+    # SUM / AVG over DECIMAL columns arrive as object-dtype Decimals from MySQL
+    df[list(numeric)] = df[list(numeric)].astype(float)
+    return df
+
+
+def load_query(query, tables=("aggregated_transaction_data",), numeric=()):
+    """
+    The query's result with the `numeric` columns cast to float. Cached
+    until `tables` change; after that the last result is served while a
+    background refresh runs.
+    """
+    return QUERY_CACHE.get(query_key(query), get_data_version(*tables),
+                           lambda: _fetch_numeric(query, numeric)).copy()
+
+
+def fetch_data(query, tables=("aggregated_transaction_data",), numeric=()):
+    """load_query with error handling: failures and empty results are shown on the page."""
     try:
-        df = pd.read_sql(query, connection)
-        if df.empty:
-            st.warning("Query returned no results")
-        return df
+        df = load_query(query, tables, numeric)
     except Exception as e:
         st.error(f"Error fetching data: {e}")
         return pd.DataFrame()
+    if df.empty:
+        st.warning("Query returned no results")
+    return df
 
 
 # ==========================================
-# LINE CHART - TRANSACTION DYNAMICS
+# STATE GROWTH (LAG window over every state x quarter)
 # ==========================================
-def show_transaction_dynamics():
-    st.markdown(
-        "<h1 style='text-align: center; font-size: 48px;'>📈 PhonePe Transaction Dynamics</h1>",
-        unsafe_allow_html=True
-    )
+# Year / Quarter filters are applied to the window's output as bound
+# parameters, so each period is fetched on its own.
+STATE_GROWTH = derived("""
+    SELECT 
+        State,
+        Year,
+        Quarter,
+        Total_Amount,
+        Prev_Quarter_Amount,
+        ((Total_Amount - Prev_Quarter_Amount) / Prev_Quarter_Amount) * 100 AS Growth_Percentage
+    FROM (
+        SELECT 
+            State, 
+            Year, 
+            Quarter,
+            SUM(Transaction_amount) AS Total_Amount,
+            LAG(SUM(Transaction_amount)) 
+                OVER (PARTITION BY State ORDER BY Year, Quarter) AS Prev_Quarter_Amount
+        FROM aggregated_transaction_data
+        GROUP BY State, Year, Quarter
+    ) AS ranked
+    WHERE Prev_Quarter_Amount IS NOT NULL
+""", "state_growth", tables=("aggregated_transaction_data",))
 
-    # ==========================================
-    # SECTION 1: Yearly Business Trend
-    # ==========================================
-    st.markdown("## 📊 Yearly Business Trend")
 
-    query1 = """
+# ==========================================
+# TAB QUERIES (whole-history summaries)
+# ==========================================
+TAB_QUERIES = {
+    "emerging": """
+        WITH ranked AS (
+            SELECT 
+                State, 
+                Year, 
+                Quarter,
+                SUM(Transaction_amount) AS Total_Amount,
+                LAG(SUM(Transaction_amount)) 
+                    OVER (PARTITION BY State ORDER BY Year, Quarter) AS Prev_Quarter_Amount
+            FROM Aggregated_Transaction_data
+            GROUP BY State, Year, Quarter
+        ),
+        growth_calc AS (
+            SELECT 
+                State,
+                Year,
+                Quarter,
+                Total_Amount,
+                Prev_Quarter_Amount,
+                CASE 
+                    WHEN Prev_Quarter_Amount IS NOT NULL AND Prev_Quarter_Amount > 0 THEN
+                        ((Total_Amount - Prev_Quarter_Amount) / Prev_Quarter_Amount) * 100
+                    ELSE NULL
+                END AS Growth_Percentage
+            FROM ranked
+            WHERE Prev_Quarter_Amount IS NOT NULL
+        )
         SELECT 
-            Year, SUM(transaction_amount) AS Total_Amount
-        FROM Aggregated_Transaction_Data
-        GROUP BY Year
-        ORDER BY Year;
+            State,
+            AVG(Growth_Percentage) AS Avg_Growth,
+            COUNT(*) AS Periods_Analyzed,
+            SUM(CASE WHEN Growth_Percentage > 0 THEN 1 ELSE 0 END) AS Growth_Periods,
+            MAX(Total_Amount) AS Peak_Amount
+        FROM growth_calc
+        GROUP BY State
+        HAVING AVG(Growth_Percentage) > 0
+        ORDER BY Avg_Growth DESC
+        LIMIT 15;
+    """,
+    "declining": """
+        WITH ranked AS (
+            SELECT 
+                State, 
+                Year, 
+                Quarter,
+                SUM(Transaction_amount) AS Total_Amount,
+                LAG(SUM(Transaction_amount)) 
+                    OVER (PARTITION BY State ORDER BY Year, Quarter) AS Prev_Quarter_Amount
+            FROM Aggregated_Transaction_data
+            GROUP BY State, Year, Quarter
+        )
+        SELECT 
+            State,
+            Year,
+            Quarter,
+            Total_Amount,
+            Prev_Quarter_Amount,
+            (Total_Amount - Prev_Quarter_Amount) AS Amount_Decline,
+            ((Total_Amount - Prev_Quarter_Amount) / Prev_Quarter_Amount) * 100 AS Decline_Percentage
+        FROM ranked
+        WHERE Total_Amount < Prev_Quarter_Amount
+        ORDER BY Decline_Percentage ASC
+        LIMIT 50;
+    """,
+}
+
+
+# aggregate columns of each tab's result
+TAB_NUMERIC = {
+    "emerging": ("Avg_Growth", "Growth_Periods", "Peak_Amount"),
+    "declining": ("Total_Amount", "Prev_Quarter_Amount", "Amount_Decline", "Decline_Percentage"),
+}
+
+
+def load_tab_data(tab):
+    """Run a tab's query the first time the tab is opened; reused until the data changes."""
+    return fetch_data(TAB_QUERIES[tab], numeric=TAB_NUMERIC[tab])
+
+
+YEARLY_QUERY = """
+    SELECT 
+        Year, SUM(transaction_amount) AS Total_Amount
+    FROM aggregated_transaction_data
+    GROUP BY Year
+    ORDER BY Year;
+"""
+
+DEFAULT_MIN_GROWTH = -50
+
+
+# ==========================================
+# SECTION DATA (shared by the sections and warm_transaction_dynamics)
+# ==========================================
+def load_type_trends(selected_types, year_range=None):
+    """Yearly amount per transaction type, only for the selected types / years."""
+    df = run_select(
+        "aggregated_transaction_data",
+        columns=("Year", "Transaction_type"),
+        sums=("Transaction_amount",),
+        filters={
+            "Transaction_type": selected_types,
+            "Year": Between(*year_range) if year_range else None,
+        },
+        group_by=("Year", "Transaction_type"),
+        order_by=("Year", "Transaction_type"),
+    )
+    df = df.rename(columns={
+        "Transaction_type": "transaction_type",
+        "Transaction_amount": "Total_Amount",
+    })
+    # Format values for display
+    df["Formatted_Value"] = format_numbers(df["Total_Amount"])
+    return df
+
+
+def load_periods():
+    # Periods come from the state x period rollup
+    return run_select("agg_state_period", columns=("Year", "Quarter"), group_by=("Year", "Quarter"))
+
+
+def load_period_growth(selected_year, selected_quarter, min_growth):
     """
-    
-    with st.spinner("Loading yearly business trend..."):
-        grph1 = fetch_data(query1)
-    
-    if grph1.empty:
-        st.warning("No data available for yearly trend")
-        return
+    Growth of every state in one quarter. The period is pushed into the
+    growth query; the threshold only trims its rows, so the slider never
+    refetches. Sorted ascending (the insight metrics rely on this order).
+    """
+    growth_df = run_select(
+        STATE_GROWTH,
+        columns=("State", "Year", "Quarter", "Total_Amount", "Prev_Quarter_Amount", "Growth_Percentage"),
+        filters={"Year": selected_year, "Quarter": selected_quarter},
+    )
+    numeric = ["Total_Amount", "Prev_Quarter_Amount", "Growth_Percentage"]
+    growth_df[numeric] = growth_df[numeric].astype(float)
+    period_df = growth_df[growth_df["Growth_Percentage"] >= min_growth]
+    return period_df.sort_values("Growth_Percentage", ascending=True)
+
+
+def load_emerging():
+    emerging_df = load_tab_data("emerging")
+    if not emerging_df.empty:
+        emerging_df["Formatted_Peak"] = format_numbers(emerging_df["Peak_Amount"])
+        emerging_df["Growth_Rate"] = (emerging_df["Growth_Periods"] / emerging_df["Periods_Analyzed"] * 100)
+    return emerging_df
+
 
+def load_declining():
+    declining_df = load_tab_data("declining")
+    if not declining_df.empty:
+        declining_df[["Formatted_Amount", "Formatted_Prev", "Formatted_Decline"]] = format_numbers(
+            declining_df[["Total_Amount", "Prev_Quarter_Amount", "Amount_Decline"]]).to_numpy()
+    return declining_df
+
+
+# ==========================================
+# FIGURE BUILDERS
+# ==========================================
+def build_yearly_figure(grph1):
+    grph1 = grph1.copy()
     # Format numbers using helper function
-    grph1["Formatted_Value"] = grph1["Total_Amount"].apply(helper_func.format_number)
+    grph1["Formatted_Value"] = format_numbers(grph1["Total_Amount"])
 
     # Create the Plotly line chart
     fig = px.line(
@@ -117,68 +282,10 @@ def show_transaction_dynamics():
             type='category'  # Ensures years display properly
         )
     )
+    return fig
 
-    st.plotly_chart(fig, use_container_width=True)
-    
-    
-    
-    # ==========================================
-    # SECTION 2: Transaction Type Trends
-    # ==========================================
-    st.markdown("## 💹 Yearly Trend Across Transaction Types")
-
-    query2 = """
-        SELECT 
-            Year, transaction_type, SUM(transaction_amount) AS Total_Amount
-        FROM Aggregated_Transaction_Data
-        GROUP BY Year, transaction_type
-        ORDER BY Year, transaction_type;
-    """
-    
-    with st.spinner("Loading transaction type trends..."):
-        df = fetch_data(query2)
-    
-    if df.empty:
-        st.warning("No data available for transaction type trends")
-        return
-
-    # Format values for display
-    df["Formatted_Value"] = df["Total_Amount"].apply(helper_func.format_number)
-
-    # Add filters
-    col1, col2 = st.columns([2, 1])
-    with col1:
-        available_types = df["transaction_type"].unique().tolist()
-        selected_types = st.multiselect(
-            "Filter Transaction Types",
-            options=available_types,
-            default=available_types,
-            key="transaction_type_filter"
-        )
-    with col2:
-        show_all = st.checkbox("Show All Years", value=True, key="show_all_years")
-    
-    # Filter data based on selection
-    filtered_df = df[df["transaction_type"].isin(selected_types)].copy()
-    
-    if not show_all and len(filtered_df["Year"].unique()) > 0:
-        available_years = sorted(filtered_df["Year"].unique())
-        year_range = st.slider(
-            "Select Year Range",
-            min_value=int(available_years[0]),
-            max_value=int(available_years[-1]),
-            value=(int(available_years[0]), int(available_years[-1])),
-            key="year_range"
-        )
-        filtered_df = filtered_df[
-            (filtered_df["Year"] >= year_range[0]) & 
-            (filtered_df["Year"] <= year_range[1])
-        ]
-
-    if filtered_df.empty:
-        st.info("No data matches your filter criteria")
-        return
 
+def build_type_figure(filtered_df):
     # Create the line chart with proper custom data
     fig2 = px.line(
         filtered_df,
@@ -231,354 +338,451 @@ def show_transaction_dynamics():
             x=0.5
         )
     )
+    return fig2
 
-    st.plotly_chart(fig2, use_container_width=True)
-    
-    # ==========================================
-    # EMERGING AND DECLINING STATES ANALYSIS
-    # ==========================================
-    st.markdown("## 🚀 Emerging & 📉 Declining States Analysis")
+
+def build_growth_figure(period_df, selected_year, selected_quarter):
+    period_df = period_df.copy()
+    # Add formatted values
+    period_df[["Formatted_Amount", "Formatted_Prev"]] = format_numbers(
+        period_df[["Total_Amount", "Prev_Quarter_Amount"]]).to_numpy()
+
+    # Color code based on growth
+    colors = ['red' if x < 0 else 'green' for x in period_df["Growth_Percentage"]]
+
+    fig_growth = go.Figure(data=[
+        go.Bar(
+            y=period_df["State"],
+            x=period_df["Growth_Percentage"],
+            orientation='h',
+            marker=dict(
+                color=colors,
+                line=dict(color='white', width=1)
+            ),
+            customdata=period_df[["Total_Amount", "Prev_Quarter_Amount", "Formatted_Amount", "Formatted_Prev"]],
+            hovertemplate=(
+                '<b>%{y}</b><br>'
+                'Growth: %{x:.2f}%<br>'
+                'Current: ₹%{customdata[0]:,.0f} (%{customdata[2]})<br>'
+                'Previous: ₹%{customdata[1]:,.0f} (%{customdata[3]})<extra></extra>'
+            )
+        )
+    ])
+
+    fig_growth.update_layout(
+        title=f"State-wise Growth for Q{selected_quarter} {selected_year}",
+        xaxis_title="Growth Percentage (%)",
+        yaxis_title="State",
+        title_x=0.5,
+        font=dict(size=12, color="white"),
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        height=max(400, len(period_df) * 25),
+        margin=dict(l=150, r=40, t=60, b=40),
+        xaxis=dict(
+            showgrid=True,
+            gridcolor="rgba(255,255,255,0.2)",
+            zeroline=True,
+            zerolinecolor="rgba(255,255,255,0.5)",
+            zerolinewidth=2
+        ),
+        yaxis=dict(showgrid=False)
+    )
+
+    return fig_growth
+
+
+def build_emerging_figure(emerging_df):
+    # Visual representation
+    fig_emerging = px.bar(
+        emerging_df.head(10),
+        x="Avg_Growth",
+        y="State",
+        orientation='h',
+        title="Top 10 Emerging States by Average Growth",
+        color="Avg_Growth",
+        color_continuous_scale="Greens",
+        custom_data=["Avg_Growth", "Growth_Periods", "Periods_Analyzed", "Formatted_Peak"]
+    )
+
+    fig_emerging.update_traces(
+        hovertemplate=(
+            '<b>%{y}</b><br>'
+            'Avg Growth: %{customdata[0]:.2f}%<br>'
+            'Positive Periods: %{customdata[1]}/{%{customdata[2]}<br>'
+            'Peak Amount: %{customdata[3]}<extra></extra>'
+        )
+    )
+
+    fig_emerging.update_layout(
+        font=dict(size=12, color="white"),
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        height=500,
+        xaxis_title="Average Growth (%)",
+        yaxis_title="",
+        title_x=0.5
+    )
+
+    return fig_emerging
+
+
+def build_decline_figure(declining_df):
+    # State-wise decline count
+    state_decline_count = declining_df["State"].value_counts().head(10)
+
+    fig_decline = px.bar(
+        x=state_decline_count.values,
+        y=state_decline_count.index,
+        orientation='h',
+        title="States with Most Decline Instances",
+        labels={"x": "Number of Declining Quarters", "y": "State"},
+        color=state_decline_count.values,
+        color_continuous_scale="Reds"
+    )
+
+    fig_decline.update_layout(
+        font=dict(size=12, color="white"),
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        height=450,
+        title_x=0.5,
+        showlegend=False
+    )
+
+    return fig_decline
+
+
+# ==========================================
+# SECTION 1: Yearly Business Trend
+# ==========================================
+@st.fragment
+@fragment_section(PAGE, "transaction_dynamics.yearly_trend")
+def yearly_trend_section():
+    st.markdown("## 📊 Yearly Business Trend")
+
+    with st.spinner("Loading yearly business trend..."):
+        grph1 = fetch_data(YEARLY_QUERY, numeric=("Total_Amount",))
     
-    # Tabs for different views
-    tab1, tab2, tab3 = st.tabs(["📊 Growth Analysis", "🔝 Top Performers", "⚠️ Declining States"])
+    if grph1.empty:
+        st.warning("No data available for yearly trend")
+        return
+
+
+    fig = cached_figure("transaction_dynamics", "yearly_trend", (), lambda: build_yearly_figure(grph1))
+
+    st.plotly_chart(fig, use_container_width=True)
+
+
+# ==========================================
+# SECTION 2: Transaction Type Trends
+# ==========================================
+@st.fragment
+@fragment_section(PAGE, "transaction_dynamics.type_trends")
+def type_trends_section():
+    st.markdown("## 💹 Yearly Trend Across Transaction Types")
+
+    # Filter options come from the dimension catalog; the selection is pushed
+    # into SQL, so only the chosen types and years are fetched
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        available_types = get_options("aggregated_transaction_data", "Transaction_type")
+        selected_types = st.multiselect(
+            "Filter Transaction Types",
+            options=available_types,
+            default=available_types,
+            key="transaction_type_filter"
+        )
+    with col2:
+        show_all = st.checkbox("Show All Years", value=True, key="show_all_years")
     
-    with tab1:
-        st.markdown("### Quarter-over-Quarter Performance")
-        
-        query_growth = """
-            WITH ranked AS (
-                SELECT 
-                    State, 
-                    Year, 
-                    Quarter,
-                    SUM(Transaction_amount) AS Total_Amount,
-                    LAG(SUM(Transaction_amount)) 
-                        OVER (PARTITION BY State ORDER BY Year, Quarter) AS Prev_Quarter_Amount
-                FROM Aggregated_Transaction_data
-                GROUP BY State, Year, Quarter
-            )
-            SELECT 
-                State,
-                Year,
-                Quarter,
-                Total_Amount,
-                Prev_Quarter_Amount,
-                CASE 
-                    WHEN Prev_Quarter_Amount IS NOT NULL THEN
-                        ((Total_Amount - Prev_Quarter_Amount) / Prev_Quarter_Amount) * 100
-                    ELSE NULL
-                END AS Growth_Percentage
-            FROM ranked
-            WHERE Prev_Quarter_Amount IS NOT NULL
-            ORDER BY Year DESC, Quarter DESC, Growth_Percentage DESC;
-        """
-        
-        with st.spinner("Analyzing state performance..."):
-            growth_df = fetch_data(query_growth)
-        
-        if growth_df.empty:
-            st.warning("No growth data available")
-            return
-        
-        # Filter options
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            years = sorted(growth_df["Year"].unique(), reverse=True)
-            selected_year = st.selectbox("Select Year", years, key="growth_year")
-        with col2:
-            quarters = sorted(growth_df[growth_df["Year"] == selected_year]["Quarter"].unique(), reverse=True)
-            selected_quarter = st.selectbox("Select Quarter", quarters, key="growth_quarter")
-        with col3:
-            min_growth = st.slider("Minimum Growth % to Display", -100, 100, -50, key="min_growth")
-        
-        # Filter data
-        period_df = growth_df[
-            (growth_df["Year"] == selected_year) & 
-            (growth_df["Quarter"] == selected_quarter) &
-            (growth_df["Growth_Percentage"] >= min_growth)
-        ].copy()
-        
-        if period_df.empty:
-            st.info("No data for selected period")
-            return
-        
-        # Add formatted values
-        period_df["Formatted_Amount"] = period_df["Total_Amount"].apply(helper_func.format_number)
-        period_df["Formatted_Prev"] = period_df["Prev_Quarter_Amount"].apply(helper_func.format_number)
-        
-        # Create bar chart
-        period_df = period_df.sort_values("Growth_Percentage", ascending=True)
-        
-        # Color code based on growth
-        colors = ['red' if x < 0 else 'green' for x in period_df["Growth_Percentage"]]
-        
-        fig_growth = go.Figure(data=[
-            go.Bar(
-                y=period_df["State"],
-                x=period_df["Growth_Percentage"],
-                orientation='h',
-                marker=dict(
-                    color=colors,
-                    line=dict(color='white', width=1)
-                ),
-                customdata=period_df[["Total_Amount", "Prev_Quarter_Amount", "Formatted_Amount", "Formatted_Prev"]],
-                hovertemplate=(
-                    '<b>%{y}</b><br>'
-                    'Growth: %{x:.2f}%<br>'
-                    'Current: ₹%{customdata[0]:,.0f} (%{customdata[2]})<br>'
-                    'Previous: ₹%{customdata[1]:,.0f} (%{customdata[3]})<extra></extra>'
-                )
+    year_range = None
+    available_years = get_options("aggregated_transaction_data", "Year")
+    if not show_all and available_years:
+        year_range = st.slider(
+            "Select Year Range",
+            min_value=int(available_years[0]),
+            max_value=int(available_years[-1]),
+            value=(int(available_years[0]), int(available_years[-1])),
+            key="year_range"
+        )
+
+    with st.spinner("Loading transaction type trends..."):
+        filtered_df = load_type_trends(selected_types, year_range)
+
+    if filtered_df.empty:
+        st.info("No data matches your filter criteria")
+        return
+
+    type_filters = (tuple(sorted(selected_types)), year_range)
+
+
+    fig2 = cached_figure("transaction_dynamics", "type_trends", type_filters, lambda: build_type_figure(filtered_df))
+
+    st.plotly_chart(fig2, use_container_width=True)
+
+
+# ==========================================
+# SECTION 3: Emerging & Declining States (one fragment per tab)
+# ==========================================
+@st.fragment
+@fragment_section(PAGE, "transaction_dynamics.growth")
+def growth_section():
+    st.markdown("### Quarter-over-Quarter Performance")
+
+
+    # Periods come from the state x period rollup; the chosen period is
+    # pushed into the growth query, so only that quarter's rows come back
+    periods = load_periods()
+    if periods.empty:
+        st.warning("No growth data available")
+        return
+
+    # Filter options
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        years = sorted(periods["Year"].unique(), reverse=True)
+        selected_year = st.selectbox("Select Year", years, key="growth_year")
+    with col2:
+        quarters = sorted(periods[periods["Year"] == selected_year]["Quarter"].unique(), reverse=True)
+        selected_quarter = st.selectbox("Select Quarter", quarters, key="growth_quarter")
+    with col3:
+        min_growth = st.slider("Minimum Growth % to Display", -100, 100, DEFAULT_MIN_GROWTH, key="min_growth")
+
+    with st.spinner("Analyzing state performance..."):
+        period_df = load_period_growth(selected_year, selected_quarter, min_growth)
+
+    if period_df.empty:
+        st.info("No data for selected period")
+        return
+
+
+    fig_growth = cached_figure(
+        "transaction_dynamics", "growth", (selected_year, selected_quarter, min_growth),
+        lambda: build_growth_figure(period_df, selected_year, selected_quarter)
+    )
+
+    st.plotly_chart(fig_growth, use_container_width=True)
+
+    # Key insights
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        top_grower = period_df.iloc[-1]
+        st.metric(
+            "🚀 Highest Growth",
+            top_grower["State"],
+            f"+{top_grower['Growth_Percentage']:.2f}%"
+        )
+    with col2:
+        if any(period_df["Growth_Percentage"] < 0):
+            worst_decline = period_df[period_df["Growth_Percentage"] < 0].iloc[0]
+            st.metric(
+                "📉 Largest Decline",
+                worst_decline["State"],
+                f"{worst_decline['Growth_Percentage']:.2f}%"
             )
-        ])
-        
-        fig_growth.update_layout(
-            title=f"State-wise Growth for Q{selected_quarter} {selected_year}",
-            xaxis_title="Growth Percentage (%)",
-            yaxis_title="State",
-            title_x=0.5,
-            font=dict(size=12, color="white"),
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            height=max(400, len(period_df) * 25),
-            margin=dict(l=150, r=40, t=60, b=40),
-            xaxis=dict(
-                showgrid=True,
-                gridcolor="rgba(255,255,255,0.2)",
-                zeroline=True,
-                zerolinecolor="rgba(255,255,255,0.5)",
-                zerolinewidth=2
-            ),
-            yaxis=dict(showgrid=False)
+    with col3:
+        avg_growth = period_df["Growth_Percentage"].mean()
+        st.metric(
+            "📊 Average Growth",
+            f"{avg_growth:.2f}%",
+            "across all states"
+        )
+
+
+@st.fragment
+@fragment_section(PAGE, "transaction_dynamics.emerging")
+def emerging_section():
+    st.markdown("### 🏆 Top Emerging States")
+
+
+    with st.spinner("Identifying top performers..."):
+        emerging_df = load_emerging()
+
+    if not emerging_df.empty:
+        # Display as a styled table
+        st.dataframe(
+            emerging_df.style.format({
+                "Avg_Growth": "{:.2f}%",
+                "Growth_Rate": "{:.2f}%",
+                "Periods_Analyzed": "{:.0f}",
+                "Growth_Periods": "{:.0f}"
+            }).background_gradient(subset=["Avg_Growth"], cmap="Greens"),
+            use_container_width=True,
+            height=400
         )
-        
-        st.plotly_chart(fig_growth, use_container_width=True)
-        
-        # Key insights
+
+
+        fig_emerging = cached_figure("transaction_dynamics", "emerging", (), lambda: build_emerging_figure(emerging_df))
+
+        st.plotly_chart(fig_emerging, use_container_width=True)
+    else:
+        st.info("No emerging states data available")
+
+
+@st.fragment
+@fragment_section(PAGE, "transaction_dynamics.declining")
+def declining_section():
+    st.markdown("### ⚠️ States with Declining Trends")
+
+
+    with st.spinner("Analyzing declining trends..."):
+        declining_df = load_declining()
+
+    if not declining_df.empty:
+        # Summary metrics
         col1, col2, col3 = st.columns(3)
         with col1:
-            top_grower = period_df.iloc[-1]
-            st.metric(
-                "🚀 Highest Growth",
-                top_grower["State"],
-                f"+{top_grower['Growth_Percentage']:.2f}%"
-            )
+            st.metric("Total Declining Instances", len(declining_df))
         with col2:
-            if any(period_df["Growth_Percentage"] < 0):
-                worst_decline = period_df[period_df["Growth_Percentage"] < 0].iloc[0]
-                st.metric(
-                    "📉 Largest Decline",
-                    worst_decline["State"],
-                    f"{worst_decline['Growth_Percentage']:.2f}%"
-                )
+            unique_states = declining_df["State"].nunique()
+            st.metric("States Affected", unique_states)
         with col3:
-            avg_growth = period_df["Growth_Percentage"].mean()
-            st.metric(
-                "📊 Average Growth",
-                f"{avg_growth:.2f}%",
-                "across all states"
-            )
-    
-    with tab2:
-        st.markdown("### 🏆 Top Emerging States")
-        
-        query_emerging = """
-            WITH ranked AS (
-                SELECT 
-                    State, 
-                    Year, 
-                    Quarter,
-                    SUM(Transaction_amount) AS Total_Amount,
-                    LAG(SUM(Transaction_amount)) 
-                        OVER (PARTITION BY State ORDER BY Year, Quarter) AS Prev_Quarter_Amount
-                FROM Aggregated_Transaction_data
-                GROUP BY State, Year, Quarter
-            ),
-            growth_calc AS (
-                SELECT 
-                    State,
-                    Year,
-                    Quarter,
-                    Total_Amount,
-                    Prev_Quarter_Amount,
-                    CASE 
-                        WHEN Prev_Quarter_Amount IS NOT NULL AND Prev_Quarter_Amount > 0 THEN
-                            ((Total_Amount - Prev_Quarter_Amount) / Prev_Quarter_Amount) * 100
-                        ELSE NULL
-                    END AS Growth_Percentage
-                FROM ranked
-                WHERE Prev_Quarter_Amount IS NOT NULL
-            )
-            SELECT 
-                State,
-                AVG(Growth_Percentage) AS Avg_Growth,
-                COUNT(*) AS Periods_Analyzed,
-                SUM(CASE WHEN Growth_Percentage > 0 THEN 1 ELSE 0 END) AS Growth_Periods,
-                MAX(Total_Amount) AS Peak_Amount
-            FROM growth_calc
-            GROUP BY State
-            HAVING AVG(Growth_Percentage) > 0
-            ORDER BY Avg_Growth DESC
-            LIMIT 15;
-        """
-        
-        with st.spinner("Identifying top performers..."):
-            emerging_df = fetch_data(query_emerging)
-        
-        if not emerging_df.empty:
-            emerging_df["Formatted_Peak"] = emerging_df["Peak_Amount"].apply(helper_func.format_number)
-            emerging_df["Growth_Rate"] = (emerging_df["Growth_Periods"] / emerging_df["Periods_Analyzed"] * 100)
-            
-            # Display as a styled table
-            st.dataframe(
-                emerging_df.style.format({
-                    "Avg_Growth": "{:.2f}%",
-                    "Growth_Rate": "{:.2f}%",
-                    "Periods_Analyzed": "{:.0f}",
-                    "Growth_Periods": "{:.0f}"
-                }).background_gradient(subset=["Avg_Growth"], cmap="Greens"),
-                use_container_width=True,
-                height=400
-            )
-            
-            # Visual representation
-            fig_emerging = px.bar(
-                emerging_df.head(10),
-                x="Avg_Growth",
-                y="State",
-                orientation='h',
-                title="Top 10 Emerging States by Average Growth",
-                color="Avg_Growth",
-                color_continuous_scale="Greens",
-                custom_data=["Avg_Growth", "Growth_Periods", "Periods_Analyzed", "Formatted_Peak"]
-            )
-            
-            fig_emerging.update_traces(
-                hovertemplate=(
-                    '<b>%{y}</b><br>'
-                    'Avg Growth: %{customdata[0]:.2f}%<br>'
-                    'Positive Periods: %{customdata[1]}/{%{customdata[2]}<br>'
-                    'Peak Amount: %{customdata[3]}<extra></extra>'
-                )
-            )
-            
-            fig_emerging.update_layout(
-                font=dict(size=12, color="white"),
-                plot_bgcolor="rgba(0,0,0,0)",
-                paper_bgcolor="rgba(0,0,0,0)",
-                height=500,
-                xaxis_title="Average Growth (%)",
-                yaxis_title="",
-                title_x=0.5
-            )
-            
-            st.plotly_chart(fig_emerging, use_container_width=True)
-        else:
-            st.info("No emerging states data available")
-    
-    with tab3:
-        st.markdown("### ⚠️ States with Declining Trends")
-        
-        query_declining = """
-            WITH ranked AS (
-                SELECT 
-                    State, 
-                    Year, 
-                    Quarter,
-                    SUM(Transaction_amount) AS Total_Amount,
-                    LAG(SUM(Transaction_amount)) 
-                        OVER (PARTITION BY State ORDER BY Year, Quarter) AS Prev_Quarter_Amount
-                FROM Aggregated_Transaction_data
-                GROUP BY State, Year, Quarter
-            )
-            SELECT 
-                State,
-                Year,
-                Quarter,
-                Total_Amount,
-                Prev_Quarter_Amount,
-                (Total_Amount - Prev_Quarter_Amount) AS Amount_Decline,
-                ((Total_Amount - Prev_Quarter_Amount) / Prev_Quarter_Amount) * 100 AS Decline_Percentage
-            FROM ranked
-            WHERE Total_Amount < Prev_Quarter_Amount
-            ORDER BY Decline_Percentage ASC
-            LIMIT 50;
-        """
-        
-        with st.spinner("Analyzing declining trends..."):
-            declining_df = fetch_data(query_declining)
-        
-        if not declining_df.empty:
-            declining_df["Formatted_Amount"] = declining_df["Total_Amount"].apply(helper_func.format_number)
-            declining_df["Formatted_Prev"] = declining_df["Prev_Quarter_Amount"].apply(helper_func.format_number)
-            declining_df["Formatted_Decline"] = declining_df["Amount_Decline"].apply(helper_func.format_number)
-            
-            # Summary metrics
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Total Declining Instances", len(declining_df))
-            with col2:
-                unique_states = declining_df["State"].nunique()
-                st.metric("States Affected", unique_states)
-            with col3:
-                avg_decline = declining_df["Decline_Percentage"].mean()
-                st.metric("Average Decline", f"{avg_decline:.2f}%")
-            
-            # Filter by severity
-            severity = st.select_slider(
-                "Filter by Decline Severity",
-                options=["All", "Minor (<10%)", "Moderate (10-25%)", "Severe (>25%)"],
-                value="All",
-                key="severity_filter"
-            )
-            
-            if severity == "Minor (<10%)":
-                display_df = declining_df[declining_df["Decline_Percentage"] > -10]
-            elif severity == "Moderate (10-25%)":
-                display_df = declining_df[(declining_df["Decline_Percentage"] <= -10) & (declining_df["Decline_Percentage"] > -25)]
-            elif severity == "Severe (>25%)":
-                display_df = declining_df[declining_df["Decline_Percentage"] <= -25]
-            else:
-                display_df = declining_df
-            
-            # Display table
-            st.dataframe(
-                display_df[[
-                    "State", "Year", "Quarter", "Formatted_Amount", 
-                    "Formatted_Prev", "Formatted_Decline", "Decline_Percentage"
-                ]].rename(columns={
-                    "Formatted_Amount": "Current Amount",
-                    "Formatted_Prev": "Previous Amount",
-                    "Formatted_Decline": "Decline",
-                    "Decline_Percentage": "Decline %"
-                }).style.format({
-                    "Decline %": "{:.2f}%"
-                }).background_gradient(subset=["Decline %"], cmap="Reds_r"),
-                use_container_width=True,
-                height=400
-            )
-            
-            # State-wise decline count
-            state_decline_count = declining_df["State"].value_counts().head(10)
-            
-            fig_decline = px.bar(
-                x=state_decline_count.values,
-                y=state_decline_count.index,
-                orientation='h',
-                title="States with Most Decline Instances",
-                labels={"x": "Number of Declining Quarters", "y": "State"},
-                color=state_decline_count.values,
-                color_continuous_scale="Reds"
-            )
-            
-            fig_decline.update_layout(
-                font=dict(size=12, color="white"),
-                plot_bgcolor="rgba(0,0,0,0)",
-                paper_bgcolor="rgba(0,0,0,0)",
-                height=450,
-                title_x=0.5,
-                showlegend=False
-            )
-            
-            st.plotly_chart(fig_decline, use_container_width=True)
+            avg_decline = declining_df["Decline_Percentage"].mean()
+            st.metric("Average Decline", f"{avg_decline:.2f}%")
+
+        # Filter by severity
+        severity = st.select_slider(
+            "Filter by Decline Severity",
+            options=["All", "Minor (<10%)", "Moderate (10-25%)", "Severe (>25%)"],
+            value="All",
+            key="severity_filter"
+        )
+
+        if severity == "Minor (<10%)":
+            display_df = declining_df[declining_df["Decline_Percentage"] > -10]
+        elif severity == "Moderate (10-25%)":
+            display_df = declining_df[(declining_df["Decline_Percentage"] <= -10) & (declining_df["Decline_Percentage"] > -25)]
+        elif severity == "Severe (>25%)":
+            display_df = declining_df[declining_df["Decline_Percentage"] <= -25]
         else:
-            st.success("🎉 No declining trends detected - all states showing growth!")
+            display_df = declining_df
+
+        # Display table
+        st.dataframe(
+            display_df[[
+                "State", "Year", "Quarter", "Formatted_Amount", 
+                "Formatted_Prev", "Formatted_Decline", "Decline_Percentage"
+            ]].rename(columns={
+                "Formatted_Amount": "Current Amount",
+                "Formatted_Prev": "Previous Amount",
+                "Formatted_Decline": "Decline",
+                "Decline_Percentage": "Decline %"
+            }).style.format({
+                "Decline %": "{:.2f}%"
+            }).background_gradient(subset=["Decline %"], cmap="Reds_r"),
+            use_container_width=True,
+            height=400
+        )
+
+
+        fig_decline = cached_figure("transaction_dynamics", "declining", (), lambda: build_decline_figure(declining_df))
+
+        st.plotly_chart(fig_decline, use_container_width=True)
+    else:
+        st.success("🎉 No declining trends detected - all states showing growth!")
+
+
+@st.fragment
+def states_analysis_tabs():
+    # Tabs track their selection, so only the open tab's section runs; the
+    # others pay for their query the first time they are opened.
+    tab1, tab2, tab3 = st.tabs(
+        ["📊 Growth Analysis", "🔝 Top Performers", "⚠️ Declining States"],
+        key="dynamics_tab",
+        on_change="rerun",
+    )
+
+    if tab1.open:
+        with tab1:
+            growth_section()
+
+    if tab2.open:
+        with tab2:
+            emerging_section()
+
+    if tab3.open:
+        with tab3:
+            declining_section()
+
+
+def prefetch_sections():
+    """
+    Full-page runs: load the yearly trend, the type trends (for the current
+    filters) and the growth periods at once. The tabs' own queries still
+    wait until their tab is opened.
+    """
+    types = st.session_state.get(
+        "transaction_type_filter", get_options("aggregated_transaction_data", "Transaction_type"))
+    year_range = None
+    years = get_options("aggregated_transaction_data", "Year")
+    if not st.session_state.get("show_all_years", True) and years:
+        year_range = st.session_state.get("year_range", (int(years[0]), int(years[-1])))
+    with QueryBatch() as batch:
+        batch.submit("yearly_trend", load_query, YEARLY_QUERY, numeric=("Total_Amount",))
+        batch.submit("type_trends", load_type_trends, types, year_range)
+        batch.submit("periods", load_periods)
+        batch.wait()
+
+
+# ==========================================
+# LINE CHART - TRANSACTION DYNAMICS
+# ==========================================
+def show_transaction_dynamics():
+    st.markdown(
+        "<h1 style='text-align: center; font-size: 48px;'>📈 PhonePe Transaction Dynamics</h1>",
+        unsafe_allow_html=True
+    )
+
+    # Each section is a fragment: its widgets rerun only that section
+    prefetch_sections()
+    yearly_trend_section()
+    type_trends_section()
+
+    # ==========================================
+    # EMERGING AND DECLINING STATES ANALYSIS
+    # ==========================================
+    st.markdown("## 🚀 Emerging & 📉 Declining States Analysis")
+    states_analysis_tabs()
+
+
+# ==========================================
+# CACHE WARM-UP (utils/warmup.py)
+# ==========================================
+def warm_transaction_dynamics():
+    """Load the default-filter data and build the default figure of every section."""
+    warmed = []
+
+    grph1 = fetch_data(YEARLY_QUERY, numeric=("Total_Amount",))
+    if not grph1.empty:
+        cached_figure("transaction_dynamics", "yearly_trend", (), lambda: build_yearly_figure(grph1))
+        warmed.append("yearly_trend")
+
+    types = get_options("aggregated_transaction_data", "Transaction_type")
+    type_df = load_type_trends(types)
+    if not type_df.empty:
+        cached_figure("transaction_dynamics", "type_trends", (tuple(sorted(types)), None),
+                      lambda: build_type_figure(type_df))
+        warmed.append("type_trends")
+
+    periods = load_periods()
+    if not periods.empty:
+        year = periods["Year"].max()
+        quarter = periods.loc[periods["Year"] == year, "Quarter"].max()
+        period_df = load_period_growth(year, quarter, DEFAULT_MIN_GROWTH)
+        if not period_df.empty:
+            cached_figure("transaction_dynamics", "growth", (year, quarter, DEFAULT_MIN_GROWTH),
+                          lambda: build_growth_figure(period_df, year, quarter))
+            warmed.append("growth")
+
+    emerging_df = load_emerging()
+    if not emerging_df.empty:
+        cached_figure("transaction_dynamics", "emerging", (), lambda: build_emerging_figure(emerging_df))
+        warmed.append("emerging")
+
+    declining_df = load_declining()
+    if not declining_df.empty:
+        cached_figure("transaction_dynamics", "declining", (), lambda: build_decline_figure(declining_df))
+        warmed.append("declining")
+
+    return warmed
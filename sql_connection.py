@@ -1,16 +1,19 @@
 import mysql.connector
+from mysql.connector import pooling
 __conn=None
 
+DB_CONFIG = dict(
+    host="localhost",
+    user="root",
+    password="123456",
+    port=3306
+)
+
 def get_sql_connection():
     global __conn
     if __conn is None:
         try:
-            conn = mysql.connector.connect(
-                host="localhost",
-                user="root",
-                password="123456",
-                port=3306
-                        )
+            conn = mysql.connector.connect(**DB_CONFIG)
             if conn.is_connected():
                 print("Connection successful!")
                 return conn
@@ -18,4 +21,21 @@ def get_sql_connection():
 
         except mysql.connector.Error as err:
             print(f"Error: {err}")
-    return __conn
\ No newline at end of file
+    return __conn
+
+def get_sql_connection_pool(pool_size=8):
+    # pooled connections go straight to the phonepe schema and autocommit,
+    # so every read sees the latest committed ETL run
+    try:
+        pool = pooling.MySQLConnectionPool(
+            pool_name="phonepe_pool",
+            pool_size=pool_size,
+            database="phonepe",
+            autocommit=True,
+            **DB_CONFIG
+        )
+        print(f"Connection pool ready ({pool_size} connections)")
+        return pool
+    except mysql.connector.Error as err:
+        print(f"Error: {err}")
+        raise
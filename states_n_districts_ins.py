@@ -1,44 +1,22 @@
 
-from sql_connection import get_sql_connection
-from utils import helper_func
+from utils.formatters import format_numbers
+from utils.catalog import get_options
+from utils.insurance_summary import get_insurance_summary, load_insurance_summary
+from utils.query_batch import QueryBatch
+from utils.ranking import get_rankings, top_bottom
+from utils.perf import fragment_section
 import streamlit as st
-import pandas as pd
 
-# ==========================================
-# CACHE CONNECTION
-# ==========================================
-@st.cache_resource
-def get_connection():
-    conn = get_sql_connection()
-    cur = conn.cursor()
-    cur.execute("USE phonepe;")
-    return conn
+# the MainPage entry whose fragments these are (telemetry attributes their queries to it)
+PAGE = 'Insurance across States and Districts'
 
-connection = get_connection()
 
-# ==========================================
-# CACHE QUERY EXECUTION
-# ==========================================
-@st.cache_data(ttl=200)
-def fetch_data(query):
-    return pd.read_sql(query, connection)
-
-def states_n_districts_ins():
-    st.markdown(
-        "<h1 style='text-align: center; font-size: 48px;'>Insurance across States and District</h1>",
-        unsafe_allow_html=True
-    )
-
-    # =========================================================
-    # FETCH AVAILABLE YEARS + ADD "All Years"
-    # =========================================================
-    df_years = fetch_data("SELECT DISTINCT Year FROM map_insurance_data ORDER BY Year ASC;")
-    year_list = df_years["Year"].astype(str).tolist()
-    year_list.insert(0, "All Years")  # Add "All Years" option at the top
-
-    # =========================================================
-    # SECTION 1️⃣: TOP & LOWEST STATES / DISTRICTS
-    # =========================================================
+# =========================================================
+# SECTION 1️⃣: TOP & LOWEST STATES / DISTRICTS
+# =========================================================
+@st.fragment
+@fragment_section(PAGE, "states_n_districts_ins.top_lowest")
+def top_lowest_section(year_list):
     st.markdown("## 📊 Top & Lowest Performing States/Districts")
 
     selected_year_toplow = st.selectbox(
@@ -48,32 +26,16 @@ def states_n_districts_ins():
         key="toplow_year"
     )
 
-    # Handle "All Years"
-    where_clause = "" if selected_year_toplow == "All Years" else f"WHERE Year = {selected_year_toplow}"
-
-    # ---------- Top & Bottom States ----------
-    top10_query = f"""
-        SELECT State, SUM(Transaction_amount) AS total_transaction_amount
-        FROM map_insurance_data
-        {where_clause}
-        GROUP BY State
-        ORDER BY total_transaction_amount DESC
-        LIMIT 10;
-    """
-    bottom10_query = f"""
-        SELECT State, SUM(Transaction_amount) AS total_transaction_amount
-        FROM map_insurance_data
-        {where_clause}
-        GROUP BY State
-        ORDER BY total_transaction_amount ASC
-        LIMIT 10;
-    """
-
-    top10 = fetch_data(top10_query)
-    bottom10 = fetch_data(bottom10_query)
-
-    top10['Transaction Amount'] = top10['total_transaction_amount'].apply(helper_func.format_number)
-    bottom10['Transaction Amount'] = bottom10['total_transaction_amount'].apply(helper_func.format_number)
+    year_filters = {} if selected_year_toplow == "All Years" else {"Year": int(selected_year_toplow)}
+
+    # ---------- Top & Bottom States (insurance_state_summary) ----------
+    top10, bottom10 = get_rankings(
+        "insurance_state_summary", ("State",), ("Transaction_amount",), filters=year_filters, n=10)
+    top10 = top10.rename(columns={'Transaction_amount': 'total_transaction_amount'})
+    bottom10 = bottom10.rename(columns={'Transaction_amount': 'total_transaction_amount'})
+
+    top10['Transaction Amount'] = format_numbers(top10['total_transaction_amount'])
+    bottom10['Transaction Amount'] = format_numbers(bottom10['total_transaction_amount'])
 
     col1, col2 = st.columns(2)
     with col1:
@@ -83,29 +45,14 @@ def states_n_districts_ins():
         st.subheader("⬇️ Bottom 10 States")
         st.table(bottom10[['State', 'Transaction Amount']])
 
-    # ---------- Top & Bottom Districts ----------
-    top10_district_query = f"""
-        SELECT District, State, SUM(Amount) AS total_transaction_amount
-        FROM map_transaction_data
-        {where_clause}
-        GROUP BY District, State
-        ORDER BY total_transaction_amount DESC
-        LIMIT 10;
-    """
-    bottom10_district_query = f"""
-        SELECT District, State, SUM(Amount) AS total_transaction_amount
-        FROM map_transaction_data
-        {where_clause}
-        GROUP BY District, State
-        ORDER BY total_transaction_amount ASC
-        LIMIT 10;
-    """
-
-    top10_district = fetch_data(top10_district_query)
-    bottom10_district = fetch_data(bottom10_district_query)
-
-    top10_district['Transaction Amount'] = top10_district['total_transaction_amount'].apply(helper_func.format_number)
-    bottom10_district['Transaction Amount'] = bottom10_district['total_transaction_amount'].apply(helper_func.format_number)
+    # ---------- Top & Bottom Districts (insurance_district_summary) ----------
+    top10_district, bottom10_district = get_rankings(
+        "insurance_district_summary", ("District", "State"), ("Transaction_amount",), filters=year_filters, n=10)
+    top10_district = top10_district.rename(columns={'Transaction_amount': 'total_transaction_amount'})
+    bottom10_district = bottom10_district.rename(columns={'Transaction_amount': 'total_transaction_amount'})
+
+    top10_district['Transaction Amount'] = format_numbers(top10_district['total_transaction_amount'])
+    bottom10_district['Transaction Amount'] = format_numbers(bottom10_district['total_transaction_amount'])
 
     col3, col4 = st.columns(2)
     with col3:
@@ -114,13 +61,15 @@ def states_n_districts_ins():
     with col4:
         st.subheader("🏚 Bottom 10 Districts")
         st.table(bottom10_district[['District', 'State', 'Transaction Amount']])
-        
+
 
 # =========================================================
-    # SECTION 2️⃣: EMERGING & DECLINING DISTRICTS
-    # =========================================================
-    st.markdown("---")
-    st.markdown("## 📈 Emerging vs Declining Districts (Transaction Count Growth)")
+# SECTION 2️⃣: EMERGING & DECLINING DISTRICTS
+# =========================================================
+@st.fragment
+@fragment_section(PAGE, "states_n_districts_ins.emerging_declining")
+def emerging_declining_section(year_list):
+    st.markdown("## 📈 Emerging vs Declining Districts (Insurance Count Growth)")
 
     selected_year = st.selectbox(
         "Select Year (Emerging & Declining)",
@@ -129,89 +78,26 @@ def states_n_districts_ins():
         key="growth_year"
     )
 
-    # Handle "All Years" case
-    year_filter = "" if selected_year == "All Years" else f"AND cur.Year = {selected_year}"
-
-    # ---------- EMERGING DISTRICTS ----------
-    emerging_query = f"""WITH lagged_data AS (
-                SELECT 
-                    District, 
-                    State, 
-                    Year, 
-                    Quarter, 
-                    Count AS current_txn,
-                    LAG(Count) OVER (
-                        PARTITION BY District, State 
-                        ORDER BY Year, Quarter
-                    ) AS previous_txn
-                FROM map_transaction_data
-            )
-            SELECT 
-                District, 
-                State, 
-                Year, 
-                Quarter,
-                current_txn,
-                previous_txn,
-                ROUND(((current_txn - previous_txn) / previous_txn) * 100, 2) AS Growth_Percentage
-            FROM lagged_data
-            WHERE 
-                previous_txn > 0
-                AND current_txn > previous_txn
-            
-            ORDER BY Growth_Percentage DESC
-            LIMIT 10;
-    
-
-    """
-
-    # ---------- DECLINING DISTRICTS ----------
-    declining_query = f"""WITH lagged_data AS (
-        SELECT 
-            District, 
-            State, 
-            Year, 
-            Quarter, 
-            Count AS current_txn,
-            LAG(Count) OVER (
-                PARTITION BY District, State 
-                ORDER BY Year, Quarter
-            ) AS previous_txn
-        FROM map_transaction_data
-    )
-    SELECT 
-        District, 
-        State, 
-        Year, 
-        Quarter,
-        current_txn,
-        previous_txn,
-        ROUND(((current_txn - previous_txn) / previous_txn) * 100, 2) AS Decline_Percentage
-    FROM lagged_data
-    WHERE 
-        previous_txn > 0
-        AND current_txn < previous_txn
-    
-    ORDER BY Decline_Percentage ASC
-    LIMIT 10;
-    """
-
-    df_emerging = fetch_data(emerging_query)
-    df_declining = fetch_data(declining_query)
+    # Quarter-over-quarter growth is precomputed in insurance_district_summary
+    growth = get_insurance_summary("district", selected_year)
+    growth = growth[growth["Prev_Transaction_count"] > 0].rename(columns={
+        'Prev_Transaction_count': 'Prev',
+        'Transaction_count': 'Curr',
+        'Quarter': 'Qtr'
+    })
+
+    df_emerging, _ = top_bottom(growth[growth["Count_Growth_Pct"] > 0], "Count_Growth_Pct", 10)
+    _, df_declining = top_bottom(growth[growth["Count_Growth_Pct"] < 0], "Count_Growth_Pct", 10)
 
     col5, col6 = st.columns(2)
     with col5:
         st.subheader(f"🚀 Emerging Districts ({selected_year})")
         if not df_emerging.empty:
-            df_emerging = df_emerging.rename(columns={
-                "Growth_Percentage": "Growth (%)",
-                'previous_txn': 'Prev',
-                'Quarter':'Qtr',
-                'current_txn': 'Curr'
-            })
+            df_emerging = df_emerging.rename(columns={"Count_Growth_Pct": "Growth (%)"})
             st.dataframe(
                 df_emerging[['District', 'State', 'Qtr', 'Prev', 'Curr', 'Growth (%)']].style
-                .format({'Growth (%)': '{:.2f}%'}).background_gradient(subset=['Growth (%)'], cmap='Greens'),
+                .format({'Growth (%)': '{:.2f}%', 'Prev': '{:.0f}', 'Curr': '{:.0f}'})
+                .background_gradient(subset=['Growth (%)'], cmap='Greens'),
                 use_container_width=True,hide_index=True
             )
         else:
@@ -220,14 +106,61 @@ def states_n_districts_ins():
     with col6:
         st.subheader(f"📉 Declining Districts ({selected_year})")
         if not df_declining.empty:
-            df_declining = df_declining.rename(columns={"Decline_Percentage": "Decline (%)",
-                'previous_txn': 'Prev',
-                'Quarter':'Qtr',
-                'current_txn': 'Curr'})
+            df_declining = df_declining.rename(columns={"Count_Growth_Pct": "Decline (%)"})
             st.dataframe(
-                df_declining[['District', 'State','Qtr','Prev','Curr','Decline (%)']].style.format({'Decline (%)': '{:.2f}%'}).background_gradient(
-                    subset=['Decline (%)'], cmap='Reds'),
+                df_declining[['District', 'State','Qtr','Prev','Curr','Decline (%)']].style
+                .format({'Decline (%)': '{:.2f}%', 'Prev': '{:.0f}', 'Curr': '{:.0f}'})
+                .background_gradient(subset=['Decline (%)'], cmap='Reds'),
                 use_container_width=True,hide_index=True
             )
         else:
             st.info("No declining districts found for the selected year.")
+
+
+def prefetch_sections(year_list):
+    """Full-page runs: load both sections' data at once (the growth rollup is read whole)."""
+    toplow_year = st.session_state.get("toplow_year")
+    if toplow_year not in year_list:
+        toplow_year = year_list[-1]
+    year_filters = {} if toplow_year == "All Years" else {"Year": int(toplow_year)}
+    with QueryBatch() as batch:
+        batch.submit("states", get_rankings, "insurance_state_summary", ("State",),
+                     ("Transaction_amount",), filters=year_filters, n=10)
+        batch.submit("districts", get_rankings, "insurance_district_summary", ("District", "State"),
+                     ("Transaction_amount",), filters=year_filters, n=10)
+        batch.submit("growth", load_insurance_summary, "district")
+        batch.wait()
+
+
+def states_n_districts_ins():
+    st.markdown(
+        "<h1 style='text-align: center; font-size: 48px;'>Insurance across States and District</h1>",
+        unsafe_allow_html=True
+    )
+
+    # =========================================================
+    # FETCH AVAILABLE YEARS + ADD "All Years"
+    # =========================================================
+    year_list = [str(y) for y in get_options("map_insurance_data", "Year")]
+    year_list.insert(0, "All Years")  # Add "All Years" option at the top
+
+    # Each section is a fragment: its year selector reruns only that section
+    prefetch_sections(year_list)
+    top_lowest_section(year_list)
+    st.markdown("---")
+    emerging_declining_section(year_list)
+
+
+# ==========================================
+# CACHE WARM-UP (utils/warmup.py)
+# ==========================================
+def warm_states_n_districts_ins():
+    """Rankings and district growth for the default (latest) year."""
+    years = get_options("map_insurance_data", "Year")
+    default_year = str(years[-1]) if years else "All Years"
+    year_filters = {} if default_year == "All Years" else {"Year": int(default_year)}
+
+    get_rankings("insurance_state_summary", ("State",), ("Transaction_amount",), filters=year_filters, n=10)
+    get_rankings("insurance_district_summary", ("District", "State"), ("Transaction_amount",), filters=year_filters, n=10)
+    get_insurance_summary("district", default_year)
+    return ["state_rankings", "district_rankings", "district_growth"]
@@ -1,82 +1,62 @@
-from sql_connection import get_sql_connection
-from utils import helper_func
+from utils.formatters import format_numbers
+from utils.catalog import get_options
+from utils.ranking import get_rankings, top_bottom
+from utils.query_batch import QueryBatch
+from utils.query_builder import derived, run_select
+from utils.perf import fragment_section
 import streamlit as st
-import pandas as pd
 
-# ==========================================
-# CACHE CONNECTION
-# ==========================================
-@st.cache_resource
-def get_connection():
-    conn = get_sql_connection()
-    cur = conn.cursor()
-    cur.execute("USE phonepe;")
-    return conn
-
-connection = get_connection()
+# the MainPage entry whose fragments these are (telemetry attributes their queries to it)
+PAGE = 'Transactions across States and Districts'
 
 # ==========================================
-# CACHE QUERY EXECUTION
+# DISTRICT GROWTH
 # ==========================================
-@st.cache_data(ttl=200)
-def fetch_data(query: str) -> pd.DataFrame:
-    return pd.read_sql(query, connection)
+# Quarter-over-quarter count growth of every district. The window runs over
+# the whole table; the year filter is applied to its output as a bound
+# parameter.
+DISTRICT_GROWTH = derived("""
+    SELECT
+        District, State, Year, Quarter,
+        current_txn, previous_txn,
+        ROUND(((current_txn - previous_txn) / previous_txn) * 100, 2) AS Growth_Percentage
+    FROM (
+        SELECT 
+            District, 
+            State, 
+            Year, 
+            Quarter, 
+            Count AS current_txn,
+            LAG(Count) OVER (
+                PARTITION BY District, State ORDER BY Year, Quarter
+            ) AS previous_txn
+        FROM map_transaction_data
+    ) AS lagged_data
+    WHERE previous_txn IS NOT NULL
+      AND previous_txn > 0
+      AND current_txn <> previous_txn
+""", "district_growth", tables=("map_transaction_data",))
+
+
+def load_district_growth(selected_year):
+    """One scan for both ends: emerging and declining are picked from this frame."""
+    year = None if selected_year == "All Years" else int(selected_year)
+    growth = run_select(
+        DISTRICT_GROWTH,
+        columns=("District", "State", "Year", "Quarter", "current_txn", "previous_txn", "Growth_Percentage"),
+        filters={"Year": year},
+    )
+    growth["Growth_Percentage"] = growth["Growth_Percentage"].astype(float)
+    return growth
 
 # ==========================================
-# MAIN FUNCTION
+# SECTION RENDERERS
 # ==========================================
-def states_n_districts():
-    st.markdown(
-        "<h1 style='text-align:center; font-size:48px;'>📍 States and Districts Level Analysis</h1>",
-        unsafe_allow_html=True
-    )
-
-    # =========================================================
-    # FETCH AVAILABLE YEARS + ADD "All Years"
-    # =========================================================
-    df_years = fetch_data("SELECT DISTINCT Year FROM aggregated_transaction_data ORDER BY Year ASC;")
-    year_list = df_years["Year"].astype(str).tolist()
-    year_list.insert(0, "All Years")
-
-    # =========================================================
-    # SECTION 1️⃣: TOP & LOWEST STATES / DISTRICTS
-    # =========================================================
-    st.markdown("## 📊 Top & Lowest Performing States/Districts")
-
-    selected_year_toplow = st.selectbox(
-        "Select Year (Top & Lowest)",
-        options=year_list,
-        index=1 if len(year_list) > 1 else 0,  # Default to latest numeric year
-        key="toplow_year"
-    )
+def render_states(rankings):
+    top10, bottom10 = (df.rename(columns={"Transaction_amount": "total_transaction_amount"}) for df in rankings)
 
-    # Handle "All Years"
-    where_clause = "" if selected_year_toplow == "All Years" else f"WHERE Year = {selected_year_toplow}"
-
-    # ---------- Top & Bottom States ----------
-    top10_query = f"""
-        SELECT State, SUM(Transaction_amount) AS total_transaction_amount
-        FROM aggregated_transaction_data
-        {where_clause}
-        GROUP BY State
-        ORDER BY total_transaction_amount DESC
-        LIMIT 10;
-    """
-
-    bottom10_query = f"""
-        SELECT State, SUM(Transaction_amount) AS total_transaction_amount
-        FROM aggregated_transaction_data
-        {where_clause}
-        GROUP BY State
-        ORDER BY total_transaction_amount ASC
-        LIMIT 10;
-    """
-
-    top10 = fetch_data(top10_query)
-    bottom10 = fetch_data(bottom10_query)
-
-    top10["Transaction Amount"] = top10["total_transaction_amount"].apply(helper_func.format_number)
-    bottom10["Transaction Amount"] = bottom10["total_transaction_amount"].apply(helper_func.format_number)
+    top10["Transaction Amount"] = format_numbers(top10["total_transaction_amount"])
+    bottom10["Transaction Amount"] = format_numbers(bottom10["total_transaction_amount"])
 
     col1, col2 = st.columns(2)
     with col1:
@@ -86,30 +66,12 @@ def states_n_districts():
         st.subheader("⬇️ Bottom 10 States")
         st.dataframe(bottom10[["State", "Transaction Amount"]], use_container_width=True)
 
-    # ---------- Top & Bottom Districts ----------
-    top10_district_query = f"""
-        SELECT District, State, SUM(Amount) AS total_transaction_amount
-        FROM map_transaction_data
-        {where_clause}
-        GROUP BY District, State
-        ORDER BY total_transaction_amount DESC
-        LIMIT 10;
-    """
-
-    bottom10_district_query = f"""
-        SELECT District, State, SUM(Amount) AS total_transaction_amount
-        FROM map_transaction_data
-        {where_clause}
-        GROUP BY District, State
-        ORDER BY total_transaction_amount ASC
-        LIMIT 10;
-    """
 
-    top10_district = fetch_data(top10_district_query)
-    bottom10_district = fetch_data(bottom10_district_query)
+def render_districts(rankings):
+    top10_district, bottom10_district = (df.rename(columns={"Amount": "total_transaction_amount"}) for df in rankings)
 
-    top10_district["Transaction Amount"] = top10_district["total_transaction_amount"].apply(helper_func.format_number)
-    bottom10_district["Transaction Amount"] = bottom10_district["total_transaction_amount"].apply(helper_func.format_number)
+    top10_district["Transaction Amount"] = format_numbers(top10_district["total_transaction_amount"])
+    bottom10_district["Transaction Amount"] = format_numbers(bottom10_district["total_transaction_amount"])
 
     col3, col4 = st.columns(2)
     with col3:
@@ -119,78 +81,11 @@ def states_n_districts():
         st.subheader("🏚 Bottom 10 Districts")
         st.dataframe(bottom10_district[["District", "State", "Transaction Amount"]], use_container_width=True)
 
-    # =========================================================
-    # SECTION 2️⃣: EMERGING & DECLINING DISTRICTS
-    # =========================================================
-    st.markdown("---")
-    st.markdown("## 📈 Emerging vs Declining Districts (Transaction Count Growth)")
-
-    selected_year = st.selectbox(
-        "Select Year (Emerging & Declining)",
-        options=year_list,
-        index=1 if len(year_list) > 1 else 0,
-        key="growth_year"
-    )
 
-    # Handle "All Years"
-    year_filter = "" if selected_year == "All Years" else f"AND Year = {selected_year}"
-
-    # ---------- EMERGING DISTRICTS ----------
-    emerging_query = f"""
-        WITH lagged_data AS (
-            SELECT 
-                District, 
-                State, 
-                Year, 
-                Quarter, 
-                Count AS current_txn,
-                LAG(Count) OVER (
-                    PARTITION BY District, State ORDER BY Year, Quarter
-                ) AS previous_txn
-            FROM map_transaction_data
-        )
-        SELECT 
-            District, State, Year, Quarter,
-            current_txn, previous_txn,
-            ROUND(((current_txn - previous_txn) / previous_txn) * 100, 2) AS Growth_Percentage
-        FROM lagged_data
-        WHERE previous_txn IS NOT NULL
-          AND previous_txn > 0
-          AND current_txn > previous_txn
-          {year_filter}
-        ORDER BY Growth_Percentage DESC
-        LIMIT 10;
-    """
-
-    # ---------- DECLINING DISTRICTS ----------
-    declining_query = f"""
-        WITH lagged_data AS (
-            SELECT 
-                District, 
-                State, 
-                Year, 
-                Quarter, 
-                Count AS current_txn,
-                LAG(Count) OVER (
-                    PARTITION BY District, State ORDER BY Year, Quarter
-                ) AS previous_txn
-            FROM map_transaction_data
-        )
-        SELECT 
-            District, State, Year, Quarter,
-            current_txn, previous_txn,
-            ROUND(((current_txn - previous_txn) / previous_txn) * 100, 2) AS Decline_Percentage
-        FROM lagged_data
-        WHERE previous_txn IS NOT NULL
-          AND previous_txn > 0
-          AND current_txn < previous_txn
-          {year_filter}
-        ORDER BY Decline_Percentage ASC
-        LIMIT 10;
-    """
-
-    df_emerging = fetch_data(emerging_query)
-    df_declining = fetch_data(declining_query)
+def render_growth(growth, selected_year):
+    df_emerging, _ = top_bottom(growth[growth["Growth_Percentage"] > 0], "Growth_Percentage", 10)
+    _, df_declining = top_bottom(growth[growth["Growth_Percentage"] < 0], "Growth_Percentage", 10)
+    df_declining = df_declining.rename(columns={"Growth_Percentage": "Decline_Percentage"})
 
     col5, col6 = st.columns(2)
     with col5:
@@ -223,3 +118,112 @@ def states_n_districts():
                 use_container_width=True,hide_index=True)
         else:
             st.info("No declining districts found for the selected year.")
+
+
+# ==========================================
+# SECTION 1️⃣: TOP & LOWEST STATES / DISTRICTS
+# ==========================================
+@st.fragment
+@fragment_section(PAGE, "states_n_districts.top_lowest")
+def top_lowest_section(year_list):
+    st.markdown("## 📊 Top & Lowest Performing States/Districts")
+
+    selected_year_toplow = st.selectbox(
+        "Select Year (Top & Lowest)",
+        options=year_list,
+        index=1 if len(year_list) > 1 else 0,  # Default to latest numeric year
+        key="toplow_year"
+    )
+
+    year_filters = {} if selected_year_toplow == "All Years" else {"Year": int(selected_year_toplow)}
+
+    states_area = st.container()
+    districts_area = st.container()
+
+    # Both rankings run concurrently; each table renders as soon as it lands
+    renderers = {
+        "states": (states_area, render_states),
+        "districts": (districts_area, render_districts),
+    }
+    with QueryBatch() as batch:
+        batch.submit("states", get_rankings, "aggregated_transaction_data", ("State",),
+                     ("Transaction_amount",), filters=year_filters, n=10)
+        batch.submit("districts", get_rankings, "map_transaction_data", ("District", "State"),
+                     ("Amount",), filters=year_filters, n=10)
+
+        for name, result in batch.as_completed():
+            area, render = renderers[name]
+            with area:
+                render(result)
+
+
+# ==========================================
+# SECTION 2️⃣: EMERGING & DECLINING DISTRICTS
+# ==========================================
+@st.fragment
+@fragment_section(PAGE, "states_n_districts.emerging_declining")
+def emerging_declining_section(year_list):
+    st.markdown("## 📈 Emerging vs Declining Districts (Transaction Count Growth)")
+
+    selected_year = st.selectbox(
+        "Select Year (Emerging & Declining)",
+        options=year_list,
+        index=1 if len(year_list) > 1 else 0,
+        key="growth_year"
+    )
+
+    render_growth(load_district_growth(selected_year), selected_year)
+
+
+def prefetch_sections(year_list):
+    """Full-page runs: load both sections' data at once, for their current years."""
+    default = year_list[1] if len(year_list) > 1 else year_list[0]
+    toplow_year, growth_year = (
+        st.session_state.get(key) if st.session_state.get(key) in year_list else default
+        for key in ("toplow_year", "growth_year")
+    )
+    year_filters = {} if toplow_year == "All Years" else {"Year": int(toplow_year)}
+    with QueryBatch() as batch:
+        batch.submit("states", get_rankings, "aggregated_transaction_data", ("State",),
+                     ("Transaction_amount",), filters=year_filters, n=10)
+        batch.submit("districts", get_rankings, "map_transaction_data", ("District", "State"),
+                     ("Amount",), filters=year_filters, n=10)
+        batch.submit("growth", load_district_growth, growth_year)
+        batch.wait()
+
+
+# ==========================================
+# MAIN FUNCTION
+# ==========================================
+def states_n_districts():
+    st.markdown(
+        "<h1 style='text-align:center; font-size:48px;'>📍 States and Districts Level Analysis</h1>",
+        unsafe_allow_html=True
+    )
+
+    # =========================================================
+    # FETCH AVAILABLE YEARS + ADD "All Years"
+    # =========================================================
+    year_list = [str(y) for y in get_options("aggregated_transaction_data", "Year")]
+    year_list.insert(0, "All Years")
+
+    # Each section is a fragment: its year selector reruns only that section
+    prefetch_sections(year_list)
+    top_lowest_section(year_list)
+    st.markdown("---")
+    emerging_declining_section(year_list)
+
+
+# ==========================================
+# CACHE WARM-UP (utils/warmup.py)
+# ==========================================
+def warm_states_n_districts():
+    """Rankings and district growth for the default year of both selectors."""
+    years = get_options("aggregated_transaction_data", "Year")
+    default_year = str(years[0]) if years else "All Years"    # index=1 of year_list
+    year_filters = {} if default_year == "All Years" else {"Year": int(default_year)}
+
+    get_rankings("aggregated_transaction_data", ("State",), ("Transaction_amount",), filters=year_filters, n=10)
+    get_rankings("map_transaction_data", ("District", "State"), ("Amount",), filters=year_filters, n=10)
+    load_district_growth(default_year)
+    return ["state_rankings", "district_rankings", "district_growth"]
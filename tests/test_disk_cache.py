@@ -0,0 +1,51 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from utils.disk_cache import DiskCache  # noqa: E402
+
+KEY = ("SELECT State, SUM(Amount) AS Amount FROM t WHERE Year = %s GROUP BY State", (2020,))
+
+
+def test_round_trip(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    df = pd.DataFrame({"State": ["a", "b"], "Amount": [1.5, 2.0]})
+    cache.put(KEY, 1, df)
+    pd.testing.assert_frame_equal(cache.get(KEY, 1), df)
+    assert cache.hits == 1
+
+
+def test_key_changes_with_the_version(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.put(KEY, 1, pd.DataFrame({"v": [1]}))
+    assert cache.get(KEY, 2) is None
+    assert cache._path(KEY, 1) != cache._path(KEY, 2)
+    assert cache._path(KEY, 1) != cache._path((KEY[0], (2021,)), 1)
+
+
+def test_non_dataframes_are_not_written(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.put(KEY, 1, {"not": "a frame"})
+    assert os.listdir(tmp_path) == []
+
+
+def test_unreadable_file_is_dropped(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    with open(cache._path(KEY, 1), "w") as f:
+        f.write("not parquet")
+    assert cache.get(KEY, 1) is None
+    assert not os.path.exists(cache._path(KEY, 1))
+
+
+def test_directory_is_bounded(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    df = pd.DataFrame({"v": range(1000)})
+    cache.put(("q", 1), 1, df)
+    cache.max_bytes = os.path.getsize(cache._path(("q", 1), 1)) * 2
+    for i in range(2, 6):
+        cache.put(("q", i), 1, df)
+    assert cache.size_bytes() <= cache.max_bytes
+    assert cache.get(("q", 5), 1) is not None
@@ -0,0 +1,34 @@
+import json
+
+import plotly.express as px
+import plotly.io as pio
+
+from utils.figure_cache import FigureCache
+
+
+def build():
+    fig = px.bar(x=["a", "b"], y=[1.5, 2.5], text=["1.50", "2.50"])
+    fig.update_traces(textposition="outside")
+    return fig
+
+
+def test_hit_returns_the_same_figure_without_rebuilding():
+    cache, calls = FigureCache(), []
+
+    def counted():
+        calls.append(1)
+        return build()
+
+    first = cache.get_or_build(("page", "section"), counted)
+    second = cache.get_or_build(("page", "section"), counted)
+
+    assert len(calls) == 1
+    assert json.loads(pio.to_json(second)) == json.loads(pio.to_json(first))
+    assert cache.stats()["hits"] == 1
+
+
+def test_hits_are_independent_figures():
+    cache = FigureCache()
+    cache.get_or_build("key", build)
+    cache.get_or_build("key", build).update_layout(title_text="changed")
+    assert cache.get_or_build("key", build).layout.title.text is None
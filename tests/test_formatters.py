@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from utils.formatters import format_numbers, nice_ticks
+
+
+def test_unit_thresholds():
+    labels = format_numbers([999, 1000, 1500, 1_000_000, 1e9, 2.5e12])
+    assert labels.tolist() == ["999.00", "1.00K", "1.50K", "1.00M", "1.00B", "2500.00B"]
+
+
+def test_zero_negative_and_missing():
+    labels = format_numbers([0, -0.5, -1234, -2e6, np.nan])
+    assert labels.tolist() == ["0.00", "-0.50", "-1.23K", "-2.00M", ""]
+
+
+def test_unit_is_chosen_after_rounding():
+    labels = format_numbers([999.999, 999_995, 999_999_999, -999.996])
+    assert labels.tolist() == ["1.00K", "1.00M", "1.00B", "-1.00K"]
+    assert format_numbers([999.6], decimals=1, small_decimals=0).tolist() == ["1.0K"]
+
+
+def test_values_rounding_to_zero_have_no_sign():
+    assert format_numbers([-0.004, -0.006, -0.0]).tolist() == ["0.00", "-0.01", "0.00"]
+    assert format_numbers([-0.4], small_decimals=0).tolist() == ["0"]
+
+
+def test_decimals_and_small_decimals():
+    assert format_numbers([5, 1500], decimals=1, small_decimals=0).tolist() == ["5", "1.5K"]
+    assert format_numbers([1234.5], decimals=0).tolist() == ["1K"]
+
+
+def test_shape_and_index_are_preserved():
+    series = pd.Series([1e3, 2e6], index=["a", "b"], name="x")
+    labels = format_numbers(series)
+    assert labels.index.tolist() == ["a", "b"] and labels.name == "x"
+    frame = format_numbers(pd.DataFrame({"a": [1e3], "b": [5]}))
+    assert frame.to_dict("list") == {"a": ["1.00K"], "b": ["5.00"]}
+
+
+def test_nice_ticks_cover_the_maximum_on_round_steps():
+    values, labels = nice_ticks(7.3e10)
+    assert values[0] == 0 and values[-1] >= 7.3e10
+    assert np.allclose(np.diff(values), 2e10)
+    assert labels == ["0", "20.0B", "40.0B", "60.0B", "80.0B"]
+    assert nice_ticks(100) == ([0.0, 20.0, 40.0, 60.0, 80.0, 100.0], ["0", "20", "40", "60", "80", "100"])
+
+
+def test_nice_ticks_without_a_positive_maximum():
+    for value in (0, -5, float("nan"), None):
+        assert nice_ticks(value) == ([0], ["0"])
@@ -0,0 +1,29 @@
+import pandas as pd
+
+import Heatmap
+
+GEOJSON = {
+    "type": "FeatureCollection",
+    "features": [
+        {"type": "Feature", "properties": {"ST_NM": state},
+         "geometry": {"type": "Polygon", "coordinates": [[[x, 0], [x + 1, 0], [x + 1, 1], [x, 0]]]}}
+        for x, state in enumerate(["Assam", "Bihar", "Goa"])
+    ],
+}
+
+
+def test_animated_map_sends_the_geometry_once(monkeypatch):
+    periods = [(year, quarter) for year in (2021, 2022) for quarter in (1, 2, 3, 4)]
+    df = pd.DataFrame(
+        [(state, year, quarter, float(i + 1)) for i, (year, quarter) in enumerate(periods)
+         for state in ("Assam", "Bihar", "Goa")],
+        columns=["State", "Year", "Quarter", "Total_Amount"],
+    )
+    monkeypatch.setattr(Heatmap, "load_india_geojson", lambda: GEOJSON)
+    monkeypatch.setattr(Heatmap, "load_state_period", lambda: df)
+
+    fig = Heatmap.build_animated_map("Quarter", 0)
+
+    assert len(fig.frames) == len(periods)
+    assert fig.to_json().count('"FeatureCollection"') == 1
+    assert fig.data[0].geojson is not None
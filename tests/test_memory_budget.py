@@ -0,0 +1,67 @@
+import pandas as pd
+
+from utils.memory_budget import MemoryBudget, SizedLRU, sizeof
+
+
+def frame(rows):
+    return pd.DataFrame({"v": range(rows)})
+
+
+def test_sizeof_counts_dataframes_inside_containers():
+    df = frame(1000)
+    assert sizeof(df) >= 8000
+    assert sizeof((df, df)) >= 2 * sizeof(df)
+    assert sizeof({"a": df}) >= sizeof(df)
+
+
+def test_entries_over_the_byte_budget_are_evicted_oldest_first():
+    size = sizeof(frame(1000))
+    budget = MemoryBudget(max_bytes=int(size * 2.5))
+    lru = SizedLRU("test", budget=budget)
+    for key in "abc":
+        lru.put(key, frame(1000))
+
+    assert lru.get("a") is None
+    assert lru.get("b") is not None and lru.get("c") is not None
+    assert lru.bytes <= budget.max_bytes
+    assert lru.stats()["evictions"] == 1
+
+
+def test_a_read_protects_an_entry_from_eviction():
+    size = sizeof(frame(1000))
+    lru = SizedLRU("test", budget=MemoryBudget(max_bytes=int(size * 2.5)))
+    lru.put("a", frame(1000))
+    lru.put("b", frame(1000))
+    lru.get("a")
+    lru.put("c", frame(1000))
+
+    assert lru.get("b") is None
+    assert lru.get("a") is not None
+
+
+def test_budget_is_shared_across_caches():
+    size = sizeof(frame(1000))
+    budget = MemoryBudget(max_bytes=int(size * 2.5))
+    first, second = SizedLRU("first", budget=budget), SizedLRU("second", budget=budget)
+    first.put("old", frame(1000))
+    second.put("a", frame(1000))
+    second.put("b", frame(1000))
+
+    # the globally least recently used entry goes, even from another cache
+    assert first.get("old") is None
+    assert budget.used_bytes() <= budget.max_bytes
+
+
+def test_max_entries_bounds_the_entry_count():
+    lru = SizedLRU("test", max_entries=2, budget=MemoryBudget(max_bytes=1 << 30))
+    for key in range(5):
+        lru.put(key, key)
+    assert len(lru) == 2
+    assert lru.get(4) == 4
+
+
+def test_replacing_a_key_does_not_double_count():
+    lru = SizedLRU("test", budget=MemoryBudget(max_bytes=1 << 30))
+    lru.put("a", frame(1000))
+    lru.put("a", frame(1000))
+    assert lru.bytes == sizeof(frame(1000))
@@ -0,0 +1,36 @@
+import pandas as pd
+
+from utils.name_index import canonical_district, canonical_state, canonicalize_column
+
+
+def test_pulse_slugs_map_to_geojson_names():
+    assert canonical_state("andaman-&-nicobar-islands") == "Andaman & Nicobar"
+    assert canonical_state("dadra-&-nagar-haveli-&-daman-&-diu") == "Dadra and Nagar Haveli and Daman and Diu"
+    assert canonical_state("jammu-&-kashmir") == "Jammu & Kashmir"
+    assert canonical_state("uttar-pradesh") == "Uttar Pradesh"
+
+
+def test_state_spellings_are_folded():
+    assert canonical_state("  TAMIL   NADU ") == "Tamil Nadu"
+    assert canonical_state("Jammu and Kashmir") == "Jammu & Kashmir"
+    assert canonical_state("Orissa") == "Odisha"
+    assert canonical_state("NCT of Delhi") == "Delhi"
+
+
+def test_unknown_state_is_title_cased():
+    assert canonical_state("new-state") == "New State"
+    assert canonical_state(None) is None
+
+
+def test_district_suffix_and_case():
+    assert canonical_district("north goa district") == "North Goa"
+    assert canonical_district("  Bengaluru   Urban  DISTRICT") == "Bengaluru Urban"
+    assert canonical_district("PUNE") == "Pune"
+    assert canonical_district(None) is None
+
+
+def test_canonicalize_column_keeps_missing_values():
+    series = pd.Series(["orissa", None, "orissa", "goa"])
+    result = canonicalize_column(series, canonical_state)
+    assert result.isna().tolist() == [False, True, False, False]
+    assert result.dropna().tolist() == ["Odisha", "Odisha", "Goa"]
@@ -0,0 +1,35 @@
+from utils.prefetch import neighbour_selections
+
+OPTIONS = {"Year": [2021, 2022, 2023], "Quarter": [1, 2, 3, 4], "State": ["Assam", "Bihar", "Goa"]}
+
+
+def test_next_quarter_then_years_then_state():
+    selection = {"State": "Assam", "Year": 2022, "Quarter": 2}
+    assert neighbour_selections(selection, OPTIONS) == [
+        {"State": "Assam", "Year": 2022, "Quarter": 3},
+        {"State": "Assam", "Year": 2023, "Quarter": 2},
+        {"State": "Assam", "Year": 2021, "Quarter": 2},
+        {"State": "Bihar", "Year": 2022, "Quarter": 2},
+    ]
+
+
+def test_last_quarter_rolls_over_into_next_year():
+    selection = {"Year": 2022, "Quarter": 4}
+    assert neighbour_selections(selection, OPTIONS)[0] == {"Year": 2023, "Quarter": 1}
+
+
+def test_edges_are_not_stepped_past():
+    selection = {"State": "Goa", "Year": 2023, "Quarter": 4}
+    assert neighbour_selections(selection, OPTIONS) == [{"State": "Goa", "Year": 2022, "Quarter": 4}]
+
+
+def test_all_and_missing_dimensions_are_not_stepped():
+    selection = {"State": "All", "Year": 2021}
+    assert neighbour_selections(selection, OPTIONS) == [{"State": "All", "Year": 2022}]
+
+
+def test_no_duplicates_or_self():
+    selection = {"Year": 2021, "Quarter": 4}
+    options = {"Year": [2021, 2022], "Quarter": [4]}
+    result = neighbour_selections(selection, options)
+    assert result == [{"Year": 2022, "Quarter": 4}]
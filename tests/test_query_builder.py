@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from utils.query_builder import AtLeast, Between, build_select, derived, normalize_filters
+
+
+def test_all_selections_are_dropped():
+    assert normalize_filters({"State": "All", "Year": "All Years", "Quarter": None}) == ()
+    assert normalize_filters(None) == ()
+
+
+def test_filters_are_canonical():
+    first = normalize_filters({"Year": np.int64(2020), "Quarter": [3, 1, 3], "State": "x"})
+    second = normalize_filters({"State": "x", "Quarter": (1, 3), "Year": 2020})
+    assert first == second == (("Quarter", (1, 3)), ("State", "x"), ("Year", 2020))
+    assert type(first[2][1]) is int
+
+
+def test_range_predicates_are_normalized():
+    filters = normalize_filters({"Year": Between(np.int64(2019), np.int64(2021)), "Growth": AtLeast(np.float64(-5))})
+    assert filters == (("Growth", AtLeast(-5.0)), ("Year", Between(2019, 2021)))
+
+
+def test_invalid_identifiers_are_rejected():
+    with pytest.raises(ValueError):
+        normalize_filters({"State; DROP TABLE x": "a"})
+    with pytest.raises(ValueError):
+        build_select("t; --", columns=("State",))
+
+
+def test_build_select_uses_placeholders():
+    sql, params = build_select(
+        "map_transaction_data", columns=("District",), sums=("Amount",),
+        filters={"State": "o'hara", "Year": Between(2019, 2020), "Quarter": [2, 1], "Amount": AtLeast(10)},
+        group_by=("District",), order_by=("-Amount",), limit=10,
+    )
+    assert sql == (
+        "SELECT District, SUM(Amount) AS Amount FROM map_transaction_data "
+        "WHERE Amount >= %s AND Quarter IN (%s, %s) AND State = %s AND Year BETWEEN %s AND %s "
+        "GROUP BY District ORDER BY Amount DESC LIMIT 10"
+    )
+    assert params == (10, 1, 2, "o'hara", 2019, 2020)
+    assert "o'hara" not in sql
+
+
+def test_empty_multiselect_matches_nothing():
+    sql, params = build_select("t", columns=("State",), filters={"Quarter": []})
+    assert sql == "SELECT State FROM t WHERE 1 = 0"
+    assert params == ()
+
+
+def test_same_selection_same_key():
+    one = build_select("t", columns=("State",), filters={"Year": 2020, "State": "All"})
+    other = build_select("t", columns=("State",), filters={"Year": np.int64(2020)})
+    assert one == other
+
+
+def test_derived_source():
+    source = derived("SELECT State, Year FROM t;", "d", ["t"])
+    sql, _ = build_select(source, columns=("State",), filters={"Year": 2020})
+    assert sql == "SELECT State FROM (SELECT State, Year FROM t) AS d WHERE Year = %s"
+    assert source.tables == ("t",)
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import utils.query_cache as query_cache
+from utils.query_cache import QueryCache
+from utils.telemetry import TELEMETRY
+
+KEY = ("SELECT * FROM t", ())
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(query_cache, "DISK_CACHE", None)
+    return QueryCache(name="test")
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_miss_computes_and_hit_reuses(cache):
+    calls = []
+    compute = lambda: calls.append(1) or pd.DataFrame({"v": [1]})  # noqa: E731
+    first = cache.get(KEY, 1, compute)
+    second = cache.get(KEY, 1, compute)
+    assert len(calls) == 1
+    assert second is first
+
+
+def test_hit_events_reuse_the_stored_size(cache, monkeypatch):
+    cache.get(KEY, 1, lambda: pd.DataFrame({"v": ["a", "b"]}))
+    TELEMETRY.clear()
+    monkeypatch.setattr(pd.DataFrame, "memory_usage", lambda *a, **k: pytest.fail("measured on a hit"))
+    cache.get(KEY, 1, lambda: None)
+    (event,) = TELEMETRY.events()
+    assert event.outcome == "hit"
+    assert event.rows == 2
+    assert event.bytes == cache._entries.size(KEY) > 0
+
+
+def test_stale_entry_is_served_while_it_refreshes(cache):
+    cache.get(KEY, 1, lambda: "old")
+    release = threading.Event()
+
+    def slow_refresh():
+        release.wait(5)
+        return "new"
+
+    # new data version: the old value comes back at once, refresh runs behind
+    start = time.perf_counter()
+    assert cache.get(KEY, 2, slow_refresh) == "old"
+    assert time.perf_counter() - start < 1
+    # a second reader during the refresh is served stale too, without a second refresh
+    assert cache.get(KEY, 2, slow_refresh) == "old"
+
+    release.set()
+    wait_for(lambda: cache.refreshes == 1)
+    assert cache.get(KEY, 2, slow_refresh) == "new"
+    assert cache.stats()["stale_hits"] == 2
+
+
+def test_failed_refresh_keeps_the_last_good_value(cache):
+    cache.get(KEY, 1, lambda: "old")
+
+    def failing():
+        raise RuntimeError("database down")
+
+    assert cache.get(KEY, 2, failing) == "old"
+    wait_for(lambda: KEY not in cache._refreshing)
+    assert cache.get(KEY, 2, lambda: "new") == "old"
+    wait_for(lambda: cache.refreshes == 1)
+    assert cache.get(KEY, 2, lambda: "unused") == "new"
+
+
+def test_max_age_expires_an_entry(cache):
+    cache.get(KEY, 1, lambda: "old")
+    assert cache.get(KEY, 1, lambda: "new", max_age=0) == "old"
+    wait_for(lambda: cache.refreshes == 1)
+    assert cache.get(KEY, 1, lambda: "unused") == "new"
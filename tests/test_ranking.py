@@ -0,0 +1,41 @@
+import pandas as pd
+
+from utils.ranking import top_bottom
+
+
+def test_top_and_bottom_n():
+    df = pd.DataFrame({"State": list("abcdef"), "Amount": [5.0, 1.0, 4.0, 2.0, 6.0, 3.0]})
+    top, bottom = top_bottom(df, "Amount", 2)
+    assert top["State"].tolist() == ["e", "a"]
+    assert bottom["State"].tolist() == ["b", "d"]
+    assert top.index.tolist() == [0, 1]
+
+
+def test_ties_keep_every_row_once():
+    df = pd.DataFrame({"State": list("abcd"), "Amount": [1.0, 1.0, 1.0, 2.0]})
+    top, bottom = top_bottom(df, "Amount", 2)
+    assert top["State"].iloc[0] == "d"
+    assert top["Amount"].tolist() == [2.0, 1.0]
+    assert bottom["Amount"].tolist() == [1.0, 1.0]
+    assert bottom["State"].is_unique
+
+
+def test_n_larger_than_rows_returns_all_rows_sorted():
+    df = pd.DataFrame({"State": list("abc"), "Amount": [2.0, 3.0, 1.0]})
+    top, bottom = top_bottom(df, "Amount", 10)
+    assert top["State"].tolist() == ["b", "a", "c"]
+    assert bottom["State"].tolist() == ["c", "a", "b"]
+
+
+def test_missing_values_are_not_ranked():
+    df = pd.DataFrame({"State": list("abc"), "Amount": [None, 3.0, 1.0]})
+    top, bottom = top_bottom(df, "Amount", 5)
+    assert top["State"].tolist() == ["b", "c"]
+    assert bottom["State"].tolist() == ["c", "b"]
+
+
+def test_empty_frame():
+    df = pd.DataFrame({"State": pd.Series(dtype=str), "Amount": pd.Series(dtype=float)})
+    top, bottom = top_bottom(df, "Amount", 10)
+    assert top.empty and bottom.empty
+    assert list(top.columns) == ["State", "Amount"]
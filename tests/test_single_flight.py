@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("key", slow)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(4)]
+    for t in followers:
+        t.start()
+    # followers are blocked on the leader's future once they are counted
+    wait_for(lambda: flight.stats()["coalesced"] == 4)
+    release.set()
+    for t in [leader] + followers:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results) == [("result", False)] + [("result", True)] * 4
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_exception_reaches_every_caller():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("key", failing)
+        except ValueError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    wait_for(lambda: flight.stats()["coalesced"] == 1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert errors == ["boom", "boom"]
+    # the failed key is not left in flight: the next call runs again
+    assert flight.do("key", lambda: 1) == (1, False)
+
+
+def test_distinct_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    assert flight.stats()["executions"] == 2
+
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+    flight.do("key", lambda: 1)
+    with pytest.raises(KeyError):
+        flight.do("key", lambda: {}["missing"])
+    assert flight.stats()["coalesced"] == 0
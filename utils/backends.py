@@ -0,0 +1,121 @@
+# backends.py — Storage backends behind read_sql
+#
+# Every backend takes the pages' SQL as is (mysql-connector %s placeholders,
+# GROUP BY, LAG windows, LIMIT) and returns a DataFrame:
+#
+# - MySQLBackend:   the pooled MySQL connection (default)
+# - DuckDBBackend:  DuckDB over the Parquet files of the ETL snapshot, with
+#                   vectorized scans and no database server
+# - ArrowBackend:   DuckDB over the memory-mapped Arrow files of the same
+#                   snapshot, shared zero-copy between processes
+#
+# PHONEPE_DATA_SOURCE picks one (see utils/db.py). The DuckDB backends
+# re-open the snapshot whenever the ETL moves its CURRENT pointer.
+
+import os
+import threading
+
+import pandas as pd
+
+from utils.snapshot import SNAPSHOT_DIR, current_run
+
+try:
+    import duckdb
+    import pyarrow as pa
+    HAS_DUCKDB = True
+except ImportError:
+    HAS_DUCKDB = False
+
+
+class MySQLBackend:
+    name = "mysql"
+
+    def __init__(self, connect):
+        # connect: context manager yielding a pooled connection
+        self._connect = connect
+
+    def execute(self, query, params=None, prepared=False):
+        with self._connect() as conn:
+            if not prepared:
+                return pd.read_sql(query, conn, params=params)
+            cursor = conn.cursor(prepared=True)
+            try:
+                cursor.execute(query, tuple(params or ()))
+                return pd.DataFrame(cursor.fetchall(), columns=cursor.column_names)
+            finally:
+                cursor.close()
+
+
+class DuckDBBackend:
+    """DuckDB over the Parquet files of the current snapshot run."""
+
+    name = "duckdb"
+    suffix = ".parquet"
+
+    def __init__(self, directory=SNAPSHOT_DIR):
+        if not HAS_DUCKDB:
+            raise ImportError(f"the {self.name} backend needs duckdb and pyarrow")
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._run = None
+        self._tables = {}
+        self._local = threading.local()
+
+    def _load(self, path):
+        # a view: every query scans the file, reading only the columns it needs
+        return f"SELECT * FROM read_parquet('{path}')"
+
+    def _reload(self):
+        """Open the tables of the current run (only when CURRENT has moved)."""
+        run = current_run(self.directory)
+        with self._lock:
+            if run == self._run:
+                return
+            run_dir = os.path.join(self.directory, run)
+            self._tables = {
+                name[:-len(self.suffix)]: self._load(os.path.join(run_dir, name))
+                for name in os.listdir(run_dir) if name.endswith(self.suffix)
+            }
+            self._run = run
+
+    def _connection(self):
+        """This thread's DuckDB connection, with the current run's tables defined."""
+        local = self._local
+        with self._lock:
+            run, tables = self._run, dict(self._tables)
+        if getattr(local, "run", None) != run:
+            if getattr(local, "con", None) is not None:
+                local.con.close()
+            local.con = duckdb.connect()
+            for name, table in tables.items():
+                if isinstance(table, str):
+                    local.con.execute(f'CREATE VIEW "{name}" AS {table}')
+                else:
+                    local.con.register(name, table)
+            local.run = run
+        return local.con
+
+    def execute(self, query, params=None, prepared=False):
+        self._reload()
+        # the pages use mysql-connector's %s placeholders; DuckDB binds ?
+        sql = query.replace("%s", "?")
+        return self._connection().execute(sql, list(params or ())).df()
+
+    def tables(self):
+        self._reload()
+        with self._lock:
+            return sorted(self._tables)
+
+
+class ArrowBackend(DuckDBBackend):
+    """DuckDB over the memory-mapped Arrow files of the current snapshot run."""
+
+    name = "snapshot"
+    suffix = ".arrow"
+
+    def _load(self, path):
+        # zero-copy: the table's buffers point into the mapped file
+        return pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+
+BACKENDS = {backend.name: backend for backend in (MySQLBackend, DuckDBBackend, ArrowBackend)}
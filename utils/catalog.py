@@ -0,0 +1,32 @@
+# catalog.py — In-process dimension catalog for filter widgets
+#
+# The ETL writes the distinct State / Year / Quarter / Brand / Transaction_type
+# values of every table into `dimension_catalog`. It is read once per data
+# version (through QUERY_CACHE, so a new version is picked up in the
+# background), and populating a selectbox costs no query.
+
+from utils.query_builder import run_query
+
+NUMERIC_DIMENSIONS = {"Year", "Quarter"}
+CATALOG_SQL = "SELECT table_name, dimension, value FROM dimension_catalog;"
+
+
+def _build_catalog(df):
+    catalog = {}
+    for (table, dimension), group in df.groupby(["table_name", "dimension"]):
+        values = group["value"]
+        if dimension in NUMERIC_DIMENSIONS:
+            values = values.astype(int)
+        catalog.setdefault(table, {})[dimension] = sorted(values.tolist())
+    return catalog
+
+
+def load_catalog():
+    """{table_name: {dimension: sorted values}} (shared; do not modify)."""
+    return run_query(CATALOG_SQL, ("dimension_catalog",), _build_catalog)
+
+
+def get_options(table, dimension):
+    """Sorted distinct values of `dimension` in `table` (table name is case-insensitive)."""
+    catalog = load_catalog()
+    return list(catalog.get(table.lower(), {}).get(dimension, []))
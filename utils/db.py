@@ -0,0 +1,127 @@
+# db.py — Shared database access for the dashboard pages
+
+from contextlib import contextmanager
+import os
+import threading
+import time
+
+from utils.backends import BACKENDS, MySQLBackend
+from utils.single_flight import SingleFlight
+from utils.telemetry import TELEMETRY
+import streamlit as st
+
+POOL_SIZE = 8
+
+# Storage backend behind read_sql (see utils/backends.py):
+# "mysql" (default), "duckdb" (ETL Parquet) or "snapshot" (memory-mapped
+# Arrow); the last two never open a database connection
+DATA_SOURCE = os.environ.get("PHONEPE_DATA_SOURCE", "mysql")
+
+# mysql-connector raises instead of blocking when the pool is exhausted,
+# so callers queue on this semaphore for a free connection
+_pool_slots = threading.BoundedSemaphore(POOL_SIZE)
+_in_use = [0]
+_in_use_lock = threading.Lock()
+
+# ==========================================
+# CACHE CONNECTION POOL
+# ==========================================
+@st.cache_resource
+def get_pool():
+    # imported here so the file backends run without the MySQL driver
+    from sql_connection import get_sql_connection_pool
+    return get_sql_connection_pool(POOL_SIZE)
+
+
+@contextmanager
+def pooled_connection():
+    """Borrow a connection from the pool for the duration of the block."""
+    with _pool_slots:
+        with _in_use_lock:
+            _in_use[0] += 1
+        try:
+            conn = get_pool().get_connection()
+            try:
+                yield conn
+            finally:
+                conn.close()  # returns it to the pool
+        finally:
+            with _in_use_lock:
+                _in_use[0] -= 1
+
+
+def idle_connections():
+    """Pool connections not currently borrowed (background work checks this first)."""
+    with _in_use_lock:
+        return POOL_SIZE - _in_use[0]
+
+
+@st.cache_resource
+def get_backend(name=DATA_SOURCE):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown PHONEPE_DATA_SOURCE {name!r}, expected one of {', '.join(BACKENDS)}")
+    if name == MySQLBackend.name:
+        return MySQLBackend(pooled_connection)
+    return BACKENDS[name]()
+
+
+def _execute(query, params, prepared):
+    return get_backend().execute(query, params, prepared)
+
+
+# Identical queries running at the same time (any session or refresh
+# thread) share one execution; see query_stats() for the coalescing rate
+_flights = SingleFlight()
+
+
+def query_key(query, params=None):
+    """Whitespace-insensitive identity of a query and its parameters."""
+    return " ".join(query.split()), tuple(params or ())
+
+
+def read_sql(query, params=None, prepared=False):
+    """
+    Run one query on its own pooled connection (safe to call from worker threads).
+
+    With prepared=True the statement is sent as a server-side prepared
+    statement and `params` are bound, never interpolated into the SQL text.
+    Concurrent calls for the same query wait for one execution; every caller
+    gets its own copy of the result. Every call is recorded in TELEMETRY.
+    """
+    start = time.perf_counter()
+    df, shared = _flights.do(query_key(query, params) + (prepared,), lambda: _execute(query, params, prepared))
+    TELEMETRY.record(query, params, time.perf_counter() - start, df, "coalesced" if shared else "db")
+    return df.copy()
+
+
+def query_stats():
+    """Calls / executions / coalesced counts of read_sql since start-up."""
+    return _flights.stats()
+
+
+# ==========================================
+# DATA VERSIONS
+# ==========================================
+# The ETL bumps data_versions.version for a table in the same transaction
+# that commits new rows to it. Caches key on those versions instead of a
+# TTL: entries stay valid until their tables change. Only this one small
+# lookup is re-read, every VERSION_POLL_SECONDS.
+VERSION_POLL_SECONDS = 5
+
+
+@st.cache_data(ttl=VERSION_POLL_SECONDS, show_spinner=False)
+def get_table_versions():
+    """{table_name: version} for every table the ETL has committed."""
+    df = read_sql("SELECT table_name, version FROM data_versions;")
+    return {name.lower(): int(version) for name, version in zip(df["table_name"], df["version"])}
+
+
+def get_data_version(*tables):
+    """
+    Version stamp for `tables` (a tuple, one entry per table), or a single
+    stamp that changes whenever any table changes when called without tables.
+    """
+    versions = get_table_versions()
+    if tables:
+        return tuple(versions.get(table.lower(), 0) for table in tables)
+    return sum(versions.values())
@@ -0,0 +1,110 @@
+# disk_cache.py — Optional on-disk tier for query results
+#
+# The in-memory caches are lost on every redeploy or crash. When
+# PHONEPE_DISK_CACHE_DIR is set (and pyarrow is installed), QUERY_CACHE also
+# writes each result to a Parquet file named after its normalized query key
+# and data version, and reads it back before going to MySQL. Files are
+# evicted least-recently-used first once the directory grows past
+# PHONEPE_DISK_CACHE_MB.
+
+import hashlib
+import logging
+import os
+import threading
+import uuid
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get("PHONEPE_DISK_CACHE_DIR")
+MAX_BYTES = int(os.environ.get("PHONEPE_DISK_CACHE_MB", "512")) * 1024 * 1024
+SUFFIX = ".parquet"
+
+
+class DiskCache:
+    def __init__(self, directory, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, version):
+        digest = hashlib.sha1(repr((key, version)).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + SUFFIX)
+
+    def get(self, key, version):
+        path = self._path(key, version)
+        try:
+            df = pd.read_parquet(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            logger.exception("Unreadable cache file %s, dropping it", path)
+            self._remove(path)
+            self.misses += 1
+            return None
+        os.utime(path)  # mtime doubles as the LRU clock
+        self.hits += 1
+        return df
+
+    def put(self, key, version, df):
+        if not isinstance(df, pd.DataFrame):
+            return
+        path = self._path(key, version)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            df.to_parquet(tmp)
+            os.replace(tmp, path)  # readers never see a half-written file
+        except Exception:
+            logger.exception("Could not write cache file for %r", key)
+            self._remove(tmp)
+            return
+        self._evict()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _files(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(SUFFIX):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _evict(self):
+        with self._lock:
+            files = sorted(self._files())
+            total = sum(size for _, size, _ in files)
+            for _, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                self.evictions += 1
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self._files())
+
+    def clear(self):
+        for _, _, path in self._files():
+            self._remove(path)
+
+
+DISK_CACHE = DiskCache(CACHE_DIR) if CACHE_DIR and HAS_ARROW else None
+if CACHE_DIR and not HAS_ARROW:
+    logger.warning("PHONEPE_DISK_CACHE_DIR is set but pyarrow is not installed; disk cache disabled")
@@ -0,0 +1,113 @@
+# formatters.py — Vectorized number formatting and axis ticks
+#
+# Works on whole NumPy arrays / pandas Series / DataFrames at once instead of
+# formatting one value at a time through `.apply`.
+
+import numpy as np
+import pandas as pd
+
+# Unit thresholds in ascending order; index 0 is "no suffix"
+THRESHOLDS = np.array([1e3, 1e6, 1e9])
+DIVISORS = np.array([1.0, 1e3, 1e6, 1e9])
+SUFFIXES = np.array(["", "K", "M", "B"])
+SIGNS = np.array(["", "-"])
+NICE_STEPS = (1, 2, 2.5, 5, 10)
+
+# Integer and fractional parts are gathered from small lookup tables instead
+# of being formatted one float at a time; integers of 1000 and above (amounts
+# of 1000B+) are assembled from 3-digit groups.
+INT_LABELS = np.array([str(i) for i in range(1000)])
+GROUP_LABELS = np.array([str(i).zfill(3) for i in range(1000)])
+_FRACTION_LABELS = {}
+
+
+def _fraction_labels(decimals):
+    if decimals not in _FRACTION_LABELS:
+        if decimals:
+            labels = ["." + str(i).zfill(decimals) for i in range(10 ** decimals)]
+        else:
+            labels = [""]
+        _FRACTION_LABELS[decimals] = np.array(labels)
+    return _FRACTION_LABELS[decimals]
+
+
+def _split(magnitude, divisors, decimals):
+    fixed = np.rint(magnitude / divisors * 10 ** decimals).astype(np.int64)
+    return np.divmod(fixed, 10 ** decimals)
+
+
+def _int_text(whole):
+    text = INT_LABELS[whole % 1000]
+    large = whole > 999
+    if large.any():
+        width = len(str(int(whole.max())))
+        text = text.astype(f"<U{width}")
+        text[large] = np.char.add(_int_text(whole[large] // 1000), GROUP_LABELS[whole[large] % 1000])
+    return text
+
+
+def _round(magnitude, unit, decimals, small_decimals):
+    """(whole part, fraction digits as an integer, fraction label) of each value in its unit."""
+    divisors = DIVISORS[unit]
+    whole, fraction = _split(magnitude, divisors, decimals)
+    labels = _fraction_labels(decimals)[fraction]
+    if small_decimals != decimals:
+        small = unit == 0
+        small_whole, small_fraction = _split(magnitude, divisors, small_decimals)
+        whole = np.where(small, small_whole, whole)
+        labels = np.where(small, _fraction_labels(small_decimals)[small_fraction], labels)
+        fraction = np.where(small, small_fraction, fraction)
+    return whole, fraction, labels
+
+
+def _format_array(values, decimals, small_decimals):
+    arr = np.asarray(values, dtype=float)
+    missing = np.isnan(arr)
+    magnitude = np.abs(np.where(missing, 0.0, arr))
+
+    unit = np.searchsorted(THRESHOLDS, magnitude, side="right")
+    whole, fraction, labels = _round(magnitude, unit, decimals, small_decimals)
+    # the unit follows the rounded value: 999.999 rounds to 1000.00, i.e. 1.00K
+    carry = (whole >= 1000) & (unit < len(THRESHOLDS))
+    if carry.any():
+        unit = np.where(carry, unit + 1, unit)
+        whole, fraction, labels = _round(magnitude, unit, decimals, small_decimals)
+
+    # a value that rounds to zero has no sign ("0.00", not "-0.00")
+    negative = (arr < 0) & ((whole > 0) | (fraction > 0))
+    text = np.char.add(SIGNS[negative.astype(np.int8)], _int_text(whole))
+    text = np.char.add(np.char.add(text, labels), SUFFIXES[unit])
+    return np.where(missing, "", text)
+
+
+def format_numbers(values, decimals=2, small_decimals=None):
+    """
+    Format numbers as B / M / K abbreviated labels in one vectorized pass.
+
+    - values: array-like, Series or DataFrame (shape and index are preserved)
+    - decimals: digits after the point for abbreviated values
+    - small_decimals: digits for values below 1K (defaults to `decimals`)
+    """
+    if small_decimals is None:
+        small_decimals = decimals
+    text = _format_array(values, decimals, small_decimals)
+    if isinstance(values, pd.DataFrame):
+        return pd.DataFrame(text, index=values.index, columns=values.columns)
+    if isinstance(values, pd.Series):
+        return pd.Series(text, index=values.index, name=values.name)
+    return text
+
+
+def nice_ticks(max_value, count=5):
+    """
+    Evenly spaced ticks from 0 up to at least `max_value` on a 1/2/2.5/5 x 10^k
+    step, with their abbreviated labels. Returns (tickvals, ticktext).
+    """
+    if not max_value or max_value <= 0 or not np.isfinite(max_value):
+        return [0], ["0"]
+    raw_step = max_value / count
+    magnitude = 10 ** np.floor(np.log10(raw_step))
+    step = next(m * magnitude for m in NICE_STEPS if m * magnitude >= raw_step)
+    tickvals = np.arange(0, max_value + step, step)
+    ticktext = format_numbers(tickvals, decimals=1, small_decimals=0)
+    return tickvals.tolist(), ticktext.tolist()
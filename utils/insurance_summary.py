@@ -0,0 +1,37 @@
+# insurance_summary.py — Cached insurance rollups for the insurance pages
+#
+# The ETL builds insurance_state_summary (Aggregated_Insurance_Data) and
+# insurance_district_summary (map_insurance_data) with count, amount, average
+# premium and quarter-over-quarter growth. Each is loaded once per data
+# version through QUERY_CACHE.
+
+from utils.query_builder import run_query
+
+SUMMARY_TABLES = {
+    "state": ("insurance_state_summary", ["State"]),
+    "district": ("insurance_district_summary", ["District", "State"]),
+}
+
+NUMERIC_COLUMNS = [
+    "Transaction_count", "Transaction_amount", "Avg_Premium",
+    "Prev_Transaction_count", "Count_Growth_Pct", "Amount_Growth_Pct",
+]
+
+
+def _numeric(df):
+    df[NUMERIC_COLUMNS] = df[NUMERIC_COLUMNS].astype(float)
+    return df
+
+
+def load_insurance_summary(level):
+    table, _ = SUMMARY_TABLES[level]
+    return run_query(f"SELECT * FROM {table};", (table,), _numeric)
+
+
+def get_insurance_summary(level, year="All Years"):
+    """Per-period rollup rows for `level` ("state" or "district"), optionally one year."""
+    df = load_insurance_summary(level)
+    if year != "All Years":
+        df = df[df["Year"] == int(year)]
+    return df
+
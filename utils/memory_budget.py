@@ -0,0 +1,148 @@
+# memory_budget.py — Byte-sized LRU caches under one global memory budget
+#
+# Counting entries says nothing about memory: one district-level DataFrame
+# can weigh as much as a thousand small ones. Every SizedLRU measures what
+# it stores and registers with BUDGET; when the caches together go over
+# PHONEPE_CACHE_BUDGET_MB, the least recently used entry across all of them
+# is evicted until they fit again. Each cache counts its own hits, misses
+# and evictions for the Cache Admin page.
+#
+# Outside the budget, by design: the st.cache_resource singletons (the India
+# GeoJSON, the database backend / connection pool) and the st.cache_data
+# table-version lookup in utils/db.py — a fixed handful of entries per process.
+
+from collections import OrderedDict
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+BUDGET_BYTES = int(os.environ.get("PHONEPE_CACHE_BUDGET_MB", "256")) * 1024 * 1024
+
+
+def sizeof(value):
+    """Approximate in-memory size of a cached value, in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(sizeof(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+class MemoryBudget:
+    def __init__(self, max_bytes=BUDGET_BYTES):
+        self.max_bytes = max_bytes
+        self._caches = []
+        self._lock = threading.Lock()
+
+    def register(self, cache):
+        with self._lock:
+            self._caches.append(cache)
+
+    def caches(self):
+        with self._lock:
+            return list(self._caches)
+
+    def used_bytes(self):
+        return sum(cache.bytes for cache in self.caches())
+
+    def enforce(self):
+        """Evict globally least recently used entries until every cache fits the budget."""
+        with self._lock:
+            while sum(cache.bytes for cache in self._caches) > self.max_bytes:
+                candidates = [(cache.oldest_access(), i) for i, cache in enumerate(self._caches)]
+                candidates = [(used, i) for used, i in candidates if used is not None]
+                if not candidates:
+                    break
+                self._caches[min(candidates)[1]].evict_oldest()
+
+
+BUDGET = MemoryBudget()
+
+
+class SizedLRU:
+    """Thread-safe LRU whose entries count against a MemoryBudget by size."""
+
+    def __init__(self, name, max_entries=None, budget=BUDGET):
+        self.name = name
+        self.max_entries = max_entries
+        self.budget = budget
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()   # key -> [value, size, last access]
+        self._lock = threading.Lock()
+        budget.register(self)
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            item[2] = time.monotonic()
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value):
+        size = sizeof(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = [value, size, time.monotonic()]
+            self.bytes += size
+            while self.max_entries is not None and len(self._entries) > self.max_entries:
+                self._pop_oldest()
+        self.budget.enforce()
+
+    def size(self, key):
+        """Bytes counted for `key` when it was stored, or None."""
+        with self._lock:
+            item = self._entries.get(key)
+            return None if item is None else item[1]
+
+    def _pop_oldest(self):
+        _, (_, size, _) = self._entries.popitem(last=False)
+        self.bytes -= size
+        self.evictions += 1
+
+    def evict_oldest(self):
+        with self._lock:
+            if self._entries:
+                self._pop_oldest()
+
+    def oldest_access(self):
+        with self._lock:
+            if not self._entries:
+                return None
+            return next(iter(self._entries.values()))[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cache": self.name,
+                "entries": len(self._entries),
+                "MB": self.bytes / 1024 / 1024,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_pct": self.hits / lookups * 100 if lookups else 0.0,
+                "evictions": self.evictions,
+            }
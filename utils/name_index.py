@@ -0,0 +1,85 @@
+# name_index.py — Canonical State / District name index
+#
+# PhonePe Pulse stores states as folder slugs ("andaman-&-nicobar-islands"),
+# the India GeoJSON uses display names in `ST_NM` ("Andaman & Nicobar") and
+# district names arrive in mixed case with or without a trailing "district".
+# This index is built once at import time and is applied by the ETL, so the
+# tables in MySQL already hold the canonical names and the dashboard can join
+# against the GeoJSON with plain key lookups.
+
+import re
+
+import pandas as pd
+
+# ==========================================
+# CANONICAL STATE NAMES (GeoJSON `ST_NM`)
+# ==========================================
+GEOJSON_STATES = (
+    "Andaman & Nicobar", "Andhra Pradesh", "Arunachal Pradesh", "Assam",
+    "Bihar", "Chandigarh", "Chhattisgarh",
+    "Dadra and Nagar Haveli and Daman and Diu", "Delhi", "Goa", "Gujarat",
+    "Haryana", "Himachal Pradesh", "Jammu & Kashmir", "Jharkhand",
+    "Karnataka", "Kerala", "Ladakh", "Lakshadweep", "Madhya Pradesh",
+    "Maharashtra", "Manipur", "Meghalaya", "Mizoram", "Nagaland", "Odisha",
+    "Puducherry", "Punjab", "Rajasthan", "Sikkim", "Tamil Nadu", "Telangana",
+    "Tripura", "Uttar Pradesh", "Uttarakhand", "West Bengal",
+)
+
+# Pulse slugs and other spellings that do not reduce to a GeoJSON name
+STATE_ALIASES = {
+    "andaman-&-nicobar-islands": "Andaman & Nicobar",
+    "andaman and nicobar islands": "Andaman & Nicobar",
+    "dadra-&-nagar-haveli-&-daman-&-diu": "Dadra and Nagar Haveli and Daman and Diu",
+    "dadra and nagar haveli": "Dadra and Nagar Haveli and Daman and Diu",
+    "daman and diu": "Dadra and Nagar Haveli and Daman and Diu",
+    "jammu-&-kashmir": "Jammu & Kashmir",
+    "jammu and kashmir": "Jammu & Kashmir",
+    "nct of delhi": "Delhi",
+    "orissa": "Odisha",
+    "pondicherry": "Puducherry",
+    "uttaranchal": "Uttarakhand",
+}
+
+
+def _state_key(name):
+    """Lookup key: lower case, '-' as space, 'and' folded into '&'."""
+    key = str(name).strip().lower().replace("-", " ")
+    key = re.sub(r"\band\b", "&", key)
+    return re.sub(r"\s+", " ", key)
+
+
+def _build_state_index():
+    index = {}
+    for name in GEOJSON_STATES:
+        index[_state_key(name)] = name
+    for alias, name in STATE_ALIASES.items():
+        index[_state_key(alias)] = name
+    return index
+
+
+STATE_INDEX = _build_state_index()
+
+
+# ==========================================
+# LOOKUPS
+# ==========================================
+def canonical_state(name):
+    """Return the GeoJSON `ST_NM` spelling of a state, or the title-cased input."""
+    if name is None:
+        return None
+    return STATE_INDEX.get(_state_key(name), str(name).strip().replace("-", " ").title())
+
+
+def canonical_district(name):
+    """Return the canonical district name: title case, no 'district' suffix."""
+    if name is None:
+        return None
+    district = re.sub(r"\s+", " ", str(name).strip())
+    district = re.sub(r"\s+district$", "", district, flags=re.IGNORECASE)
+    return district.title()
+
+
+def canonicalize_column(series, func):
+    """Apply a lookup once per distinct value and map it back over the column."""
+    mapping = {value: func(value) for value in pd.unique(series.dropna())}
+    return series.map(mapping)
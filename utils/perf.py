@@ -0,0 +1,95 @@
+# perf.py — Server CPU per dashboard section
+#
+# Each independent page section runs as a Streamlit fragment, so a widget
+# change reruns only that section. `fragment_section` records the CPU time of
+# every run of a section, which is what a fragment is meant to save: compare
+# the per-run cost of a section with the cost of the full page (MainPage
+# tracks the full-page dispatch as "page: <name>"). A fragment rerun skips
+# MainPage's dispatch, so the decorator also attributes the section's
+# queries to its page in telemetry and profiles it when ?profile=1 is set.
+#
+# A run's CPU is the script thread's own CPU time plus the CPU its QueryBatch
+# workers spend on its behalf (they run through `charged`). Thread CPU time
+# is used rather than process CPU time, which would also count other
+# sessions' reruns. The Diagnostics page shows cpu_summary().
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import functools
+import threading
+import time
+
+from utils import telemetry
+from utils.profiling import profiled
+
+_lock = threading.Lock()
+CPU_STATS = {}    # section -> {"runs", "cpu_seconds", "worker_seconds", "last"}
+
+# worker CPU seconds of the innermost running section, shared with the
+# QueryBatch workers it submits to (they run in a copy of its context)
+_worker_cpu = ContextVar("worker_cpu", default=None)
+
+
+@contextmanager
+def cpu_section(section):
+    """Add the CPU time of the block (and of its QueryBatch workers) to CPU_STATS[section]."""
+    worker = [0.0]
+    token = _worker_cpu.set(worker)
+    start = time.thread_time()
+    try:
+        yield
+    finally:
+        own = time.thread_time() - start
+        _worker_cpu.reset(token)
+        with _lock:
+            workers = worker[0]
+            stats = CPU_STATS.setdefault(
+                section, {"runs": 0, "cpu_seconds": 0.0, "worker_seconds": 0.0, "last": 0.0})
+            stats["runs"] += 1
+            stats["cpu_seconds"] += own + workers
+            stats["worker_seconds"] += workers
+            stats["last"] = own + workers
+            # an enclosing section (the full page around a fragment) already
+            # counts this thread's time, but not the workers'
+            parent = _worker_cpu.get()
+            if parent is not None:
+                parent[0] += workers
+
+
+def fragment_section(page, section):
+    """Decorator for a fragment body: its queries count under `page`, its CPU and profile under `section`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with telemetry.page(page), profiled(section), cpu_section(section):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def charged(func, *args, **kwargs):
+    """Call func, adding its thread CPU time to the section that submitted it."""
+    worker = _worker_cpu.get()
+    if worker is None:
+        return func(*args, **kwargs)
+    start = time.thread_time()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        spent = time.thread_time() - start
+        with _lock:
+            worker[0] += spent
+
+
+def cpu_summary():
+    """Snapshot of CPU_STATS with the mean CPU milliseconds per run."""
+    with _lock:
+        return {
+            section: dict(stats, mean_ms=stats["cpu_seconds"] / stats["runs"] * 1000)
+            for section, stats in CPU_STATS.items()
+        }
+
+
+def clear_cpu():
+    with _lock:
+        CPU_STATS.clear()
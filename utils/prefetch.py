@@ -0,0 +1,107 @@
+# prefetch.py — Background prefetch of neighbouring filter selections
+#
+# Users step through time one period at a time. After a page renders a
+# selection, it hands the neighbouring selections (previous / next year,
+# next quarter, same period for the next state) to PREFETCHER, which loads
+# them on a small worker pool into the same caches the page reads — so the
+# next step is usually a cache hit.
+#
+# Prefetching only uses idle capacity: a request is dropped when fewer than
+# RESERVED_CONNECTIONS pool connections are free or MAX_PENDING prefetches
+# are already queued. Workers run without a Streamlit script context, so the
+# functions handed over must only load data / build figures.
+
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+
+from utils.db import idle_connections
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_WORKERS = 2
+MAX_PENDING = 8
+RESERVED_CONNECTIONS = 2    # always left free for interactive queries
+
+
+class Prefetcher:
+    def __init__(self, workers=PREFETCH_WORKERS, max_pending=MAX_PENDING):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.dropped = 0
+
+    def _run(self, key, func, args):
+        try:
+            func(*args)
+        except Exception:
+            logger.exception("Prefetch failed for %r", key)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def prefetch(self, key, func, *args):
+        """Queue func(*args) unless it is already queued or there is no spare capacity."""
+        with self._lock:
+            if key in self._pending:
+                return False
+            if len(self._pending) >= self.max_pending or idle_connections() <= RESERVED_CONNECTIONS:
+                self.dropped += 1
+                return False
+            self._pending.add(key)
+            self.submitted += 1
+        self._executor.submit(self._run, key, func, args)
+        return True
+
+
+PREFETCHER = Prefetcher()
+
+
+# ==========================================
+# NEIGHBOURING SELECTIONS
+# ==========================================
+def _step(options, value, offset):
+    """The option `offset` places away from `value`, or None at either end / for "All"."""
+    if value not in options:
+        return None
+    i = options.index(value) + offset
+    return options[i] if 0 <= i < len(options) else None
+
+
+def neighbour_selections(selection, options):
+    """
+    Selections one step away from `selection`, most likely next step first.
+
+    - selection: {"State": ..., "Year": ..., "Quarter": ...}; a dimension that
+      is missing or not in its options (e.g. "All") is not stepped
+    - options: {dimension: ordered option values}
+    """
+    years = options.get("Year", [])
+    quarters = options.get("Quarter", [])
+    year, quarter = selection.get("Year"), selection.get("Quarter")
+    neighbours = []
+
+    # next quarter, rolling over into the next year's first quarter
+    next_quarter = _step(quarters, quarter, 1)
+    if next_quarter is not None:
+        neighbours.append(dict(selection, Quarter=next_quarter))
+    elif quarter in quarters and _step(years, year, 1) is not None:
+        neighbours.append(dict(selection, Year=_step(years, year, 1), Quarter=quarters[0]))
+
+    for offset in (1, -1):
+        other_year = _step(years, year, offset)
+        if other_year is not None:
+            neighbours.append(dict(selection, Year=other_year))
+
+    next_state = _step(options.get("State", []), selection.get("State"), 1)
+    if next_state is not None:
+        neighbours.append(dict(selection, State=next_state))
+
+    # drop duplicates (e.g. the rolled-over quarter and the next year can coincide)
+    unique = []
+    for neighbour in neighbours:
+        if neighbour not in unique and neighbour != selection:
+            unique.append(neighbour)
+    return unique
@@ -0,0 +1,111 @@
+# profiling.py — Opt-in cProfile of one page rerun
+#
+# With ?profile=1 in the URL (or PHONEPE_PROFILE=1 for every session),
+# MainPage runs the page dispatch under cProfile, and each fragment section
+# (utils/perf.fragment_section) its own body, so a filter change that reruns
+# only a fragment is profiled too; inside a full-page profile a fragment is
+# not profiled again. Every profiled rerun is written to PHONEPE_PROFILE_DIR
+# as a .prof file (open it with snakeviz or `python -m pstats`), and the
+# sidebar shows where the time went: own time per area (SQL, pandas, Plotly,
+# number formatting, Streamlit) and the top functions.
+#
+# cProfile only sees the script thread: queries a page hands to QueryBatch
+# workers show up as time spent waiting on their results.
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import cProfile
+import logging
+import os
+import pstats
+import re
+import time
+
+import streamlit as st
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.environ.get("PHONEPE_PROFILE_DIR", "profiles")
+TOP_N = 15
+
+# label of the profile running in this script run, if any
+_active = ContextVar("profile", default=None)
+
+# first match wins; matched against the function's file path
+AREAS = [
+    ("Number formatting", ("formatters.py",)),
+    ("SQL", ("mysql", "duckdb", "utils/db.py", "utils/backends.py", "pyarrow")),
+    ("Plotly", ("plotly", "narwhals")),
+    ("pandas / numpy", ("pandas", "numpy")),
+    ("Streamlit", ("streamlit",)),
+]
+
+
+def profiling_requested():
+    return os.environ.get("PHONEPE_PROFILE") == "1" or st.query_params.get("profile") == "1"
+
+
+def _area(filename):
+    path = filename.replace("\\", "/")
+    for area, markers in AREAS:
+        if any(marker in path for marker in markers):
+            return area
+    return "Other"
+
+
+def summarize(profiler):
+    """(own seconds per area, top TOP_N functions by own time) of one profile."""
+    rows = []
+    for (filename, line, func), (_, calls, own, cumulative, _) in pstats.Stats(profiler).stats.items():
+        rows.append((f"{func} ({os.path.basename(filename)}:{line})", _area(filename), calls, own, cumulative))
+    df = pd.DataFrame(rows, columns=["function", "area", "calls", "own_s", "cumulative_s"])
+    areas = df.groupby("area")["own_s"].sum().sort_values(ascending=False)
+    return areas, df.nlargest(TOP_N, "own_s")
+
+
+def save(profiler, label):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", label).strip("-").lower()
+    path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}.prof")
+    profiler.dump_stats(path)
+    return path
+
+
+def show_summary(profiler, label, seconds, path):
+    areas, top = summarize(profiler)
+    with st.sidebar.expander(f"⏱️ Profile: {label} ({seconds * 1000:.0f} ms)", expanded=True):
+        st.caption(f"Saved to {path}")
+        st.dataframe((areas * 1000).round(1).rename("own ms"), use_container_width=True)
+        top = top.assign(own_ms=top["own_s"] * 1000, cumulative_ms=top["cumulative_s"] * 1000)
+        st.dataframe(top[["function", "calls", "own_ms", "cumulative_ms"]].round(1),
+                     hide_index=True, use_container_width=True)
+
+
+@contextmanager
+def profiled(label):
+    """Profile the block when profiling is requested (and no enclosing block is), then save and summarize it."""
+    if _active.get() is not None or not profiling_requested():
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+ allows one active profiler per process (another session's rerun)
+        st.sidebar.caption("⏱️ Profiler busy with another rerun; not profiled.")
+        yield
+        return
+    token = _active.set(label)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _active.reset(token)
+        seconds = time.perf_counter() - start
+        try:
+            path = save(profiler, label)
+            show_summary(profiler, label, seconds, path)
+        except Exception:
+            logger.exception("Could not save the profile of %s", label)
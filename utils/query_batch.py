@@ -0,0 +1,71 @@
+# query_batch.py — Run a page's queries concurrently
+#
+# A page submits all of its loaders up front; each runs on a worker thread
+# with its own pooled connection (utils.db.read_sql), and the page renders
+# every section as soon as its result arrives. Page latency approaches the
+# slowest single query instead of the sum of all of them.
+#
+# Pages split into fragments load each section inside its fragment, so a
+# filter change reruns one section's queries only. On a full-page run they
+# first submit every section's loads (with the sections' current filters)
+# and `wait`; the fragments then read the results from the query cache.
+
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from contextvars import copy_context
+import threading
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from utils.db import POOL_SIZE
+from utils.perf import charged
+
+
+def _attach_context(ctx):
+    # lets st.cache_data inside the loaders see the calling session
+    if ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+
+class QueryBatch:
+    """
+    Usage:
+        with QueryBatch() as batch:
+            batch.submit("states", get_rankings, ...)
+            batch.submit("growth", fetch_data, query)
+            for name, result in batch.as_completed():
+                render[name](result)
+    """
+
+    def __init__(self, max_workers=POOL_SIZE):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="query-batch",
+            initializer=_attach_context,
+            initargs=(get_script_run_ctx(),),
+        )
+        self._futures = {}
+
+    def submit(self, name, func, *args, **kwargs):
+        # copy_context: queries stay attributed to the calling page (utils.telemetry)
+        # and their CPU to the calling section (utils.perf)
+        future = self._executor.submit(copy_context().run, charged, func, *args, **kwargs)
+        self._futures[future] = name
+        return future
+
+    def wait(self):
+        """Block until every submitted call has finished; failures are left to the caller's own retry."""
+        wait(self._futures)
+
+    def as_completed(self):
+        """Yield (name, result) pairs in completion order."""
+        for future in as_completed(self._futures):
+            yield self._futures[future], future.result()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
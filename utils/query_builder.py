@@ -0,0 +1,153 @@
+# query_builder.py — Widget state to parameterized SQL
+#
+# Pages describe a query as a source table, the columns / sums they need and
+# a {column: widget value} filter dict. The builder pushes every filter into
+# the WHERE clause as a placeholder (never as interpolated text), drops
+# "All" selections, and normalizes the filters so the same selection always
+# yields the same SQL text and parameter tuple — which is also the cache key.
+# Filters a query does not take never reach its key, so changing an
+# unrelated widget does not refetch.
+
+from typing import NamedTuple
+import re
+
+from utils.db import read_sql, get_data_version
+from utils.query_cache import QUERY_CACHE
+import numpy as np
+import pandas as pd
+
+# Widget values that mean "no filter"
+ALL = ("All", "All Years", None)
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class Between(NamedTuple):
+    """Inclusive range predicate, e.g. a year-range slider."""
+    low: object
+    high: object
+
+
+class AtLeast(NamedTuple):
+    """Lower-bound predicate, e.g. a minimum-growth slider."""
+    value: object
+
+
+class Derived(NamedTuple):
+    """A fixed subquery used as the FROM source (e.g. a LAG window)."""
+    sql: str
+    alias: str
+    tables: tuple    # tables it reads, for cache invalidation
+
+
+def derived(sql, alias, tables):
+    return Derived(sql.strip().rstrip(";"), _ident(alias), tuple(tables))
+
+
+def _ident(name):
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return name
+
+
+def _scalar(value):
+    # numpy scalars from dataframes / sliders -> plain Python for the driver
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def normalize_filters(filters):
+    """Drop "All" selections and put the rest in a canonical, hashable order."""
+    normalized = []
+    for column, value in (filters or {}).items():
+        if isinstance(value, (list, tuple, set, frozenset)) and not isinstance(value, (Between, AtLeast)):
+            value = tuple(sorted({_scalar(v) for v in value}))
+        elif isinstance(value, Between):
+            value = Between(_scalar(value.low), _scalar(value.high))
+        elif isinstance(value, AtLeast):
+            value = AtLeast(_scalar(value.value))
+        elif value in ALL:
+            continue
+        else:
+            value = _scalar(value)
+        normalized.append((_ident(column), value))
+    return tuple(sorted(normalized, key=lambda item: item[0]))
+
+
+def _predicate(column, value):
+    if isinstance(value, Between):
+        return f"{column} BETWEEN %s AND %s", [value.low, value.high]
+    if isinstance(value, AtLeast):
+        return f"{column} >= %s", [value.value]
+    if isinstance(value, tuple):
+        if not value:
+            return "1 = 0", []
+        return f"{column} IN ({', '.join(['%s'] * len(value))})", list(value)
+    return f"{column} = %s", [value]
+
+
+def build_select(source, columns=(), sums=(), filters=None, group_by=(), order_by=(), limit=None):
+    """
+    Return (sql, params) for a single SELECT.
+
+    - source: table name or a Derived subquery
+    - columns: plain columns; sums: columns returned as SUM(col) AS col
+    - filters: {column: value}; value may be a scalar, a list (IN),
+      Between, AtLeast, or an "All" sentinel (no predicate)
+    - order_by: column names, "-column" for descending
+    """
+    if isinstance(source, Derived):
+        from_clause = f"({source.sql}) AS {source.alias}"
+    else:
+        from_clause = _ident(source)
+
+    select = [_ident(c) for c in columns] + [f"SUM({_ident(c)}) AS {c}" for c in sums]
+    sql = f"SELECT {', '.join(select)} FROM {from_clause}"
+
+    params = []
+    predicates = []
+    for column, value in normalize_filters(filters):
+        clause, values = _predicate(column, value)
+        predicates.append(clause)
+        params.extend(values)
+    if predicates:
+        sql += " WHERE " + " AND ".join(predicates)
+    if group_by:
+        sql += " GROUP BY " + ", ".join(_ident(c) for c in group_by)
+    if order_by:
+        sql += " ORDER BY " + ", ".join(
+            f"{_ident(c[1:])} DESC" if c.startswith("-") else _ident(c) for c in order_by)
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+    return sql, tuple(params)
+
+
+def _fetch(sql, params, sums):
+    df = read_sql(sql, params=params, prepared=True)
+    if sums:
+        df[list(sums)] = df[list(sums)].astype(float)
+    return df
+
+
+def run_select(source, columns=(), sums=(), filters=None, group_by=(), order_by=(), limit=None):
+    """
+    build_select + execution as a prepared statement. Results are cached
+    until their tables change, then served stale while they refresh.
+    """
+    sql, params = build_select(source, columns, sums, filters, group_by, order_by, limit)
+    tables = source.tables if isinstance(source, Derived) else (source,)
+    df = QUERY_CACHE.get((sql, params), get_data_version(*tables), lambda: _fetch(sql, params, sums))
+    return df.copy()
+
+
+def run_query(sql, tables, shape=None):
+    """
+    A fixed query (no widget filters) through the same cache, valid until
+    one of `tables` changes. `shape(df)` post-processes each fresh result
+    and may return any value; DataFrames are returned as copies.
+    """
+    def compute():
+        df = read_sql(sql)
+        return shape(df) if shape is not None else df
+
+    value = QUERY_CACHE.get((sql, ()), get_data_version(*tables), compute)
+    return value.copy() if isinstance(value, pd.DataFrame) else value
@@ -0,0 +1,121 @@
+# query_cache.py — Stale-while-revalidate cache for query results
+#
+# st.cache_data recomputes inline: once an entry's data version changes, the
+# next rerun waits for the full MySQL query. Here an entry whose version is
+# out of date (or that is older than `max_age`) is still served at once,
+# and a single background refresh is queued for it; the next rerun sees the
+# fresh result. Only a key that has never been computed waits.
+#
+# With the optional disk tier (utils/disk_cache.py) enabled, every computed
+# result is also written to disk, and a key missing from memory is looked up
+# there at its current version before it is computed.
+#
+# Entries live in a SizedLRU, so results count against the global cache
+# memory budget (utils/memory_budget.py) by their size in bytes.
+#
+# Keys are (sql, params) pairs; results served without running the query
+# are recorded in TELEMETRY (utils/telemetry.py).
+#
+# Refreshes run on worker threads without a Streamlit script context, so
+# `compute` must only fetch and shape data (read_sql, pandas), never draw.
+
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import NamedTuple
+import logging
+import threading
+import time
+
+from utils.disk_cache import DISK_CACHE
+from utils.memory_budget import SizedLRU
+from utils.telemetry import TELEMETRY
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 256
+REFRESH_WORKERS = 2
+
+
+class Entry(NamedTuple):
+    value: object
+    version: object
+    computed_at: float
+
+
+class QueryCache:
+    def __init__(self, name="query results", max_entries=MAX_ENTRIES, workers=REFRESH_WORKERS):
+        self._entries = SizedLRU(name, max_entries=max_entries)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="swr-refresh")
+        self.stale_hits = 0
+        self.refreshes = 0
+
+    def _store(self, key, value, version):
+        self._entries.put(key, Entry(value, version, time.time()))
+
+    def _compute(self, key, version, compute):
+        value = compute()
+        if DISK_CACHE is not None:
+            DISK_CACHE.put(key, version, value)
+        return value
+
+    def _refresh(self, key, version, compute):
+        try:
+            self._store(key, self._compute(key, version, compute), version)
+            self.refreshes += 1
+        except Exception:
+            # keep serving the last good result; the next read retries
+            logger.exception("Background refresh failed for %r", key)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key, version, compute, max_age=None):
+        """
+        Value for `key` at `version`.
+
+        - fresh entry: returned as is
+        - stale entry (other version, or older than max_age seconds):
+          returned as is, with at most one refresh in flight per key
+        - no entry: read from the disk tier, else computed inline
+        """
+        start = time.perf_counter()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expired = max_age is not None and time.time() - entry.computed_at > max_age
+            if entry.version == version and not expired:
+                self._record(key, start, entry.value, "hit")
+                return entry.value
+            with self._lock:
+                self.stale_hits += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    # the refresh is attributed to the page that triggered it
+                    self._executor.submit(copy_context().run, self._refresh, key, version, compute)
+            self._record(key, start, entry.value, "stale")
+            return entry.value
+
+        value = DISK_CACHE.get(key, version) if DISK_CACHE is not None else None
+        if value is None:
+            value = self._compute(key, version, compute)
+            self._store(key, value, version)
+        else:
+            self._store(key, value, version)
+            self._record(key, start, value, "disk")
+        return value
+
+    def _record(self, key, start, value, outcome):
+        # the entry's size as the LRU counted it, instead of re-measuring on every hit
+        sql, params = key
+        TELEMETRY.record(sql, params, time.perf_counter() - start, value, outcome,
+                         nbytes=self._entries.size(key))
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return dict(self._entries.stats(), stale_hits=self.stale_hits, refreshes=self.refreshes)
+
+
+QUERY_CACHE = QueryCache()
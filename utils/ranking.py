@@ -0,0 +1,45 @@
+# ranking.py — Single-scan top-N / bottom-N ranking service
+#
+# Pages used to send two queries per section that differed only in
+# `ORDER BY ... DESC/ASC LIMIT N`. Here the aggregate is fetched once per
+# (table, grouping, metrics, filters) through run_select — cached until the
+# table changes, then served stale while it refreshes — and both ends are
+# picked from it with a partial selection on every call.
+
+from utils.query_builder import run_select
+import numpy as np
+
+
+def top_bottom(df, by, n):
+    """
+    Return (top n rows by `by` descending, bottom n rows ascending) using
+    np.argpartition, so only the 2n selected rows are ever sorted.
+    """
+    df = df[df[by].notna()]
+    values = df[by].to_numpy(dtype=float)
+    k = min(n, len(values))
+    if k < len(values):
+        top_idx = np.argpartition(-values, k - 1)[:k]
+        bottom_idx = np.argpartition(values, k - 1)[:k]
+    else:
+        top_idx = bottom_idx = np.arange(len(values))
+    top = df.iloc[top_idx].sort_values(by, ascending=False, kind="stable")
+    bottom = df.iloc[bottom_idx].sort_values(by, ascending=True, kind="stable")
+    return top.reset_index(drop=True), bottom.reset_index(drop=True)
+
+
+def get_aggregate(table, group_by, metrics, filters=None):
+    """SUM(metric) for each metric, grouped by `group_by`, with pushed-down filters."""
+    return run_select(table, columns=tuple(group_by), sums=tuple(metrics), filters=filters, group_by=tuple(group_by))
+
+
+def get_rankings(table, group_by, metrics, by=None, filters=None, n=10):
+    """
+    Top and bottom `n` groups of `table` ranked by `by` (default: first metric).
+
+    - group_by: column names, e.g. ("District", "State")
+    - metrics: columns summed per group
+    - filters: {column: value} predicates (see utils.query_builder)
+    """
+    metrics = tuple(metrics)
+    return top_bottom(get_aggregate(table, group_by, metrics, filters), by or metrics[0], n)
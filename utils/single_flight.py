@@ -0,0 +1,54 @@
+# single_flight.py — Coalesce identical concurrent calls
+#
+# Right after a deploy or a data version change, every open session misses
+# its cache at the same moment and sends the same query. Callers that ask
+# for a key while a call for it is already running wait for that call and
+# share its result instead of starting their own.
+
+from concurrent.futures import Future
+import threading
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, func):
+        """Return (result, shared): shared is True when another caller's run was reused."""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = func()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self):
+        with self._lock:
+            calls = self.executions + self.coalesced
+            return {
+                "calls": calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._inflight),
+                "coalesced_pct": self.coalesced / calls * 100 if calls else 0.0,
+            }
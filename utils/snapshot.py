@@ -0,0 +1,63 @@
+# snapshot.py — Read-only file snapshot of the dashboard tables
+#
+# After every load the ETL can publish the fact, rollup and catalog tables
+# as files (write_snapshot): Arrow IPC for the memory-mapped "snapshot"
+# backend and Parquet for the "duckdb" backend (utils/backends.py), so the
+# dashboard can run without MySQL.
+#
+# Layout: every publish goes to a fresh <dir>/<run>/ directory and then
+# <dir>/CURRENT is swapped to name it, so readers never see half a snapshot.
+# Readers re-open the tables when CURRENT changes; older runs are removed
+# by the ETL (processes still mapping them keep their view until they
+# re-open).
+
+import os
+import shutil
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+SNAPSHOT_DIR = os.environ.get("PHONEPE_SNAPSHOT_DIR", "snapshot")
+POINTER = "CURRENT"
+KEEP_RUNS = 2
+
+
+# ==========================================
+# WRITING (ETL side)
+# ==========================================
+def write_snapshot(tables, directory=SNAPSHOT_DIR):
+    """
+    Publish {table name: DataFrame} as a new snapshot run (one .arrow and one
+    .parquet file per table) and point CURRENT at it.
+    Returns the run directory.
+    """
+    run = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+    run_dir = os.path.join(directory, run)
+    os.makedirs(run_dir)
+    for name, df in tables.items():
+        path = os.path.join(run_dir, name.lower())
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(path + ".arrow", "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        pq.write_table(table, path + ".parquet")
+
+    tmp = os.path.join(directory, POINTER + ".tmp")
+    with open(tmp, "w") as f:
+        f.write(run)
+    os.replace(tmp, os.path.join(directory, POINTER))
+
+    runs = sorted(d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d)))
+    for old in runs[:-KEEP_RUNS]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    return run_dir
+
+
+def current_run(directory=SNAPSHOT_DIR):
+    """Name of the run CURRENT points at."""
+    with open(os.path.join(directory, POINTER)) as f:
+        return f.read().strip()
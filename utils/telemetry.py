@@ -0,0 +1,103 @@
+# telemetry.py — Per-query latency, size and cache outcome
+#
+# read_sql records every query it runs (or shares with an identical one in
+# flight), and QUERY_CACHE records every result it serves from memory or
+# disk instead. Each event carries the query's fingerprint (whitespace and
+# literals normalized, so one statement with different filter values is one
+# fingerprint), latency, rows, bytes, the cache outcome and the page that
+# asked for it. Events live in a bounded ring buffer read by the
+# Diagnostics page.
+
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import NamedTuple
+import re
+import threading
+import time
+
+import pandas as pd
+
+MAX_EVENTS = 5000
+
+# set by MainPage around the page dispatch and by the warm-up per page;
+# QueryBatch and QUERY_CACHE refreshes carry it over to their threads
+_page = ContextVar("page", default=None)
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"IN \((?:\?|%s)(?:, (?:\?|%s))*\)", re.IGNORECASE)
+
+
+class QueryEvent(NamedTuple):
+    fingerprint: str
+    sql: str
+    params: tuple
+    seconds: float
+    rows: int
+    bytes: int
+    outcome: str    # "db", "coalesced", "hit", "stale", "disk"
+    page: str
+    at: float
+
+
+def fingerprint(sql):
+    """SQL with whitespace collapsed and literals / IN lists replaced by placeholders."""
+    text = " ".join(sql.split()).rstrip(";")
+    text = _STRING.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    return _IN_LIST.sub("IN (...)", text)
+
+
+@contextmanager
+def page(name):
+    """Attribute the queries run inside the block to page `name`."""
+    token = _page.set(name)
+    try:
+        yield
+    finally:
+        _page.reset(token)
+
+
+def current_page():
+    name = _page.get()
+    if name is not None:
+        return name
+    # background work that no page started: label it by its thread pool
+    return f"({threading.current_thread().name.rsplit('_', 1)[0]})"
+
+
+class Telemetry:
+    def __init__(self, max_events=MAX_EVENTS):
+        self._events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    def record(self, sql, params, seconds, result, outcome, nbytes=None):
+        """
+        Add one event. Only database executions ("db") are measured here
+        (a deep memory_usage scan); cache outcomes pass the size their cache
+        already counted, or are recorded without one.
+        """
+        rows = 0
+        if isinstance(result, pd.DataFrame):
+            rows = len(result)
+            if nbytes is None and outcome == "db":
+                nbytes = int(result.memory_usage(index=True, deep=True).sum())
+        event = QueryEvent(fingerprint(sql), sql, tuple(params or ()), seconds, rows, nbytes or 0,
+                           outcome, current_page(), time.time())
+        with self._lock:
+            self._events.append(event)
+
+    def events(self):
+        with self._lock:
+            return list(self._events)
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+    def frame(self):
+        return pd.DataFrame(self.events(), columns=QueryEvent._fields)
+
+
+TELEMETRY = Telemetry()
@@ -0,0 +1,99 @@
+# warmup.py — Pre-compute every page's default view
+#
+# Each page module exposes a `warm_*()` function that loads its
+# default-filter data and builds its default figures through the same
+# caches the page reads (QUERY_CACHE / FIGURES), returning
+# the names of the entries it warmed. MainPage registers them next to the
+# pages and calls `start_warmup` before it renders anything: one process-wide
+# thread (a cache_resource, so it starts once per server) warms every page
+# right away, then polls the data version and warms again after each ETL
+# commit — no visitor's rerun starts or waits for it. The latest report is
+# shown on the Diagnostics page.
+
+from concurrent.futures import ThreadPoolExecutor, wait
+import logging
+import threading
+import time
+
+import streamlit as st
+
+from utils.db import POOL_SIZE, VERSION_POLL_SECONDS, get_data_version
+from utils.prefetch import RESERVED_CONNECTIONS
+from utils import telemetry
+
+logger = logging.getLogger(__name__)
+
+BUDGET_SECONDS = 60
+# leave pool connections free for the first visitors' queries, like the prefetcher
+WARMUP_WORKERS = max(1, POOL_SIZE - RESERVED_CONNECTIONS)
+
+_lock = threading.Lock()
+_state = {"version": None, "report": None, "finished_at": None}
+
+
+def warm_all(warmers, budget_seconds=BUDGET_SECONDS, max_workers=WARMUP_WORKERS):
+    """
+    Run every warmer in parallel for at most `budget_seconds`.
+
+    - warmers: {page name: warm function}
+    Returns {page name: {"status", "seconds", "entries"}}; pages still
+    running when the budget is spent are reported as "timeout" and left to
+    finish in the background.
+    """
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="warmup")
+
+    def run(name, warm):
+        page_start = time.perf_counter()
+        with telemetry.page(f"{name} (warm-up)"):
+            entries = warm()
+        return entries, time.perf_counter() - page_start
+
+    futures = {executor.submit(run, name, warm): name for name, warm in warmers.items()}
+    done, _ = wait(futures, timeout=budget_seconds)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    report = {}
+    for future, name in futures.items():
+        if future not in done:
+            report[name] = {"status": "timeout", "seconds": None, "entries": []}
+        elif future.exception() is not None:
+            report[name] = {"status": f"error: {future.exception()}", "seconds": None, "entries": []}
+        else:
+            entries, seconds = future.result()
+            report[name] = {"status": "ok", "seconds": round(seconds, 3), "entries": entries}
+
+    total = time.perf_counter() - started
+    warmed = sum(len(r["entries"]) for r in report.values())
+    logger.info("Warm-up: %d entries across %d pages in %.1fs", warmed, len(report), total)
+    for name, result in report.items():
+        logger.info("  %s: %s %s", name, result["status"], ", ".join(result["entries"]))
+    return report
+
+
+def _watch(warmers, budget_seconds):
+    """Warm every page now, then again whenever the data version changes."""
+    while True:
+        try:
+            version = get_data_version()
+            if version != _state["version"]:
+                report = warm_all(warmers, budget_seconds)
+                with _lock:
+                    _state.update(version=version, report=report, finished_at=time.time())
+        except Exception:
+            logger.exception("Warm-up failed")
+        time.sleep(VERSION_POLL_SECONDS)
+
+
+@st.cache_resource(show_spinner=False)
+def start_warmup(_warmers, budget_seconds=BUDGET_SECONDS):
+    """Start the warm-up thread once per process (later calls return the running thread)."""
+    thread = threading.Thread(target=_watch, args=(_warmers, budget_seconds), name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def last_report():
+    """(warmed data version, report, finished at) of the latest finished warm-up."""
+    with _lock:
+        return _state["version"], _state["report"], _state["finished_at"]